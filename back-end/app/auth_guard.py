@@ -1,14 +1,87 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", 10000))
+# Comma-separated emails allowed on /admin endpoints.
+ADMIN_EMAILS = {e.strip().lower() for e in os.getenv("ADMIN_EMAILS", "").split(",") if e.strip()}
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
+class TokenCache:
+    """Bounded LRU of verified token -> payload; entries expire at the token's ``exp``."""
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Called with the payload on every request; return True to reject the token.
+        self.revocation_checks: List[Callable[[dict], bool]] = []
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, token: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or self.max_entries <= 0:
+            return  # never cache tokens that don't expire
+        with self._lock:
+            self._entries[token] = (exp, dict(payload))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, payload: dict) -> bool:
+        return any(check(payload) for check in self.revocation_checks)
+
+    # ----------------------
+    # Invalidation hooks
+    # ----------------------
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_subject(self, user_id: str) -> int:
+        """Drop every cached token issued to ``user_id`` (e.g. on logout-everywhere)."""
+        with self._lock:
+            stale = [t for t, (_, p) in self._entries.items() if str(p.get("sub")) == str(user_id)]
+            for token in stale:
+                del self._entries[token]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
     """Decode and validate JWT from Authorization: Bearer header."""
     if not credentials or credentials.scheme.lower() != "bearer":
@@ -20,13 +93,24 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_sche
         raise HTTPException(status_code=500, detail="JWT secret not configured")
 
     token = credentials.credentials
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-    except JWTError:
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+            )
+        token_cache.put(token, payload)
+
+    if token_cache.revocation_checks and token_cache.is_revoked(payload):
+        token_cache.invalidate(token)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+    return payload
 
 
 def get_current_user(payload=Depends(verify_token)):
@@ -38,3 +122,10 @@ def get_current_user(payload=Depends(verify_token)):
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
         )
     return {"id": str(user_id), "email": email}
+
+
+def require_admin(user=Depends(get_current_user)):
+    """Allow only users listed in ``ADMIN_EMAILS``."""
+    if user["email"].lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
@@ -0,0 +1,319 @@
+"""Bulk employee import from CSV.
+
+The CSV needs a header with ``name``, ``email`` and either ``password``
+(plain text, hashed here) or ``password_hash`` (an existing bcrypt hash);
+other columns are ignored. An import runs in three steps:
+
+1. Stream the file row by row, validating each row with the signup rules
+   and dropping repeated emails within the file.
+2. Per batch, look up which emails already exist (one indexed query) and
+   report them without hashing, then hash the rest across cores in a
+   process pool, writing finished rows to a temp CSV so memory stays flat
+   and no DB connection is held while bcrypt runs.
+3. ``COPY`` that file into a temp staging table and merge it into
+   ``employee`` with one ``INSERT ... ON CONFLICT DO NOTHING``. Rows the
+   merge skipped (accounts created since step 2) are reported as
+   conflicts too. A dry run stops after step 2's lookup.
+
+bcrypt dominates the cost (~90 ms per hash at cost 10, per core).
+``BULK_IMPORT_BCRYPT_ROUNDS`` (or ``--rounds``) trades that for a lower
+cost factor; such hashes are upgraded to ``BCRYPT_ROUNDS`` on the user's
+first login, like any other outdated hash.
+
+CLI, from ``back-end/``::
+
+    python -m app.bulk_import users.csv [--rounds 6] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import csv
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, List, Optional
+
+from pydantic import ValidationError
+
+from app.db import get_connection, release_connection
+from app.password_hashing import BCRYPT_ROUNDS, hash_password_sync
+from app.schemas.auth import SignupRequest
+
+BULK_IMPORT_BCRYPT_ROUNDS = int(os.getenv("BULK_IMPORT_BCRYPT_ROUNDS", BCRYPT_ROUNDS))
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", os.cpu_count() or 1))
+BULK_IMPORT_MAX_BYTES = int(os.getenv("BULK_IMPORT_MAX_BYTES", 100 * 1024 * 1024))
+# Rows validated and hashed per batch (bounds memory for very large files).
+BULK_IMPORT_BATCH = int(os.getenv("BULK_IMPORT_BATCH", 5000))
+
+STAGING_SQL = """
+CREATE TEMP TABLE employee_import (
+    line INTEGER NOT NULL,
+    id VARCHAR(20) NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    email VARCHAR(255) NOT NULL,
+    password TEXT NOT NULL
+) ON COMMIT DROP
+"""
+
+COPY_SQL = "COPY employee_import (line, id, name, email, password) FROM STDIN WITH (FORMAT csv)"
+
+# Insert everything that does not collide, then list the staged rows that
+# were not inserted: their email (or, very rarely, generated id) exists.
+MERGE_SQL = """
+WITH inserted AS (
+    INSERT INTO employee (id, name, email, password)
+    SELECT id, name, email, password FROM employee_import ORDER BY line
+    ON CONFLICT DO NOTHING
+    RETURNING id
+)
+SELECT s.line, s.email
+FROM employee_import s
+LEFT JOIN inserted i ON i.id = s.id
+WHERE i.id IS NULL
+ORDER BY s.line
+"""
+
+EXISTING_SQL = "SELECT email FROM employee WHERE email = ANY(%s)"
+
+
+class CSVImportError(ValueError):
+    """The file cannot be imported at all (bad header, bad options)."""
+
+
+class ImportBusy(RuntimeError):
+    """Another import is already hashing on this machine's cores."""
+
+
+_running = threading.Lock()
+
+
+# ----------------------
+# Hashing (top level so process pools can pickle it)
+# ----------------------
+def _hash_chunk(passwords: List[str], rounds: int) -> List[str]:
+    return [hash_password_sync(password, rounds) for password in passwords]
+
+
+def _hash_all(pool: Optional[ProcessPoolExecutor], passwords: List[str], rounds: int) -> List[str]:
+    if pool is None:
+        return _hash_chunk(passwords, rounds)
+    size = max(1, -(-len(passwords) // (BULK_IMPORT_WORKERS * 4)))
+    chunks = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+    return [h for hashed in pool.map(_hash_chunk, chunks, [rounds] * len(chunks)) for h in hashed]
+
+
+# ----------------------
+# Import
+# ----------------------
+def _rows(stream: IO[str]):
+    reader = csv.DictReader(stream)
+    fields = {(f or "").strip().lower() for f in reader.fieldnames or ()}
+    if not {"name", "email"} <= fields or not fields & {"password", "password_hash"}:
+        raise CSVImportError("CSV header must contain name, email and password (or password_hash).")
+    for row in reader:
+        yield reader.line_num, {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+
+
+def _validate(line: int, row: dict, seen: set, report: dict) -> Optional[tuple]:
+    """Return ``(line, name, email, password, is_hash)`` or record why the row is skipped."""
+    stored_hash = row.get("password_hash", "")
+    if stored_hash and not stored_hash.startswith(("$2a$", "$2b$", "$2y$")):
+        report["invalid"].append({"line": line, "errors": ["password_hash is not a bcrypt hash"]})
+        return None
+    try:
+        data = SignupRequest(
+            name=row.get("name", ""),
+            email=row.get("email", ""),
+            # Password rules only apply to plain-text passwords.
+            password=row.get("password") or ("hashed" if stored_hash else ""),
+        )
+    except ValidationError as exc:
+        errors = [f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in exc.errors()]
+        report["invalid"].append({"line": line, "errors": errors})
+        return None
+    email = str(data.email)
+    if email in seen:
+        report["conflicts"].append({"line": line, "email": email, "reason": "duplicate_in_file"})
+        return None
+    seen.add(email)
+    return line, data.name, email, stored_hash or data.password, bool(stored_hash)
+
+
+def import_employees(
+    stream: IO[str],
+    rounds: int = BULK_IMPORT_BCRYPT_ROUNDS,
+    dry_run: bool = False,
+    workers: int = BULK_IMPORT_WORKERS,
+) -> dict:
+    """Import employees from a CSV text stream and return a per-row report. Blocking.
+
+    With ``workers > 1`` each call starts a ``spawn`` process pool, whose
+    workers re-import the caller's ``__main__`` module. A script calling this
+    must do so under ``if __name__ == "__main__":`` (or pass ``workers=1``),
+    otherwise the pool dies with ``BrokenProcessPool``. The API and the CLI
+    are safe as they are.
+    """
+    if not 4 <= rounds <= 31:
+        raise CSVImportError("bcrypt rounds must be between 4 and 31.")
+    if not _running.acquire(blocking=False):
+        raise ImportBusy("An employee import is already running")
+    try:
+        return _import(stream, rounds, dry_run, workers)
+    finally:
+        _running.release()
+
+
+def _import(stream: IO[str], rounds: int, dry_run: bool, workers: int) -> dict:
+    started = time.perf_counter()
+    report = {"rows": 0, "imported": 0, "dry_run": dry_run, "rounds": rounds, "conflicts": [], "invalid": []}
+    seen: set = set()
+    staged = 0
+
+    pool = None
+    if workers > 1 and not dry_run:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as staging:
+        writer = csv.writer(staging)
+        try:
+            batch: List[tuple] = []
+
+            def flush():
+                nonlocal staged
+                existing = _existing_emails([row[2] for row in batch])
+                fresh = []
+                for row in batch:
+                    if row[2] in existing:
+                        report["conflicts"].append({"line": row[0], "email": row[2], "reason": "email_exists"})
+                    else:
+                        fresh.append(row)
+                batch.clear()
+                staged += len(fresh)
+                if dry_run:
+                    return
+                hashed = iter(_hash_all(pool, [row[3] for row in fresh if not row[4]], rounds))
+                for line, name, email, password, is_hash in fresh:
+                    stored = password if is_hash else next(hashed)
+                    writer.writerow((line, uuid.uuid4().hex[:20], name, email, stored))
+
+            for line, row in _rows(stream):
+                report["rows"] += 1
+                valid = _validate(line, row, seen, report)
+                if valid is not None:
+                    batch.append(valid)
+                    if len(batch) >= BULK_IMPORT_BATCH:
+                        flush()
+            flush()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        hashed_at = time.perf_counter()
+
+        if dry_run:
+            report["would_import"] = staged
+        elif staged:
+            staging.seek(0)
+            existing = _load(staging)
+            report["conflicts"].extend(
+                {"line": line, "email": email, "reason": "email_exists"} for line, email in existing
+            )
+            report["imported"] = staged - len(existing)
+        report["conflicts"].sort(key=lambda c: c["line"])
+
+    report["timings"] = {
+        "validate_hash_ms": round((hashed_at - started) * 1000, 2),
+        "load_ms": round((time.perf_counter() - hashed_at) * 1000, 2),
+    }
+    return report
+
+
+def _existing_emails(emails: List[str]) -> set:
+    if not emails:
+        return set()
+    conn = get_connection()
+    if conn is None:
+        raise RuntimeError("Database connection not available.")
+    try:
+        with conn.cursor() as cur:
+            cur.execute(EXISTING_SQL, (emails,))
+            found = {row[0] for row in cur.fetchall()}
+        conn.commit()
+        return found
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def _load(staging: IO[str]) -> list:
+    """COPY the staged rows and merge them; returns ``[(line, email)]`` that already existed."""
+    conn = get_connection()
+    if conn is None:
+        raise RuntimeError("Database connection not available.")
+    try:
+        with conn.cursor() as cur:
+            cur.execute(STAGING_SQL)
+            cur.copy_expert(COPY_SQL, staging)
+            cur.execute(MERGE_SQL)
+            existing = cur.fetchall()
+        conn.commit()
+        return existing
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def import_file(path: str, **kwargs) -> dict:
+    # utf-8-sig: spreadsheets often save CSV with a byte-order mark.
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        return import_employees(fh, **kwargs)
+
+
+# ----------------------
+# CLI
+# ----------------------
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import json
+
+    from app import db
+
+    parser = argparse.ArgumentParser(description="Bulk-import employees from a CSV file.")
+    parser.add_argument("csv_path")
+    parser.add_argument("--rounds", type=int, default=BULK_IMPORT_BCRYPT_ROUNDS, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=BULK_IMPORT_WORKERS, help="hashing processes")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report conflicts only")
+    parser.add_argument("--report", help="write the full JSON report here")
+    args = parser.parse_args(argv)
+
+    db.init_pool()
+    try:
+        report = import_file(args.csv_path, rounds=args.rounds, dry_run=args.dry_run, workers=args.workers)
+    except CSVImportError as exc:
+        print(f"❌ {exc}")
+        return 2
+    finally:
+        db.close_pool()
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    imported = f"{report['would_import']} to import" if args.dry_run else f"{report['imported']} imported"
+    print(
+        f"✅ {imported}, {len(report['conflicts'])} conflicts, "
+        f"{len(report['invalid'])} invalid of {report['rows']} rows "
+        f"(hash {report['timings']['validate_hash_ms']:.0f} ms, load {report['timings']['load_ms']:.0f} ms)"
+    )
+    for item in (report["conflicts"] + report["invalid"])[:20]:
+        print("  ⚠️", item)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
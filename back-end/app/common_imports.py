@@ -1,40 +1,73 @@
 """Shared imports and helpers for LangGraph nodes.
 
 Import this module instead of repeating long import lists.
+
+The langchain / langgraph / PDF / DOCX names are resolved lazily on first
+attribute access, so importing this module (and the API that depends on
+it) stays fast; only the first CV extraction pays for loading them.
 """
 
 from __future__ import annotations
 
+import importlib
 import os
 import json
 from pathlib import Path
 from typing import Any, List, Tuple, TypedDict, cast, Dict
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
-from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, Field, validator, RootModel
 
-# File loading (PDF / DOCX) with fallbacks and friendly errors
-try:
-    from pypdf import PdfReader  # preferred modern package
-except ImportError:
+# name -> (module, attribute); loaded by __getattr__ on first use
+_LAZY_IMPORTS = {
+    "ChatGroq": ("langchain_groq", "ChatGroq"),
+    "AIMessage": ("langchain_core.messages", "AIMessage"),
+    "BaseMessage": ("langchain_core.messages", "BaseMessage"),
+    "HumanMessage": ("langchain_core.messages", "HumanMessage"),
+    "ChatPromptTemplate": ("langchain_core.prompts", "ChatPromptTemplate"),
+    "StateGraph": ("langgraph.graph", "StateGraph"),
+    "END": ("langgraph.graph", "END"),
+    "RetryPolicy": ("langgraph.types", "RetryPolicy"),
+}
+
+
+def _load_pdf_reader():
+    # File loading (PDF / DOCX) with fallbacks and friendly errors
     try:
-        from PyPDF2 import PdfReader  # fallback to older package name
-    except ImportError as exc:  # pragma: no cover - import guard
-        raise ImportError("Install a PDF reader: pip install pypdf (or PyPDF2)") from exc
+        from pypdf import PdfReader  # preferred modern package
+    except ImportError:
+        try:
+            from PyPDF2 import PdfReader  # fallback to older package name
+        except ImportError as exc:  # pragma: no cover - import guard
+            raise ImportError("Install a PDF reader: pip install pypdf (or PyPDF2)") from exc
+    return PdfReader
+
 
-try:
-    from docx import Document  # provided by the python-docx package
-except ImportError as exc:  # pragma: no cover - import guard
+def _load_document():
     try:
-        import docx  # type: ignore
+        from docx import Document  # provided by the python-docx package
+    except ImportError as exc:  # pragma: no cover - import guard
+        try:
+            import docx  # type: ignore
+
+            Document = docx.Document
+        except Exception:
+            raise ImportError("Install python-docx: pip install python-docx") from exc
+    return Document
 
-        Document = docx.Document
-    except Exception:
-        raise ImportError("Install python-docx: pip install python-docx") from exc
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        module, attr = _LAZY_IMPORTS[name]
+        value = getattr(importlib.import_module(module), attr)
+    elif name == "PdfReader":
+        value = _load_pdf_reader()
+    elif name == "Document":
+        value = _load_document()
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # cache: later lookups skip __getattr__
+    return value
 
 
 def load_env() -> None:
@@ -47,7 +80,11 @@ def make_llm(model: str = "llama-3.3-70b-versatile", temperature: float = 0) ->
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise RuntimeError("GROQ_API_KEY not set in .env")
-    return ChatGroq(model=model, api_key=api_key, temperature=temperature)
+    from langchain_groq import ChatGroq
+
+    # SDK retries would bypass app.llm_limiter; graph nodes retry through it instead.
+    max_retries = int(os.getenv("GROQ_MAX_RETRIES", 0))
+    return ChatGroq(model=model, api_key=api_key, temperature=temperature, max_retries=max_retries)
 
 
 __all__ = [
@@ -69,6 +106,7 @@ __all__ = [
     "ChatGroq",
     "StateGraph",
     "END",
+    "RetryPolicy",
     # pydantic
     "BaseModel",
     "Field",
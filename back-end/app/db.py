@@ -1,49 +1,363 @@
 # app/db.py
 import os
+import threading
+import time
+from collections import deque
+
 import psycopg2
-from psycopg2 import pool
+from psycopg2 import extensions
 from dotenv import load_dotenv
 
+from app import metrics, tracing
+
 load_dotenv()  # loads DATABASE_URL from .env
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-conn_pool = None
 
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+# Seconds a request waits for a free connection before giving up.
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+# Requests allowed to queue for a connection; beyond this we fail fast.
+DB_POOL_MAX_WAITING = int(os.getenv("DB_POOL_MAX_WAITING", 50))
+# Connections older than this are closed and replaced (Neon drops long-lived ones).
+DB_CONN_MAX_AGE = float(os.getenv("DB_CONN_MAX_AGE", 1800))
+# Connections idle longer than this are pinged before being handed out.
+DB_CONN_VALIDATE_IDLE = float(os.getenv("DB_CONN_VALIDATE_IDLE", 30))
 
-def _init_pool():
-    """Create connection pool with keepalive to avoid idle SSL drops."""
-    global conn_pool
-    conn_pool = psycopg2.pool.SimpleConnectionPool(
-        minconn=1,
-        maxconn=5,
-        dsn=DATABASE_URL,
+
+class PoolTimeout(Exception):
+    """No connection became available in time (or the wait queue is full)."""
+
+
+def _statement(query) -> str:
+    text = query.decode("utf-8", "replace") if isinstance(query, bytes) else str(query)
+    return " ".join(text.split())[:300]
+
+
+class TracedCursor(extensions.cursor):
+    """Cursor that records each statement as a ``db.query`` span inside traced requests."""
+
+    def execute(self, query, vars=None):
+        if not tracing.active():
+            return super().execute(query, vars)
+        with tracing.span("db.query", **{"db.statement": _statement(query)}) as span:
+            result = super().execute(query, vars)
+            span.set(**{"db.rows": self.rowcount})
+            return result
+
+    def executemany(self, query, vars_list):
+        if not tracing.active():
+            return super().executemany(query, vars_list)
+        with tracing.span("db.query", **{"db.statement": _statement(query), "db.many": True}):
+            return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        if not tracing.active():
+            return super().copy_expert(sql, file, size)
+        with tracing.span("db.copy", **{"db.statement": _statement(sql)}):
+            return super().copy_expert(sql, file, size)
+
+
+class ConnectionPool:
+    """Thread-safe psycopg2 pool with a bounded wait queue.
+
+    Unlike ``SimpleConnectionPool`` this is safe to share between FastAPI's
+    threadpool workers, makes callers wait (up to ``timeout``) instead of
+    erroring when every connection is busy, and replaces bad or old
+    connections one at a time instead of rebuilding the whole pool.
+    """
+
+    def __init__(
+        self,
+        dsn,
+        minconn=DB_POOL_MIN,
+        maxconn=DB_POOL_MAX,
+        timeout=DB_POOL_TIMEOUT,
+        max_waiting=DB_POOL_MAX_WAITING,
+        max_age=DB_CONN_MAX_AGE,
+        validate_idle=DB_CONN_VALIDATE_IDLE,
+        **conn_kwargs,
+    ):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_waiting = max_waiting
+        self.max_age = max_age
+        self.validate_idle = validate_idle
+        self.conn_kwargs = conn_kwargs
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, returned_at)
+        self._created_at = {}  # id(conn) -> created_at, for every open connection
+        self._size = 0  # open connections plus slots reserved for ones being opened
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._stats = {
+            "acquired": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "created": 0,
+            "recycled": 0,
+            "broken": 0,
+        }
+
+    # ----------------------
+    # Connection lifecycle
+    # ----------------------
+    def _connect(self):
+        with tracing.span("db.connect"):
+            conn = psycopg2.connect(self.dsn, **self.conn_kwargs)
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn, reason, keep_slot=False):
+        """Close ``conn``; with ``keep_slot`` the caller opens its replacement."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._stats[reason] += 1
+            if not keep_slot:
+                self._size -= 1
+                self._cond.notify()
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.validate_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def warm_up(self):
+        """Open ``minconn`` connections up front so the first requests don't pay for it."""
+        while True:
+            with self._cond:
+                if self._size >= min(self.minconn, self.maxconn):
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+                self._cond.notify()
+
+    # ----------------------
+    # Acquire / release
+    # ----------------------
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._cond:
+            if self._closed:
+                raise PoolTimeout("Connection pool is closed")
+            waited = False
+            while True:
+                if self._idle:
+                    conn, created_at, returned_at = self._idle.popleft()
+                    self._in_use += 1
+                    break
+                if self._size < self.maxconn:
+                    conn = None
+                    self._in_use += 1
+                    self._size += 1  # reserve the slot; connect outside the lock
+                    break
+
+                if not waited:
+                    if self._waiting >= self.max_waiting:
+                        self._stats["rejected"] += 1
+                        raise PoolTimeout("Too many requests waiting for a database connection")
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection available within {timeout:.1f}s")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            wait_time = time.monotonic() - started
+            self._stats["acquired"] += 1
+            self._stats["wait_time_total"] += wait_time
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        try:
+            if conn is None:
+                return self._connect()
+            if time.monotonic() - created_at > self.max_age:
+                self._discard(conn, "recycled", keep_slot=True)
+                return self._connect()
+            if not self._is_healthy(conn, returned_at):
+                self._discard(conn, "broken", keep_slot=True)
+                return self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, close=False):
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            created_at = self._created_at.get(id(conn))
+        if created_at is None:
+            # Not ours (or already discarded); just make sure it's closed.
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+
+        if close or self._closed or conn.closed:
+            self._discard(conn, "broken")
+            return
+        try:
+            # Handlers that only SELECT leave a transaction open; never pool that.
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            self._discard(conn, "broken")
+            return
+        if time.monotonic() - created_at > self.max_age:
+            self._discard(conn, "recycled")
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn, _, _ in idle:
+            self._discard(conn, "recycled")
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                {
+                    "size": self._size,
+                    "idle": len(self._idle),
+                    "in_use": self._in_use,
+                    "waiting": self._waiting,
+                    "max_size": self.maxconn,
+                    "wait_time_avg": (
+                        stats["wait_time_total"] / stats["acquired"] if stats["acquired"] else 0.0
+                    ),
+                }
+            )
+        return stats
+
+
+def _new_pool():
+    """Create the pool object (no connections are opened yet)."""
+    return ConnectionPool(
+        DATABASE_URL,
         keepalives=1,
         keepalives_idle=30,
         keepalives_interval=10,
         keepalives_count=5,
+        cursor_factory=TracedCursor,
     )
-    print("✅ Database connection pool (re)created")
 
 
-# Initialize on import
-try:
-    _init_pool()
-except Exception as e:
-    print("❌ Failed to create connection pool")
-    print(e)
+conn_pool = _new_pool()
+_pool_lock = threading.Lock()
 
 
-def get_connection():
-    """Get a healthy connection; rebuild pool if connections were dropped."""
+def init_pool():
+    """Warm the pool at startup; failures are logged, requests retry lazily."""
     global conn_pool
+    with _pool_lock:
+        if conn_pool._closed:
+            conn_pool = _new_pool()
     try:
-        if conn_pool is None or conn_pool.closed:
-            _init_pool()
-        conn = conn_pool.getconn()
-        if conn is None or conn.closed:
-            _init_pool()
-            conn = conn_pool.getconn()
-        return conn
+        conn_pool.warm_up()
+        print("✅ Database connection pool ready")
+    except Exception as e:
+        print("❌ Failed to warm up connection pool")
+        print(e)
+
+
+def close_pool():
+    conn_pool.closeall()
+
+
+def pool_stats():
+    return conn_pool.stats()
+
+
+# ----------------------
+# Metrics (read from pool stats at scrape time)
+# ----------------------
+_GAUGE_KEYS = ("size", "idle", "in_use", "waiting", "max_size")
+_EVENT_KEYS = ("acquired", "waits", "timeouts", "rejected", "created", "recycled", "broken")
+
+
+def _pool_samples(label, keys):
+    def collect():
+        stats = pool_stats()
+        return [({label: key}, stats[key]) for key in keys]
+
+    return collect
+
+
+metrics.callback_gauge(
+    "db_pool_connections",
+    "Database pool connections by state.",
+    _pool_samples("state", _GAUGE_KEYS),
+    ("state",),
+)
+metrics.callback_gauge(
+    "db_pool_events_total",
+    "Database pool acquire/wait/timeout/reject/recycle counts.",
+    _pool_samples("event", _EVENT_KEYS),
+    ("event",),
+    kind="counter",
+)
+metrics.callback_gauge(
+    "db_pool_wait_seconds_total",
+    "Total time callers spent waiting for a database connection.",
+    lambda: [({}, pool_stats()["wait_time_total"])],
+    kind="counter",
+)
+
+
+def get_connection(timeout=None):
+    """Get a healthy connection, waiting up to ``timeout`` seconds (None if unavailable)."""
+    try:
+        with tracing.span("db.acquire"):
+            return conn_pool.getconn(timeout=timeout)
     except Exception as e:
         print("❌ Failed to get connection from pool")
         print(e)
@@ -51,7 +365,7 @@ def get_connection():
 
 
 def release_connection(conn):
-    if conn and conn_pool:
+    if conn:
         try:
             conn_pool.putconn(conn)
         except Exception:
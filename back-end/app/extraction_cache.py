@@ -0,0 +1,174 @@
+"""Content-addressed cache for CV extraction results.
+
+Two tiers: an in-process LRU for hot entries and a JSON-file tier on disk
+that survives restarts and is shared by every worker on the host. Keys are
+derived from the uploaded bytes plus the model and prompt version, so a
+prompt or model change never serves stale results.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+CACHE_ENABLED = os.getenv("CV_CACHE_ENABLED", "1") != "0"
+CACHE_MAX_ENTRIES = int(os.getenv("CV_CACHE_MAX_ENTRIES", 256))
+CACHE_TTL_SECONDS = int(os.getenv("CV_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+CACHE_DIR = Path(
+    os.getenv("CV_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache" / "cv_extract")
+)
+CACHE_DISK_MAX_ENTRIES = int(os.getenv("CV_CACHE_DISK_MAX_ENTRIES", 5000))
+
+
+def content_hash(file_bytes: bytes) -> str:
+    """SHA-256 of the raw upload."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def make_key(digest: str, filename: str, model: str, prompt_version: str) -> str:
+    """Combine the content hash with everything that changes the output."""
+    ext = os.path.splitext(filename)[1].lower()
+    raw = f"{digest}|{ext}|{model}|{prompt_version}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ExtractionCache:
+    """In-process LRU in front of a size/TTL-bounded on-disk store."""
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl_seconds: int = CACHE_TTL_SECONDS,
+        directory: Optional[Path] = CACHE_DIR,
+        disk_max_entries: int = CACHE_DISK_MAX_ENTRIES,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.directory = Path(directory) if directory else None
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+
+    # ----------------------
+    # Memory tier
+    # ----------------------
+    def get_memory(self, key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return copy.deepcopy(value)
+
+    def _put_memory(self, key: str, value: dict, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (expires_at, copy.deepcopy(value))
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ----------------------
+    # Disk tier (blocking; call from a worker thread in async code)
+    # ----------------------
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Look up both tiers, promoting disk hits into memory."""
+        value = self.get_memory(key)
+        if value is not None or self.directory is None:
+            return value
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            expires_at = float(entry.get("expires_at", 0))
+        except (OSError, ValueError, TypeError, AttributeError):
+            return None  # missing, half-written or not an entry: a miss
+        if expires_at < time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        value = entry.get("value")
+        if not isinstance(value, dict):
+            return None
+        self._put_memory(key, value, expires_at)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: dict) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._put_memory(key, value, expires_at)
+        if self.directory is None:
+            return
+
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"expires_at": expires_at, "value": value}, fh, ensure_ascii=False)
+            os.replace(tmp, path)  # atomic so concurrent readers never see half a file
+        except OSError as exc:
+            print("⚠️ Could not write CV cache entry:", exc)
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            should_prune = self._disk_writes % 50 == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self) -> int:
+        """Drop expired entries, then the oldest ones above the size cap."""
+        if self.directory is None or not self.directory.exists():
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime + self.ttl_seconds < now:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+                continue
+            entries.append((stat.st_mtime, path))
+
+        overflow = len(entries) - self.disk_max_entries
+        if overflow > 0:
+            entries.sort()
+            for _, path in entries[:overflow]:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+
+cache = ExtractionCache() if CACHE_ENABLED else None
@@ -2,32 +2,145 @@
 
 from __future__ import annotations
 
+from contextlib import nullcontext
 from io import BytesIO
-from typing import Any, List, TypedDict, cast
-import json
+from typing import Any, AsyncIterator, List, Literal, Optional, Tuple, Union, cast
+import asyncio
 import os
+import re
+import threading
+import time
+import weakref
+import zipfile
 
 from .common_imports import (
     BaseModel,
-    ChatPromptTemplate,
-    Document,
-    END,
     Field,
     List as TList,
-    PdfReader,
-    StateGraph,
     TypedDict as TTypedDict,
-    cast as tcast,
     json as cjson,
     load_env,
     make_llm,
 )
 
+from . import graph_checkpoints, llm_routing, metrics, tracing
+from .llm_limiter import LLMOverloaded, is_throttle, limiter_for, retry_after_of, status_of
+from .llm_routing import MODEL_NAME
+from .extraction_cache import cache as result_cache, content_hash, make_key
+from .skill_canonical import canonicalize_skills
+from .skill_canonical import canonicalizer as skill_canonicalizer
+from .skill_matcher import matcher as skill_matcher, scan_cv
+from .text_extraction import Source, extract_text
+from .uploads import SpooledUpload, UploadRejected, close_all, spool_stream
+
 # Load environment variables (API keys, etc.)
 load_env()
 
-# Initialize ChatGroq (shared instance, zero temperature for determinism)
-llm = make_llm()
+# Bump whenever a node prompt or schema changes so cached results are not reused.
+PROMPT_VERSION = "4"
+
+# ChatGroq clients and the compiled graph are built on first use (or by
+# prewarm()), so importing this module never needs GROQ_API_KEY or langchain.
+_llms: dict = {}
+_app = None
+_init_lock = threading.Lock()
+
+
+def get_llm(model: str = MODEL_NAME):
+    """Shared ChatGroq instance for ``model`` (zero temperature for determinism)."""
+    llm = _llms.get(model)
+    if llm is None:
+        with _init_lock:
+            llm = _llms.get(model)
+            if llm is None:
+                llm = _llms[model] = make_llm(model)
+    return llm
+
+
+def _chat_prompt(messages):
+    from .common_imports import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages(messages)
+
+
+# Expected completion size, added to the prompt estimate for rate limiting.
+OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GROQ_OUTPUT_TOKEN_ESTIMATE", 600))
+
+
+class _FallBack(Exception):
+    """This model is busy or slow; try the next one in the node's chain."""
+
+
+async def _call_model(node: str, model: str, prompt_value, schema, est_tokens: float, final: bool) -> dict:
+    """One structured call to ``model``; raises ``_FallBack`` when a later model should take over."""
+    limiter = limiter_for(model)
+    try:
+        await limiter.acquire(est_tokens, max_wait=None if final else llm_routing.GROQ_FALLBACK_MAX_WAIT)
+    except LLMOverloaded as exc:
+        if final:
+            raise
+        metrics.LLM_CALLS.inc(node=node, model=model, outcome="fallback")
+        raise _FallBack(str(exc)) from exc
+
+    structured = get_llm(model).with_structured_output(schema, include_raw=True)
+    timeout = None if final else (llm_routing.fallback_timeout(node) or None)
+    with tracing.span("llm", **{"llm.node": node, "llm.model": model}) as span:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await asyncio.wait_for(structured.ainvoke(prompt_value), timeout)
+            if result.get("parsing_error") is not None:
+                raise result["parsing_error"]
+            if result.get("parsed") is None:
+                raise ValueError(f"{node}: model returned no structured output")
+            outcome = "ok"
+        except asyncio.TimeoutError as exc:
+            if final:
+                raise
+            outcome = "fallback"
+            raise _FallBack(f"{model} took longer than {timeout}s") from exc
+        except Exception as exc:
+            if is_throttle(exc):
+                limiter.throttled(retry_after_of(exc))
+            status = status_of(exc)
+            if not final and status is not None and (status == 429 or status >= 500):
+                outcome = "fallback"
+                raise _FallBack(str(exc)) from exc
+            raise
+        finally:
+            span.set(**{"llm.outcome": outcome})
+            metrics.LLM_CALLS.inc(node=node, model=model, outcome=outcome)
+            metrics.LLM_CALL_DURATION.observe(time.perf_counter() - started, node=node, model=model, outcome=outcome)
+
+        usage = getattr(result.get("raw"), "usage_metadata", None) or {}
+        span.set(**{f"llm.{kind}": usage[kind] for kind in ("input_tokens", "output_tokens") if usage.get(kind)})
+    for kind in ("input_tokens", "output_tokens"):
+        if usage.get(kind):
+            metrics.LLM_TOKENS.inc(usage[kind], node=node, model=model, kind=kind.split("_")[0])
+    limiter.record_usage(est_tokens, usage.get("total_tokens"))
+    return result
+
+
+async def _structured_call(node: str, prompt, schema, inputs: dict) -> dict:
+    """Run ``prompt | llm`` with structured output and record calls and token usage.
+
+    The node's models (``llm_routing``) are tried in order. Each call is
+    admitted by that model's rate limiter first; a provider 429 puts every
+    caller of the model on the provider's retry-after cooldown.
+    """
+    prompt_value = await prompt.ainvoke(inputs)
+    est_tokens = estimate_tokens(prompt_value.to_string()) + OUTPUT_TOKEN_ESTIMATE
+
+    chain = llm_routing.models_for(node)
+    for i, model in enumerate(chain):
+        try:
+            result = await _call_model(node, model, prompt_value, schema, est_tokens, final=i == len(chain) - 1)
+            break
+        except _FallBack as exc:
+            print(f"⚠️ {node}: {model} unavailable ({exc}); falling back to {chain[i + 1]}")
+
+    parsed = result["parsed"]
+    return dict(parsed) if not isinstance(parsed, dict) else parsed
 
 
 # -----------------------------
@@ -74,18 +187,29 @@ class SkillsSummary(BaseModel):
 # 3. GRAPH STATE
 # -----------------------------
 
+# full: extract -> reflect -> summarize
+# auto: skip reflect when local checks find nothing to fix
+# single: one LLM call straight to SkillsSummary (lowest latency)
+# local: no LLM call, summary built from dictionary matches only
+GraphMode = Literal["full", "auto", "single", "local"]
+DEFAULT_MODE: GraphMode = cast(GraphMode, os.getenv("CV_GRAPH_MODE", "full"))
+
+
 class GraphState(TTypedDict):
     cv_text: str
+    mode: str
     initial_skills: dict
     refined_skills: dict
     final_summary: dict
+    review_reasons: list
+    dictionary_skills: list
 
 
 # -----------------------------
 # 4. NODES (With Specialized Prompts)
 # -----------------------------
 
-def extraction_node(state: GraphState):
+async def extraction_node(state: GraphState):
     cv_text = state["cv_text"]
 
     system_msg = """You are an expert ATS (Applicant Tracking System). Extract skills from the CV with strict categorization:
@@ -106,15 +230,21 @@ def extraction_node(state: GraphState):
 
 Return valid JSON."""
 
-    prompt = ChatPromptTemplate.from_messages([("system", system_msg), ("human", "{cv_text}")])
+    prompt = _chat_prompt(
+        [("system", system_msg), ("human", "{cv_text}{dictionary_hint}")]
+    )
 
-    chain = prompt | llm.with_structured_output(SkillsExtraction)
-    result = chain.invoke({"cv_text": cv_text})
+    result = await _structured_call(
+        "extract",
+        prompt,
+        SkillsExtraction,
+        {"cv_text": cv_text, "dictionary_hint": _dictionary_hint(state.get("dictionary_skills"))},
+    )
 
-    return {"initial_skills": dict(result) if not isinstance(result, dict) else result}
+    return {"initial_skills": canonicalize_skills(result)}
 
 
-def reflection_node(state: GraphState):
+async def reflection_node(state: GraphState):
     cv_text = state["cv_text"]
     initial_skills = state["initial_skills"]
 
@@ -132,24 +262,26 @@ def reflection_node(state: GraphState):
    - If the CV mentions "Inventory Control", ensure "Inventory Management" is present.
 """
 
-    prompt = ChatPromptTemplate.from_messages(
+    prompt = _chat_prompt(
         [("system", system_msg), ("human", "Original CV Text:\n{cv_text}\n\nInitial JSON:\n{initial_json}")]
     )
 
-    chain = prompt | llm.with_structured_output(SkillsExtraction)
-
-    result = chain.invoke(
+    result = await _structured_call(
+        "reflect",
+        prompt,
+        SkillsExtraction,
         {
             "cv_text": cv_text,
             "initial_json": cjson.dumps(initial_skills, ensure_ascii=False),
-        }
+        },
     )
 
-    return {"refined_skills": dict(result) if not isinstance(result, dict) else result}
+    return {"refined_skills": canonicalize_skills(result)}
 
 
-def summary_node(state: GraphState):
-    refined_skills = state["refined_skills"]
+async def summary_node(state: GraphState):
+    # In auto mode reflection may have been skipped; summarize the first pass.
+    refined_skills = state.get("refined_skills") or state["initial_skills"]
 
     system_msg = """Final Summarization Task:
 1. Select the top **Core** skills that define this candidate's professional identity.
@@ -161,61 +293,829 @@ def summary_node(state: GraphState):
 4. Ensure strictly clean output (no duplicates).
 """
 
-    prompt = ChatPromptTemplate.from_messages(
+    prompt = _chat_prompt(
         [("system", system_msg), ("human", "Refined Skills:\n{skills_json}")]
     )
 
-    chain = prompt | llm.with_structured_output(SkillsSummary)
+    result = await _structured_call(
+        "summarize",
+        prompt,
+        SkillsSummary,
+        {"skills_json": cjson.dumps(refined_skills, ensure_ascii=False)},
+    )
+
+    return {"final_summary": canonicalize_skills(result)}
+
+
+def _dictionary_hint(hits) -> str:
+    if not hits:
+        return ""
+    names = ", ".join(hit["name"] for hit in hits)
+    return (
+        "\n\n---\nKnown skill names found in this CV by dictionary match "
+        "(keep only those the CV really supports, and categorize them):\n" + names
+    )
+
+
+async def single_pass_node(state: GraphState):
+    cv_text = state["cv_text"]
+
+    system_msg = """You are an expert ATS (Applicant Tracking System). Read the CV and return only the candidate's CORE skills:
+
+1. **Core Hard Skills (max 15):** Abstract professional abilities ("Data Analysis", "Supply Chain Management"). No tools here.
+2. **Core Tools & Tech (max 15):** Programming languages, software, frameworks ("Python", "Odoo", "React").
+   - Normalize names: "Microsoft Excel" -> "Excel", "React.js" -> "React", "ML" -> "Machine Learning".
+3. **Core Soft Skills (max 8):** High-value interpersonal traits. IGNORE fluff like "Hard worker", "Motivated".
+4. **Core Languages:** All human spoken languages found.
+
+Prioritize skills relevant to the most recent roles. No duplicates. Return valid JSON."""
+
+    prompt = _chat_prompt([("system", system_msg), ("human", "{cv_text}")])
 
-    result = chain.invoke({"skills_json": cjson.dumps(refined_skills, ensure_ascii=False)})
+    result = await _structured_call("single", prompt, SkillsSummary, {"cv_text": cv_text})
 
-    return {"final_summary": dict(result) if not isinstance(result, dict) else result}
+    return {"final_summary": canonicalize_skills(result)}
 
 
 # -----------------------------
-# 5. BUILD THE GRAPH
+# 5. ROUTING (cheap local checks)
 # -----------------------------
 
-workflow = StateGraph(GraphState)
+def skill_key(name: str) -> str:
+    return skill_canonicalizer.key(name)
+
+
+def extraction_review_reasons(skills: dict) -> List[str]:
+    """Return why a first-pass extraction still needs the reflection node.
+
+    An empty list means the extraction is already clean enough to summarize.
+    Duplicates, aliases, tools filed as hard skills and filler soft skills
+    are not reasons: ``canonicalize_skills`` already fixed them locally.
+    """
+    reasons = []
+    if not skills.get("hard_skills") or not skills.get("tools_and_tech"):
+        reasons.append("empty_category")
+    return reasons
+
+
+# Dictionary coverage needed before auto mode skips the LLM entirely.
+LOCAL_MIN_HITS = int(os.getenv("CV_LOCAL_MIN_HITS", 8))
+LOCAL_MIN_COVERAGE = float(os.getenv("CV_LOCAL_MIN_COVERAGE", 0.9))
+
+# Caps mirror the SkillsSummary field descriptions.
+SUMMARY_LIMITS = {
+    "hard_skills": ("core_hard_skills", 15),
+    "soft_skills": ("core_soft_skills", 8),
+    "tools_and_tech": ("core_tools_and_tech", 15),
+    "languages": ("core_languages", None),
+}
+
+
+def _dictionary_covers(hits) -> bool:
+    """True when enough hits are found and nearly all have a learned category."""
+    if not hits or len(hits) < LOCAL_MIN_HITS:
+        return False
+    known = sum(1 for hit in hits if hit.get("category"))
+    return known / len(hits) >= LOCAL_MIN_COVERAGE
+
+
+def _route_entry(state: GraphState) -> str:
+    mode = state.get("mode")
+    if mode == "single":
+        return "single"
+    if mode == "local" or (mode == "auto" and _dictionary_covers(state.get("dictionary_skills"))):
+        return "local"
+    return "extract"
+
+
+async def local_node(state: GraphState):
+    """Build the extraction and summary from dictionary hits, no LLM call."""
+    skills = {category: [] for category in SUMMARY_LIMITS}
+    for hit in state.get("dictionary_skills") or []:
+        # Uncategorized names are most often tools in practice.
+        skills[hit.get("category") or "tools_and_tech"].append(hit["name"])
 
-workflow.add_node("extract", extraction_node)
-workflow.add_node("reflect", reflection_node)
-workflow.add_node("summarize", summary_node)
+    skills = canonicalize_skills(skills)
+    summary = {}
+    for category, (summary_key, limit) in SUMMARY_LIMITS.items():
+        summary[summary_key] = skills[category][:limit] if limit else skills[category]
+    return {"initial_skills": skills, "final_summary": summary}
 
-workflow.set_entry_point("extract")
-workflow.add_edge("extract", "reflect")
-workflow.add_edge("reflect", "summarize")
-workflow.add_edge("summarize", END)
 
-app = workflow.compile()
+async def review_node(state: GraphState):
+    initial = state["initial_skills"]
+    reasons = extraction_review_reasons(initial)
+
+    # Validate against the dictionary: frequent hits the LLM dropped need a second look.
+    hits = state.get("dictionary_skills") or []
+    if hits:
+        extracted = {skill_key(str(name)) for values in initial.values() for name in values or []}
+        missed = [hit for hit in hits if hit["count"] > 1 and skill_key(hit["name"]) not in extracted]
+        if missed:
+            reasons.append("missed_dictionary_skills")
+
+    return {"review_reasons": reasons}
+
+
+def _route_after_review(state: GraphState) -> str:
+    if state.get("mode") == "auto" and not state.get("review_reasons"):
+        return "summarize"
+    return "reflect"
+
+
+# -----------------------------
+# 6. BUILD THE GRAPH
+# -----------------------------
+
+def _timed(name: str, node):
+    """Wrap a node so its duration lands in ``cv_graph_node_duration_seconds``."""
+
+    async def run(state: GraphState):
+        with metrics.GRAPH_NODE_DURATION.time(node=name), tracing.span(f"node {name}"):
+            return await node(state)
+
+    run.__name__ = node.__name__
+    return run
+
+
+# Per-node retries for LLM calls (Groq 5xx/429, timeouts, malformed output).
+NODE_MAX_ATTEMPTS = int(os.getenv("CV_NODE_MAX_ATTEMPTS", 3))
+NODE_RETRY_INITIAL = float(os.getenv("CV_NODE_RETRY_INITIAL", 0.5))
+NODE_RETRY_MAX = float(os.getenv("CV_NODE_RETRY_MAX", 8))
+
+
+def _should_retry(exc: Exception) -> bool:
+    if isinstance(exc, LLMOverloaded):
+        return False  # our own admission control already waited as long as allowed
+    status = status_of(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if type(exc).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True
+    # OutputParserException and pydantic ValidationError: the model returned
+    # malformed structured output, which usually succeeds on a second try.
+    return isinstance(exc, ValueError)
+
+
+def build_graph(checkpointer=None):
+    from .common_imports import END, RetryPolicy, StateGraph
+
+    retry = RetryPolicy(
+        initial_interval=NODE_RETRY_INITIAL,
+        max_interval=NODE_RETRY_MAX,
+        max_attempts=NODE_MAX_ATTEMPTS,
+        retry_on=_should_retry,
+    )
+
+    workflow = StateGraph(GraphState)
+
+    workflow.add_node("extract", _timed("extract", extraction_node), retry_policy=retry)
+    workflow.add_node("review", _timed("review", review_node))
+    workflow.add_node("reflect", _timed("reflect", reflection_node), retry_policy=retry)
+    workflow.add_node("summarize", _timed("summarize", summary_node), retry_policy=retry)
+    workflow.add_node("single", _timed("single", single_pass_node), retry_policy=retry)
+    workflow.add_node("local", _timed("local", local_node))
+
+    workflow.set_conditional_entry_point(
+        _route_entry, {"extract": "extract", "single": "single", "local": "local"}
+    )
+    workflow.add_edge("extract", "review")
+    workflow.add_conditional_edges(
+        "review", _route_after_review, {"reflect": "reflect", "summarize": "summarize"}
+    )
+    workflow.add_edge("reflect", "summarize")
+    workflow.add_edge("summarize", END)
+    workflow.add_edge("single", END)
+    workflow.add_edge("local", END)
+
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def get_app():
+    """The compiled graph, built once per process."""
+    global _app
+    if _app is None:
+        with _init_lock:
+            if _app is None:
+                _app = build_graph()
+    return _app
+
+
+# checkpointer -> graph compiled with it (sqlite savers are per event loop)
+_checkpointed_apps: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+async def _prepare_run(key: str, initial_state: GraphState, fresh: bool):
+    """Return ``(graph, config, input, saver)`` for one extraction.
+
+    With checkpointing on, a failed earlier run of the same CV is resumed
+    from its last completed node (``input`` is then None). ``fresh`` drops
+    any leftover run instead. A returned ``saver`` means the run holds the
+    thread's claim: the caller must ``graph_checkpoints.release`` it.
+    """
+    saver = graph_checkpoints.get_saver() if initial_state["mode"] != "local" else None
+    if saver is None or not await graph_checkpoints.claim(saver, key):
+        # Same CV already running (here or in another worker): run without checkpoints.
+        return get_app(), None, initial_state, None
+
+    graph = _checkpointed_apps.get(saver)
+    if graph is None:
+        with _init_lock:
+            graph = _checkpointed_apps.get(saver) or build_graph(saver)
+            _checkpointed_apps[saver] = graph
+
+    config = graph_checkpoints.config_for(key)
+    try:
+        snapshot = await graph.aget_state(config)
+        if snapshot.next:
+            if not fresh and not graph_checkpoints.is_expired(key, snapshot.created_at):
+                print(f"♻️ Resuming CV extraction at {', '.join(snapshot.next)}")
+                return graph, config, None, saver
+            await saver.adelete_thread(key)
+    except BaseException:
+        await graph_checkpoints.release(saver, key)
+        raise
+    return graph, config, initial_state, saver
+
+
+def prewarm() -> None:
+    """Build the graph, the file parsers and the LLM client ahead of traffic."""
+    from . import common_imports
+
+    get_app()
+    common_imports.PdfReader, common_imports.Document  # trigger the lazy imports
+    for model in llm_routing.all_models():
+        get_llm(model)
 
 
 # -----------------------------
-# 6. FILE HELPERS & API ENTRY
+# 7. PREPROCESSING (token budget)
+# -----------------------------
+
+# Rough budget for the CV text sent to each LLM node (it is sent twice).
+CV_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", 3000))
+
+SECTION_KEYWORDS = {
+    "skills": (
+        "skills", "technical skills", "core skills", "key skills", "competencies",
+        "core competencies", "technologies", "tools", "tech stack", "expertise",
+    ),
+    "experience": (
+        "experience", "work experience", "professional experience", "employment",
+        "employment history", "work history", "career history",
+    ),
+    "projects": ("projects", "key projects", "personal projects", "portfolio"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "languages": ("languages", "language skills"),
+    "education": ("education", "academic background", "qualifications"),
+    "summary": ("summary", "profile", "professional summary", "about me", "objective"),
+    "other": ("references", "hobbies", "interests", "personal information", "volunteering"),
+}
+_HEADING_LOOKUP = {kw: name for name, kws in SECTION_KEYWORDS.items() for kw in kws}
+
+# Which sections survive first when the CV is over budget.
+SECTION_PRIORITY = (
+    "skills", "languages", "certifications", "experience", "projects",
+    "header", "summary", "education", "other",
+)
+
+_SPACE_RUN = re.compile(r"[ \t\u00a0\u200b\f\v]+")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d{1,3}(\s*(/|of)\s*\d{1,3})?$", re.IGNORECASE)
+_HEADING_STRIP = re.compile(r"[^a-z ]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _normalize_lines(page: str) -> List[str]:
+    lines = []
+    for raw in page.replace("\r", "\n").split("\n"):
+        line = _SPACE_RUN.sub(" ", raw).strip()
+        if line and not _PAGE_NUMBER.match(line):
+            lines.append(line)
+    return lines
+
+
+def _drop_repeated_lines(pages: List[List[str]]) -> List[str]:
+    """Flatten pages, removing lines repeated on most pages (headers/footers)."""
+    if len(pages) < 2:
+        return [line for page in pages for line in page]
+    seen_on = {}
+    for page in pages:
+        for line in set(page):
+            seen_on[line] = seen_on.get(line, 0) + 1
+    threshold = max(2, (len(pages) + 1) // 2)
+    repeated = {line for line, count in seen_on.items() if count >= threshold}
+    return [line for page in pages for line in page if line not in repeated]
+
+
+def _section_for(line: str) -> Optional[str]:
+    if len(line) > 40:
+        return None
+    key = _HEADING_STRIP.sub("", line.lower()).strip()
+    return _HEADING_LOOKUP.get(key)
+
+
+def _split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in lines:
+        name = _section_for(line)
+        if name:
+            sections.append((name, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, body) for name, body in sections if body]
+
+
+def preprocess_cv_text(pages: List[str], token_budget: int = CV_TOKEN_BUDGET) -> dict:
+    """Clean CV text and trim it to ``token_budget``, keeping skill-dense sections.
+
+    Returns the prompt text plus the detected sections and token estimates
+    before/after, so prompt-size savings can be measured per CV.
+    """
+    raw_text = "\n".join(pages)
+    lines = _drop_repeated_lines([_normalize_lines(page) for page in pages])
+    sections = _split_sections(lines)
+
+    texts = ["\n".join(body) for _, body in sections]
+    total = sum(estimate_tokens(t) for t in texts)
+    if total <= token_budget:
+        kept = texts
+    else:
+        # Fill the budget in priority order, then restore document order.
+        kept = [""] * len(sections)
+        remaining = token_budget
+        order = sorted(
+            range(len(sections)),
+            key=lambda i: (SECTION_PRIORITY.index(sections[i][0]), i),
+        )
+        for i in order:
+            if remaining <= 0:
+                break
+            cost = estimate_tokens(texts[i])
+            if cost <= remaining:
+                kept[i] = texts[i]
+                remaining -= cost
+            else:
+                kept[i] = texts[i][: remaining * 4].rsplit("\n", 1)[0]
+                remaining = 0
+
+    text = "\n\n".join(t for t in kept if t)
+    return {
+        "text": text,
+        "sections": [name for (name, _), t in zip(sections, kept) if t],
+        "tokens_in": estimate_tokens(raw_text),
+        "tokens_out": estimate_tokens(text),
+    }
+
+
+# -----------------------------
+# 8. FILE HELPERS & API ENTRY
 # -----------------------------
 
 def _load_cv_text_from_bytes(file_bytes: bytes, filename: str) -> str:
-    ext = os.path.splitext(filename)[1].lower()
-    if ext == ".pdf":
-        reader = PdfReader(BytesIO(file_bytes))
-        return "\n".join([page.extract_text() or "" for page in reader.pages])
-    if ext in (".docx", ".doc"):
-        doc = Document(BytesIO(file_bytes))
-        return "\n".join([p.text for p in doc.paragraphs])
-    if ext == ".txt":
-        return file_bytes.decode("utf-8", errors="ignore")
-    raise RuntimeError("Unsupported file type. Use PDF, DOCX, or TXT.")
-
-
-def extract_skills_from_bytes(file_bytes: bytes, filename: str) -> dict:
-    cv_text = _load_cv_text_from_bytes(file_bytes, filename)
-    if not cv_text.strip():
+    return extract_text(file_bytes, filename)["text"]
+
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".doc", ".txt")
+
+# Batch limits: how many CVs run the LLM graph at once, how many are parsed
+# at once (parsing uses the default executor, shared with the rest of the
+# app), and zip-bomb guards.
+BATCH_CONCURRENCY = int(os.getenv("CV_BATCH_CONCURRENCY", 8))
+BATCH_PARSE_CONCURRENCY = int(os.getenv("CV_BATCH_PARSE_CONCURRENCY", min(4, os.cpu_count() or 1)))
+BATCH_MAX_FILES = int(os.getenv("CV_BATCH_MAX_FILES", 200))
+ZIP_MAX_UNCOMPRESSED = int(os.getenv("CV_ZIP_MAX_UNCOMPRESSED", 200 * 1024 * 1024))
+
+
+def _expand_zip(source: Source, filename: str) -> Tuple[List[SpooledUpload], List[dict]]:
+    """Spool every supported CV inside a zip archive to its own temp file.
+
+    Returns the spooled entries plus per-file errors for members that are
+    too large or not really documents.
+    """
+    entries: List[SpooledUpload] = []
+    errors: List[dict] = []
+    total = 0
+    archive_source = BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    try:
+        with zipfile.ZipFile(archive_source) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue
+                if os.path.splitext(name)[1].lower() not in SUPPORTED_EXTENSIONS:
+                    continue
+                total += info.file_size
+                if total > ZIP_MAX_UNCOMPRESSED:
+                    raise RuntimeError(f"{filename}: archive expands beyond the allowed size.")
+                try:
+                    with archive.open(info) as member:
+                        entries.append(spool_stream(member, f"{filename}/{name}"))
+                except UploadRejected as exc:
+                    errors.append({"filename": f"{filename}/{name}", "ok": False, "error": str(exc)})
+    except BaseException:
+        close_all(entries)
+        raise
+    return entries, errors
+
+
+async def _cache_lookup(key: str) -> Optional[dict]:
+    if result_cache is None:
+        return None
+    cached = result_cache.get_memory(key)
+    if cached is None:
+        cached = await asyncio.to_thread(result_cache.get, key)
+    return cached
+
+
+async def _cache_store(key: str, result: dict) -> None:
+    if result_cache is not None:
+        await asyncio.to_thread(result_cache.set, key, result)
+
+
+def _parse_and_preprocess(source: Source, filename: str) -> dict:
+    parsed = extract_text(source, filename)
+    started = time.perf_counter()
+    prepared = preprocess_cv_text(parsed["pages"])
+    parsed["raw_chars"] = len(parsed["text"])
+    parsed.update(prepared)
+    parsed["preprocess_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    started = time.perf_counter()
+    skill_canonicalizer.refresh_from_db()
+    parsed["dictionary_skills"] = scan_cv(parsed["text"])
+    parsed["match_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return parsed
+
+
+async def _parse_cv(source: Source, filename: str) -> dict:
+    # PDF/DOCX parsing is CPU-bound; keep it off the event loop.
+    parsed = await asyncio.to_thread(_parse_and_preprocess, source, filename)
+    if not parsed["text"].strip():
         raise RuntimeError("Could not extract text from the uploaded file.")
+    return parsed
+
+
+def _parse_info(parsed: dict) -> dict:
+    return {
+        "page_count": parsed["page_count"],
+        "pages_parsed": parsed["pages_parsed"],
+        "chars": parsed["raw_chars"],
+        "truncated": parsed["truncated"],
+        "sections": parsed["sections"],
+        "tokens_in": parsed["tokens_in"],
+        "tokens_out": parsed["tokens_out"],
+    }
+
 
-    initial_state: GraphState = {"cv_text": cv_text}  # type: ignore
-    final_state = cast(dict, app.invoke(initial_state))
+def _result_from_state(final_state: dict) -> dict:
     return {
         "summary": final_state.get("final_summary", {}),
         "initial_extraction": final_state.get("initial_skills", {}),
         "refined_extraction": final_state.get("refined_skills", {}),
+        "mode": final_state.get("mode", DEFAULT_MODE),
+        "reflection_skipped": "initial_skills" in final_state and "refined_skills" not in final_state,
+        "review_reasons": final_state.get("review_reasons", []),
+        "dictionary_skills": final_state.get("dictionary_skills", []),
+    }
+
+
+def _initial_state(parsed: dict, mode: str) -> dict:
+    return {
+        "cv_text": parsed["text"],
+        "mode": mode,
+        "dictionary_skills": parsed["dictionary_skills"],
+    }
+
+
+def _learn_categories(final_state: dict) -> None:
+    """Teach the dictionary matcher where the LLM filed each known skill."""
+    if "review_reasons" not in final_state:
+        return  # no LLM extraction ran (local or single-call path)
+    skills = final_state.get("refined_skills") or final_state.get("initial_skills")
+    if skills and final_state.get("dictionary_skills"):
+        skill_matcher.learn(skills)
+
+
+def _cache_key(digest: str, filename: str, mode: str) -> str:
+    return make_key(digest, filename, llm_routing.signature(), f"{PROMPT_VERSION}:{mode}")
+
+
+# cache key -> task running that extraction (see aextract_skills_from_bytes)
+_inflight: dict = {}
+
+COALESCED = metrics.counter(
+    "cv_extract_coalesced_total", "Extractions that joined an identical in-flight run."
+)
+
+
+async def aextract_skills_from_bytes(
+    file_bytes: bytes,
+    filename: str,
+    use_cache: bool = True,
+    llm_slots: Optional[asyncio.Semaphore] = None,
+    mode: GraphMode = DEFAULT_MODE,
+    parse_slots: Optional[asyncio.Semaphore] = None,
+) -> dict:
+    """Async entry point: parse off the event loop, then run the graph with ainvoke.
+
+    Results are cached by content hash + model + prompt version; pass
+    ``use_cache=False`` to force a fresh run (the new result is still stored).
+    ``llm_slots`` caps how many graph runs share the LLM at once and
+    ``parse_slots`` how many files are parsed at once. ``mode`` picks the
+    graph path, see ``GraphMode``. Concurrent calls for the same CV share
+    one run (``"coalesced": True``).
+    """
+    return await _aextract(
+        file_bytes, content_hash(file_bytes), filename, use_cache, llm_slots, mode, parse_slots
+    )
+
+
+async def aextract_skills_from_upload(
+    upload: SpooledUpload,
+    use_cache: bool = True,
+    llm_slots: Optional[asyncio.Semaphore] = None,
+    mode: GraphMode = DEFAULT_MODE,
+    parse_slots: Optional[asyncio.Semaphore] = None,
+) -> dict:
+    """Like ``aextract_skills_from_bytes`` for a spooled upload (parsed from its temp file)."""
+    return await _aextract(
+        upload.path, upload.digest, upload.parse_name, use_cache, llm_slots, mode, parse_slots
+    )
+
+
+async def _aextract(
+    source: Source,
+    digest: str,
+    filename: str,
+    use_cache: bool,
+    llm_slots: Optional[asyncio.Semaphore],
+    mode: GraphMode,
+    parse_slots: Optional[asyncio.Semaphore] = None,
+) -> dict:
+    key = _cache_key(digest, filename, mode)
+    if use_cache:
+        cached = await _cache_lookup(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    # Single flight: identical uploads in flight share one pipeline run.
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is not None and task.get_loop() is loop and not task.done():
+        COALESCED.inc()
+        return {**(await asyncio.shield(task)), "coalesced": True}
+
+    task = loop.create_task(
+        _run_extraction(source, filename, key, use_cache, llm_slots, mode, parse_slots)
+    )
+    _inflight[key] = task
+    task.add_done_callback(lambda done: _inflight.pop(key, None) if _inflight.get(key) is done else None)
+    # shield: a caller that disconnects must not cancel the run for the others.
+    return await asyncio.shield(task)
+
+
+async def _run_extraction(
+    source: Source,
+    filename: str,
+    key: str,
+    use_cache: bool,
+    llm_slots: Optional[asyncio.Semaphore],
+    mode: GraphMode,
+    parse_slots: Optional[asyncio.Semaphore] = None,
+) -> dict:
+    async with parse_slots or nullcontext():
+        parsed = await _parse_cv(source, filename)
+
+    initial_state = cast(GraphState, _initial_state(parsed, mode))
+    graph, config, graph_input, saver = await _prepare_run(key, initial_state, fresh=not use_cache)
+    try:
+        # The claim is held while waiting for a slot too: cancelled waits must release it.
+        async with llm_slots or nullcontext():
+            llm_started = time.perf_counter()
+            final_state = cast(dict, await graph.ainvoke(graph_input, config))
+            llm_ms = round((time.perf_counter() - llm_started) * 1000, 2)
+        if saver is not None:
+            await graph_checkpoints.finished(saver, key)
+    except BaseException:
+        if saver is not None:
+            await graph_checkpoints.failed(saver, key)
+        raise
+    finally:
+        if saver is not None:
+            await graph_checkpoints.release(saver, key)
+    _learn_categories(final_state)
+    result = _result_from_state(final_state)
+    await _cache_store(key, result)
+    return {
+        **result,
+        "cached": False,
+        "parse": _parse_info(parsed),
+        "timings": {
+            "parse_ms": parsed["parse_ms"],
+            "preprocess_ms": parsed["preprocess_ms"],
+            "match_ms": parsed["match_ms"],
+            "llm_ms": llm_ms,
+        },
+    }
+
+
+# Graph node name -> [(state key it produces, public event name)]
+STREAM_EVENTS = {
+    "extract": [("initial_skills", "initial_skills")],
+    "reflect": [("refined_skills", "refined_skills")],
+    "summarize": [("final_summary", "final_summary")],
+    "single": [("final_summary", "final_summary")],
+    "local": [("initial_skills", "initial_skills"), ("final_summary", "final_summary")],
+}
+
+
+def astream_skills_from_bytes(
+    file_bytes: bytes, filename: str, use_cache: bool = True, mode: GraphMode = DEFAULT_MODE
+) -> AsyncIterator[Tuple[str, dict]]:
+    """Yield ``(event, data)`` as each graph node finishes, then ``("done", result)``.
+
+    A cache hit replays every stage immediately.
+    """
+    return _astream(file_bytes, content_hash(file_bytes), filename, use_cache, mode)
+
+
+def astream_skills_from_upload(
+    upload: SpooledUpload, use_cache: bool = True, mode: GraphMode = DEFAULT_MODE
+) -> AsyncIterator[Tuple[str, dict]]:
+    """Like ``astream_skills_from_bytes`` for a spooled upload."""
+    return _astream(upload.path, upload.digest, upload.parse_name, use_cache, mode)
+
+
+async def _astream(
+    source: Source, digest: str, filename: str, use_cache: bool, mode: GraphMode
+) -> AsyncIterator[Tuple[str, dict]]:
+    key = _cache_key(digest, filename, mode)
+    if use_cache:
+        cached = await _cache_lookup(key)
+        if cached is not None:
+            if cached.get("initial_extraction"):
+                yield "initial_skills", cached["initial_extraction"]
+            if cached.get("refined_extraction"):
+                yield "refined_skills", cached["refined_extraction"]
+            yield "final_summary", cached.get("summary", {})
+            yield "done", {**cached, "cached": True}
+            return
+
+    parsed = await _parse_cv(source, filename)
+    yield "parsed", {
+        **_parse_info(parsed),
+        "parse_ms": parsed["parse_ms"],
+        "preprocess_ms": parsed["preprocess_ms"],
+        "match_ms": parsed["match_ms"],
+    }
+
+    initial_state = cast(GraphState, _initial_state(parsed, mode))
+    graph, config, graph_input, saver = await _prepare_run(key, initial_state, fresh=not use_cache)
+    final_state = dict(initial_state)
+    llm_started = time.perf_counter()
+    try:
+        if graph_input is None:
+            # Resuming: replay what the failed run already produced.
+            final_state.update((await graph.aget_state(config)).values)
+            for state_key, event in (("initial_skills", "initial_skills"), ("refined_skills", "refined_skills")):
+                if final_state.get(state_key):
+                    yield event, final_state[state_key]
+
+        async for update in graph.astream(graph_input, config, stream_mode="updates"):
+            for node, values in update.items():
+                if not values:
+                    continue
+                final_state.update(values)
+                for state_key, event in STREAM_EVENTS.get(node, []):
+                    yield event, values.get(state_key, {})
+        if saver is not None:
+            await graph_checkpoints.finished(saver, key)
+    except BaseException:
+        # Includes GeneratorExit when the client disconnects mid-stream.
+        if saver is not None:
+            await graph_checkpoints.failed(saver, key)
+        raise
+    finally:
+        if saver is not None:
+            await graph_checkpoints.release(saver, key)
+
+    llm_ms = round((time.perf_counter() - llm_started) * 1000, 2)
+
+    _learn_categories(final_state)
+    result = _result_from_state(final_state)
+    await _cache_store(key, result)
+    yield "done", {
+        **result,
+        "cached": False,
+        "parse": _parse_info(parsed),
+        "timings": {
+            "parse_ms": parsed["parse_ms"],
+            "preprocess_ms": parsed["preprocess_ms"],
+            "match_ms": parsed["match_ms"],
+            "llm_ms": llm_ms,
+        },
     }
+
+
+def extract_skills_from_bytes(
+    file_bytes: bytes, filename: str, use_cache: bool = True, mode: GraphMode = DEFAULT_MODE
+) -> dict:
+    """Blocking wrapper for scripts and worker processes (no running event loop)."""
+
+    async def run():
+        try:
+            return await aextract_skills_from_bytes(file_bytes, filename, use_cache=use_cache, mode=mode)
+        finally:
+            await graph_checkpoints.aclose()  # the sqlite saver dies with this loop
+
+    return asyncio.run(run())
+
+
+def extract_skills_from_upload(
+    upload: SpooledUpload, use_cache: bool = True, mode: GraphMode = DEFAULT_MODE
+) -> dict:
+    """Blocking wrapper around ``aextract_skills_from_upload`` (no running event loop)."""
+
+    async def run():
+        try:
+            return await aextract_skills_from_upload(upload, use_cache=use_cache, mode=mode)
+        finally:
+            await graph_checkpoints.aclose()
+
+    return asyncio.run(run())
+
+
+async def aextract_batch(
+    files: List[Union[Tuple[bytes, str], SpooledUpload]],
+    use_cache: bool = True,
+    concurrency: int = BATCH_CONCURRENCY,
+    mode: GraphMode = DEFAULT_MODE,
+    parse_concurrency: int = BATCH_PARSE_CONCURRENCY,
+) -> List[dict]:
+    """Extract many CVs concurrently; zips are expanded, errors are per file.
+
+    ``files`` holds ``(bytes, filename)`` pairs or spooled uploads. At most
+    ``parse_concurrency`` files are parsed at once, so a large batch cannot
+    fill the default executor that logins and uploads also use, and at most
+    ``concurrency`` graph runs talk to Groq at the same time. Unreadable archives and rejected archive
+    members are listed first, the rest follow the input order.
+    """
+    expanded: List[Union[Tuple[bytes, str], SpooledUpload]] = []
+    errors: List[dict] = []
+    spooled: List[SpooledUpload] = []  # zip members; removed when the batch ends
+    try:
+        for item in files:
+            if isinstance(item, SpooledUpload):
+                source, filename, ext = item.path, item.filename, item.extension
+            else:
+                source, filename = item
+                ext = os.path.splitext(filename)[1].lower()
+            if ext != ".zip":
+                expanded.append(item)
+                continue
+            try:
+                entries, rejected = await asyncio.to_thread(_expand_zip, source, filename)
+            except (zipfile.BadZipFile, RuntimeError) as exc:
+                errors.append({"filename": filename, "ok": False, "error": str(exc)})
+                continue
+            spooled.extend(entries)
+            errors.extend(rejected)
+            expanded.extend(entries)
+
+        if len(expanded) > BATCH_MAX_FILES:
+            raise RuntimeError(f"Too many files in batch (max {BATCH_MAX_FILES}).")
+
+        slots = asyncio.Semaphore(max(1, concurrency))
+        parse_slots = asyncio.Semaphore(max(1, parse_concurrency))
+
+        async def _one(item) -> dict:
+            if isinstance(item, SpooledUpload):
+                filename = item.filename
+                run = aextract_skills_from_upload(
+                    item, use_cache=use_cache, llm_slots=slots, mode=mode, parse_slots=parse_slots
+                )
+            else:
+                file_bytes, filename = item
+                run = aextract_skills_from_bytes(
+                    file_bytes,
+                    filename,
+                    use_cache=use_cache,
+                    llm_slots=slots,
+                    mode=mode,
+                    parse_slots=parse_slots,
+                )
+            try:
+                return {"filename": filename, "ok": True, **(await run)}
+            except Exception as exc:
+                return {"filename": filename, "ok": False, "error": str(exc)}
+
+        results = await asyncio.gather(*(_one(item) for item in expanded))
+    finally:
+        close_all(spooled)
+    return errors + list(results)
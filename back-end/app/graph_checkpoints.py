@@ -0,0 +1,247 @@
+"""Checkpoint storage for the CV extraction graph.
+
+Every graph run is a LangGraph thread keyed by the CV's cache key (content
+hash + model + prompt version + mode). If a node fails, the checkpoint of
+the last completed node is kept, and the next request for the same CV
+resumes from there instead of paying for extraction/reflection again.
+Threads are deleted once a run succeeds (the result cache takes over), so
+storage only holds failed runs, pruned by ``CV_CHECKPOINT_TTL`` and
+``CV_CHECKPOINT_MAX_PENDING``.
+
+Backends (``CV_CHECKPOINTER``):
+- ``sqlite``: ``langgraph-checkpoint-sqlite`` at ``CV_CHECKPOINT_PATH``; shared
+  by every process on the host, survives restarts.
+- ``memory``: ``InMemorySaver``; retries must land on the same process.
+- ``auto`` (default): sqlite when the package is installed, else memory.
+- ``none``: checkpointing off.
+
+Only one run per thread may write checkpoints at a time (an in-flight run
+looks exactly like a failed one). ``claim`` enforces that within a process
+and, on sqlite, across processes with a lease row in the same database
+(``cv_run_lease``), which expires after ``CV_CHECKPOINT_LEASE_SECONDS`` if
+its process died. A run that cannot claim its thread runs without
+checkpoints. Callers must ``release`` a claim in a ``finally``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).resolve().parent.parent / ".cache" / "cv_checkpoints.sqlite"
+
+CV_CHECKPOINTER = os.getenv("CV_CHECKPOINTER", "auto").lower()
+CV_CHECKPOINT_PATH = os.getenv("CV_CHECKPOINT_PATH", str(DEFAULT_CHECKPOINT_PATH))
+# Failed runs older than this (seconds) are dropped instead of resumed.
+CV_CHECKPOINT_TTL = float(os.getenv("CV_CHECKPOINT_TTL", 6 * 3600))
+CV_CHECKPOINT_MAX_PENDING = int(os.getenv("CV_CHECKPOINT_MAX_PENDING", 1000))
+# A claim held by a process that died stops blocking other processes after this.
+CV_CHECKPOINT_LEASE_SECONDS = float(os.getenv("CV_CHECKPOINT_LEASE_SECONDS", 900))
+
+LEASE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS cv_run_lease (
+    thread_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+# Inserts the lease, or takes over an expired one or one this process left
+# behind; changes nothing while another process holds it.
+TAKE_LEASE_SQL = """
+INSERT INTO cv_run_lease (thread_id, owner, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (thread_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+WHERE cv_run_lease.expires_at < ? OR cv_run_lease.owner = excluded.owner
+"""
+
+DROP_LEASE_SQL = "DELETE FROM cv_run_lease WHERE thread_id = ? AND owner = ?"
+
+_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_backend: Optional[str] = None
+_memory_saver = None
+# The sqlite saver is bound to the event loop that created it.
+_loop_savers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+# thread_id -> time the run failed (this process only)
+_pending: "OrderedDict[str, float]" = OrderedDict()
+# threads with a run in flight in this process
+_active: set = set()
+# sqlite savers whose lease table exists
+_lease_ready: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def backend() -> str:
+    """Resolve ``CV_CHECKPOINTER`` to ``"sqlite"``, ``"memory"`` or ``"none"``."""
+    global _backend
+    if _backend is None:
+        choice = CV_CHECKPOINTER
+        if choice in ("auto", "sqlite"):
+            if _installed("aiosqlite") and _installed("langgraph.checkpoint.sqlite"):
+                choice = "sqlite"
+            else:
+                if choice == "sqlite":
+                    print("⚠️ langgraph-checkpoint-sqlite not installed, using in-memory checkpoints")
+                choice = "memory"
+        elif choice not in ("memory", "none"):
+            print(f"⚠️ Unknown CV_CHECKPOINTER={CV_CHECKPOINTER!r}, checkpointing disabled")
+            choice = "none"
+        _backend = choice
+    return _backend
+
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:  # parent package missing
+        return False
+
+
+def get_saver():
+    """Checkpointer for the running event loop, or None when disabled."""
+    kind = backend()
+    if kind == "none":
+        return None
+    if kind == "memory":
+        global _memory_saver
+        with _lock:
+            if _memory_saver is None:
+                from langgraph.checkpoint.memory import InMemorySaver
+
+                _memory_saver = InMemorySaver()
+            return _memory_saver
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        saver = _loop_savers.get(loop)
+        if saver is None:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            Path(CV_CHECKPOINT_PATH).parent.mkdir(parents=True, exist_ok=True)
+            conn = aiosqlite.connect(CV_CHECKPOINT_PATH, timeout=30)
+            if hasattr(conn, "_thread"):
+                # Scripts that never call aclose() should still be able to exit.
+                conn._thread.daemon = True
+            saver = AsyncSqliteSaver(conn)
+            _loop_savers[loop] = saver
+        return saver
+
+
+async def aclose() -> None:
+    """Close the running loop's sqlite connection (call before the loop ends)."""
+    with _lock:
+        saver = _loop_savers.pop(asyncio.get_running_loop(), None)
+    if saver is not None:
+        try:
+            await saver.conn.close()
+        except Exception:
+            pass
+
+
+def config_for(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def claim(saver, thread_id: str) -> bool:
+    """Mark a run as in flight; False if this or (on sqlite) another process runs it."""
+    with _lock:
+        if thread_id in _active:
+            return False
+        _active.add(thread_id)
+    if backend() != "sqlite":
+        return True
+    taken = False
+    try:
+        taken = await _take_lease(saver, thread_id)
+    except Exception as e:
+        print("⚠️ Could not take the checkpoint lease:", e)
+    finally:
+        # Also on cancellation; a lease committed just before it is ours to retake.
+        if not taken:
+            with _lock:
+                _active.discard(thread_id)
+    return taken
+
+
+async def release(saver, thread_id: str) -> None:
+    with _lock:
+        _active.discard(thread_id)
+    if backend() != "sqlite":
+        return
+    try:
+        async with saver.lock:
+            await saver.conn.execute(DROP_LEASE_SQL, (thread_id, _OWNER))
+            await saver.conn.commit()
+    except Exception as e:
+        print("⚠️ Could not drop the checkpoint lease (it will expire):", e)
+
+
+async def _take_lease(saver, thread_id: str) -> bool:
+    await saver.setup()  # opens the connection
+    async with saver.lock:
+        if saver not in _lease_ready:
+            await saver.conn.execute(LEASE_SCHEMA_SQL)
+            _lease_ready.add(saver)
+        now = time.time()
+        cursor = await saver.conn.execute(
+            TAKE_LEASE_SQL, (thread_id, _OWNER, now + CV_CHECKPOINT_LEASE_SECONDS, now)
+        )
+        taken = cursor.rowcount > 0
+        await saver.conn.commit()
+    return taken
+
+
+async def _delete(saver, thread_id: str) -> None:
+    try:
+        await saver.adelete_thread(thread_id)
+    except Exception as e:
+        print("⚠️ Could not delete graph checkpoint:", e)
+
+
+async def finished(saver, thread_id: str) -> None:
+    """The run succeeded: its checkpoints are no longer needed."""
+    with _lock:
+        _pending.pop(thread_id, None)
+    await _delete(saver, thread_id)
+
+
+async def failed(saver, thread_id: str) -> None:
+    """Keep the run's checkpoints for a retry, and prune expired ones."""
+    now = time.time()
+    expired = []
+    with _lock:
+        _pending[thread_id] = now
+        _pending.move_to_end(thread_id)
+        while _pending:
+            oldest, failed_at = next(iter(_pending.items()))
+            if len(_pending) <= CV_CHECKPOINT_MAX_PENDING and now - failed_at <= CV_CHECKPOINT_TTL:
+                break
+            _pending.popitem(last=False)
+            expired.append(oldest)
+    for thread_id in expired:
+        await _delete(saver, thread_id)
+
+
+def is_expired(thread_id: str, created_at: Optional[str]) -> bool:
+    """True when a leftover run is too old to resume."""
+    with _lock:
+        failed_at = _pending.get(thread_id)
+    if failed_at is None and created_at:
+        # Run from another process or before a restart: use the checkpoint's own time.
+        from datetime import datetime
+
+        try:
+            failed_at = datetime.fromisoformat(created_at).timestamp()
+        except ValueError:
+            return False
+    return failed_at is not None and time.time() - failed_at > CV_CHECKPOINT_TTL
@@ -0,0 +1,412 @@
+"""Postgres-backed job queue for background CV extraction.
+
+The API only inserts rows; worker processes (see ``app.worker``) claim them
+with ``FOR UPDATE SKIP LOCKED`` so any number of workers can poll the same
+table without handing out a job twice.
+
+The uploaded document is kept as a Postgres large object (``file_oid``),
+written and read back in chunks, so neither the API nor a worker holds a
+whole file in memory. It is unlinked once the job is done or has failed.
+Rows queued before large objects were used still carry ``file_bytes``.
+"""
+
+import os
+import uuid
+from io import BytesIO
+from typing import Union
+
+from psycopg2.extras import Json
+
+from app.db import get_connection, release_connection
+from app.uploads import UPLOAD_CHUNK_BYTES, SpooledUpload, spool_stream
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", 10))
+# A running job whose worker died is handed out again after this long.
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", 600))
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS extraction_job (
+    job_id VARCHAR(32) PRIMARY KEY,
+    emp_id VARCHAR(20) NOT NULL,
+    filename TEXT NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    file_bytes BYTEA,
+    file_oid OID,
+    use_cache BOOLEAN NOT NULL DEFAULT TRUE,
+    status VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    result JSONB,
+    error TEXT,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS extraction_job_ready_idx
+    ON extraction_job (run_after) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS extraction_job_dedupe_idx
+    ON extraction_job (emp_id, content_hash);
+ALTER TABLE extraction_job ADD COLUMN IF NOT EXISTS file_oid OID;
+"""
+
+# Drops the stored upload of the jobs matched by the WHERE clause that follows.
+UNLINK_FILE_SQL = "SELECT lo_unlink(file_oid) FROM extraction_job WHERE file_oid IS NOT NULL AND "
+
+# At most one live job per employee and file; ``enqueue`` inserts against it
+# with ON CONFLICT so concurrent uploads cannot both queue the same work.
+LIVE_KEY_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS extraction_job_live_key
+    ON extraction_job (emp_id, content_hash) WHERE status IN ('queued', 'running')
+"""
+
+_schema_ready = False
+_has_live_key = False
+
+
+class QueueUnavailable(RuntimeError):
+    """Raised when the queue database cannot be reached."""
+
+
+def _connect():
+    conn = get_connection()
+    if conn is None:
+        raise QueueUnavailable("Database connection not available.")
+    return conn
+
+
+def ensure_schema() -> None:
+    """Create the queue table and indexes once per process."""
+    global _schema_ready, _has_live_key
+    if _schema_ready:
+        return
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+        conn.commit()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(LIVE_KEY_SQL)
+            conn.commit()
+            _has_live_key = True
+        except Exception as e:
+            # Existing duplicate live jobs block the index; dedupe falls back to the SELECT.
+            conn.rollback()
+            print("⚠️ Could not create extraction_job_live_key:", e)
+        _schema_ready = True
+    finally:
+        release_connection(conn)
+
+
+def _write_file(conn, source: Union[bytes, str]) -> int:
+    """Copy ``source`` (bytes or a file path) into a new large object; returns its oid."""
+    lob = conn.lobject(0, "wb")
+    try:
+        with BytesIO(source) if isinstance(source, (bytes, bytearray)) else open(source, "rb") as fh:
+            while True:
+                chunk = fh.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                lob.write(chunk)
+        return lob.oid
+    finally:
+        lob.close()
+
+
+def enqueue(
+    emp_id: str, filename: str, source: Union[bytes, str], content_hash: str, use_cache: bool = True
+) -> dict:
+    """Insert a job, or return the existing job for the same employee and file.
+
+    Client retries of the same upload therefore attach to the existing job
+    instead of queueing duplicate work. With ``use_cache`` a finished job is
+    reused too; without it only a queued or running one is (two live jobs
+    for one file would do the same work twice). Failed jobs are not reused.
+    ``source`` is the document's bytes or the path of its spooled copy.
+    """
+    ensure_schema()
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            if use_cache:
+                cur.execute(
+                    """
+                    SELECT job_id, status FROM extraction_job
+                    WHERE emp_id = %s AND content_hash = %s AND status <> 'failed'
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                    """,
+                    (emp_id, content_hash),
+                )
+                row = cur.fetchone()
+                if row:
+                    conn.commit()
+                    return {"job_id": row[0], "status": row[1], "deduplicated": True}
+
+            job_id = uuid.uuid4().hex
+            file_oid = _write_file(conn, source)
+            conflict = (
+                "ON CONFLICT (emp_id, content_hash) WHERE status IN ('queued', 'running') DO NOTHING"
+                if _has_live_key
+                else ""
+            )
+            while True:
+                cur.execute(
+                    f"""
+                    INSERT INTO extraction_job
+                        (job_id, emp_id, filename, content_hash, file_oid, use_cache, max_attempts)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    {conflict}
+                    RETURNING job_id
+                    """,
+                    (job_id, emp_id, filename, content_hash, file_oid, use_cache, JOB_MAX_ATTEMPTS),
+                )
+                if cur.fetchone() is not None:
+                    break
+                # A concurrent upload of the same file won the race: attach to its job.
+                cur.execute(
+                    """
+                    SELECT job_id, status FROM extraction_job
+                    WHERE emp_id = %s AND content_hash = %s AND status IN ('queued', 'running')
+                    """,
+                    (emp_id, content_hash),
+                )
+                row = cur.fetchone()
+                if row:
+                    conn.rollback()  # also drops the large object written above
+                    return {"job_id": row[0], "status": row[1], "deduplicated": True}
+                # That job finished in between; the next INSERT will not conflict.
+        conn.commit()
+        return {"job_id": job_id, "status": "queued", "deduplicated": False}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def get_job(job_id: str, emp_id: str):
+    """Return the public view of a job owned by ``emp_id`` (or None)."""
+    ensure_schema()
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT job_id, filename, status, attempts, max_attempts, result, error,
+                       created_at, updated_at
+                FROM extraction_job
+                WHERE job_id = %s AND emp_id = %s
+                """,
+                (job_id, emp_id),
+            )
+            row = cur.fetchone()
+        conn.commit()
+    finally:
+        release_connection(conn)
+
+    if not row:
+        return None
+    return {
+        "job_id": row[0],
+        "filename": row[1],
+        "status": row[2],
+        "attempts": row[3],
+        "max_attempts": row[4],
+        "result": row[5],
+        "error": row[6],
+        "created_at": row[7].isoformat() if row[7] else None,
+        "updated_at": row[8].isoformat() if row[8] else None,
+    }
+
+
+# ----------------------
+# Worker side
+# ----------------------
+def requeue_stale() -> int:
+    """Put jobs whose worker disappeared mid-run back in the queue.
+
+    A job whose last attempt was the one running is failed instead: a file
+    that crashes the worker process would otherwise be reclaimed forever.
+    """
+    exhausted = """
+        status = 'running'
+        AND locked_at < NOW() - make_interval(secs => %s)
+        AND attempts >= max_attempts
+    """
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(UNLINK_FILE_SQL + exhausted, (JOB_VISIBILITY_TIMEOUT_SECONDS,))
+            cur.execute(
+                f"""
+                UPDATE extraction_job
+                SET status = 'failed', error = 'Worker stopped during the last attempt',
+                    file_bytes = NULL, file_oid = NULL, locked_at = NULL, updated_at = NOW()
+                WHERE {exhausted}
+                """,
+                (JOB_VISIBILITY_TIMEOUT_SECONDS,),
+            )
+            cur.execute(
+                """
+                UPDATE extraction_job
+                SET status = 'queued', locked_at = NULL, updated_at = NOW()
+                WHERE status = 'running'
+                  AND locked_at < NOW() - make_interval(secs => %s)
+                """,
+                (JOB_VISIBILITY_TIMEOUT_SECONDS,),
+            )
+            count = cur.rowcount
+        conn.commit()
+        return count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def claim_next():
+    """Atomically claim the oldest ready job, skipping rows other workers hold."""
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE extraction_job
+                SET status = 'running', attempts = attempts + 1,
+                    locked_at = NOW(), updated_at = NOW()
+                WHERE job_id = (
+                    SELECT job_id FROM extraction_job
+                    WHERE status = 'queued' AND run_after <= NOW()
+                    ORDER BY run_after
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING job_id, filename, file_oid, file_bytes, use_cache, attempts, max_attempts
+                """
+            )
+            row = cur.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+    if not row:
+        return None
+    return {
+        "job_id": row[0],
+        "filename": row[1],
+        "file_oid": row[2],
+        "file_bytes": bytes(row[3]) if row[3] is not None else b"",
+        "use_cache": row[4],
+        "attempts": row[5],
+        "max_attempts": row[6],
+    }
+
+
+def open_upload(job: dict) -> SpooledUpload:
+    """Stream a claimed job's stored document into a temp file (close it when done)."""
+    conn = _connect()
+    try:
+        lob = conn.lobject(job["file_oid"], "rb")
+        try:
+            upload = spool_stream(lob, job["filename"])
+        finally:
+            lob.close()
+        conn.commit()
+        return upload
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def complete(job_id: str, result: dict) -> None:
+    """Store the result and drop the upload we no longer need."""
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(UNLINK_FILE_SQL + "job_id = %s", (job_id,))
+            cur.execute(
+                """
+                UPDATE extraction_job
+                SET status = 'done', result = %s, error = NULL, file_bytes = NULL, file_oid = NULL,
+                    locked_at = NULL, updated_at = NOW()
+                WHERE job_id = %s
+                """,
+                (Json(result), job_id),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def defer(job_id: str, error: str, delay: float) -> None:
+    """Put a job back after ``delay`` seconds without counting the attempt.
+
+    For rate limiting: the file is fine, the LLM just cannot take it yet.
+    """
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE extraction_job
+                SET status = 'queued', error = %s, attempts = GREATEST(attempts - 1, 0),
+                    locked_at = NULL, run_after = NOW() + make_interval(secs => %s), updated_at = NOW()
+                WHERE job_id = %s
+                """,
+                (error, delay, job_id),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def fail(job_id: str, error: str, attempts: int, max_attempts: int) -> str:
+    """Schedule a retry with exponential backoff, or mark the job failed."""
+    retry = attempts < max_attempts
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            if retry:
+                delay = JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+                cur.execute(
+                    """
+                    UPDATE extraction_job
+                    SET status = 'queued', error = %s, locked_at = NULL,
+                        run_after = NOW() + make_interval(secs => %s), updated_at = NOW()
+                    WHERE job_id = %s
+                    """,
+                    (error, delay, job_id),
+                )
+            else:
+                cur.execute(UNLINK_FILE_SQL + "job_id = %s", (job_id,))
+                cur.execute(
+                    """
+                    UPDATE extraction_job
+                    SET status = 'failed', error = %s, file_bytes = NULL, file_oid = NULL,
+                        locked_at = NULL, updated_at = NOW()
+                    WHERE job_id = %s
+                    """,
+                    (error, job_id),
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+    return "queued" if retry else "failed"
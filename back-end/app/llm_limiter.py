@@ -0,0 +1,251 @@
+"""Client-side admission control for Groq calls.
+
+Every LLM call first takes one request and its estimated tokens from two
+token buckets sized to the account's limits (``GROQ_RPM`` / ``GROQ_TPM``),
+so we pace ourselves at the provider ceiling instead of bursting past it
+and getting 429s. When Groq does answer 429/503, its ``retry-after`` (or
+``x-ratelimit-reset-*``) sets a shared cooldown that every caller waits
+out, instead of each one retrying on its own schedule.
+
+Callers wait in a bounded queue: beyond ``GROQ_MAX_QUEUE`` waiters, or
+when the wait would exceed ``GROQ_MAX_WAIT`` seconds, ``LLMOverloaded`` is
+raised straight away so the API can answer 503 with ``Retry-After``.
+Limits are per process; divide the account limits across workers.
+
+Groq meters each model separately, so every model gets its own
+controller (``limiter_for``). ``GROQ_RPM`` / ``GROQ_TPM`` apply to all of
+them unless overridden per model, e.g. ``GROQ_RPM_LLAMA_3_1_8B_INSTANT``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from app import metrics
+
+# 0 disables a bucket. Defaults match Groq's free tier for llama-3.3-70b.
+GROQ_RPM = float(os.getenv("GROQ_RPM", 30))
+GROQ_TPM = float(os.getenv("GROQ_TPM", 12000))
+# Burst allowance, in seconds' worth of each rate.
+GROQ_BURST_SECONDS = float(os.getenv("GROQ_BURST_SECONDS", 10))
+GROQ_MAX_QUEUE = int(os.getenv("GROQ_MAX_QUEUE", 100))
+GROQ_MAX_WAIT = float(os.getenv("GROQ_MAX_WAIT", 60))
+# Cooldown used for a 429 that carries no retry-after hint.
+GROQ_DEFAULT_RETRY_AFTER = float(os.getenv("GROQ_DEFAULT_RETRY_AFTER", 2))
+
+ADMISSION_WAIT = metrics.histogram(
+    "llm_admission_wait_seconds",
+    "Time LLM calls waited for rate-limit admission.",
+    buckets=(0.01, 0.1, 0.5, 1, 2, 5, 10, 30, 60),
+)
+ADMISSION_REJECTED = metrics.counter(
+    "llm_admission_rejected_total", "LLM calls rejected by admission control.", ("reason",)
+)
+PROVIDER_THROTTLED = metrics.counter(
+    "llm_provider_throttled_total", "429/503 responses received from the LLM provider."
+)
+
+
+class LLMOverloaded(RuntimeError):
+    """Raised when an LLM call cannot be admitted in time."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket; ``rate`` per second, ``capacity`` burst."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` is available (0 when it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)  # a huge request still gets through eventually
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Correct an estimate once the real cost is known (may go negative)."""
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        rpm: float = GROQ_RPM,
+        tpm: float = GROQ_TPM,
+        burst_seconds: float = GROQ_BURST_SECONDS,
+        max_queue: int = GROQ_MAX_QUEUE,
+        max_wait: float = GROQ_MAX_WAIT,
+    ):
+        self.requests = TokenBucket(rpm / 60, rpm / 60 * burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm / 60, tpm / 60 * burst_seconds) if tpm > 0 else None
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._cooldown_until = 0.0
+
+    def _wait_time(self, est_tokens: float, now: float) -> float:
+        wait = max(0.0, self._cooldown_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(est_tokens, now))
+        return wait
+
+    async def acquire(self, est_tokens: float, max_wait: Optional[float] = None) -> None:
+        """Wait until one request of ``est_tokens`` may be sent.
+
+        ``max_wait`` tightens the configured limit for this call (fallback
+        routing passes a short one so a busy model is skipped quickly).
+        """
+        max_wait = self.max_wait if max_wait is None else min(max_wait, self.max_wait)
+        started = time.monotonic()
+        queued = False
+        try:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = self._wait_time(est_tokens, now)
+                    if wait <= 0:
+                        if self.requests is not None:
+                            self.requests.take(1)
+                        if self.tokens is not None:
+                            self.tokens.take(est_tokens)
+                        break
+                    if now - started + wait > max_wait:
+                        ADMISSION_REJECTED.inc(reason="wait")
+                        raise LLMOverloaded("LLM rate limit: try again shortly", retry_after=wait)
+                    if not queued:
+                        if self._waiting >= self.max_queue:
+                            ADMISSION_REJECTED.inc(reason="queue")
+                            raise LLMOverloaded("Too many requests waiting for the LLM", retry_after=wait)
+                        self._waiting += 1
+                        queued = True
+                await asyncio.sleep(wait)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting -= 1
+        ADMISSION_WAIT.observe(time.monotonic() - started)
+
+    def record_usage(self, est_tokens: float, actual_tokens: Optional[float]) -> None:
+        if self.tokens is None or actual_tokens is None:
+            return
+        with self._lock:
+            self.tokens.adjust(actual_tokens - est_tokens)
+
+    def throttled(self, retry_after: Optional[float]) -> None:
+        """The provider said 429/503: hold every caller back for ``retry_after``."""
+        PROVIDER_THROTTLED.inc()
+        delay = GROQ_DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+        with self._lock:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "waiting": self._waiting,
+                "cooldown_s": round(max(0.0, self._cooldown_until - time.monotonic()), 3),
+            }
+
+
+# ----------------------
+# Provider error helpers
+# ----------------------
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse ``"12"``, ``"7.66s"``, ``"2m59.56s"`` or ``"250ms"`` into seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, if it said."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    waits = []
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value:
+            seconds = _parse_duration(str(value))
+            if seconds is not None:
+                waits.append(seconds)
+                if name == "retry-after":
+                    break
+    return max(waits) if waits else None
+
+
+def is_throttle(exc: BaseException) -> bool:
+    return status_of(exc) in (429, 503)
+
+
+def _model_env(prefix: str, model: str, default: float) -> float:
+    suffix = re.sub(r"[^A-Z0-9]+", "_", model.upper()).strip("_")
+    return float(os.getenv(f"{prefix}_{suffix}", default))
+
+
+_limiters: Dict[str, AdmissionController] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(model: str) -> AdmissionController:
+    """The admission controller for ``model`` (created on first use)."""
+    controller = _limiters.get(model)
+    if controller is None:
+        with _limiters_lock:
+            controller = _limiters.get(model)
+            if controller is None:
+                controller = AdmissionController(
+                    rpm=_model_env("GROQ_RPM", model, GROQ_RPM),
+                    tpm=_model_env("GROQ_TPM", model, GROQ_TPM),
+                )
+                _limiters[model] = controller
+    return controller
+
+
+# Controller of the default model.
+limiter = limiter_for(os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile"))
+
+metrics.callback_gauge(
+    "llm_admission_waiting",
+    "LLM calls waiting for rate-limit admission, per model.",
+    lambda: [({"model": model}, c.stats()["waiting"]) for model, c in list(_limiters.items())],
+    ("model",),
+)
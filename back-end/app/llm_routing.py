@@ -0,0 +1,77 @@
+"""Which Groq model(s) each graph node calls.
+
+Every LLM node has a model chain, read from ``GROQ_MODEL_<NODE>`` as a
+comma-separated list (``GROQ_MODEL_SUMMARIZE="llama-3.1-8b-instant,llama-3.3-70b-versatile"``).
+The first model is used normally; the next one takes over when it is
+rate-limited (our limiter cannot admit the call within
+``GROQ_FALLBACK_MAX_WAIT`` or the provider answers 429/5xx) or slower than
+``GROQ_FALLBACK_TIMEOUT`` seconds. The last model in a chain gets no
+timeout and the limiter's full wait, exactly like a single-model setup.
+
+``summarize`` only reorders and trims already-clean JSON, so by default it
+runs on the small model and falls back to ``GROQ_MODEL``.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List
+
+from .common_imports import load_env
+
+load_env()
+
+MODEL_NAME = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+SMALL_MODEL_NAME = os.getenv("GROQ_SMALL_MODEL", "llama-3.1-8b-instant")
+
+NODE_DEFAULTS = {
+    "extract": MODEL_NAME,
+    "reflect": MODEL_NAME,
+    "summarize": f"{SMALL_MODEL_NAME},{MODEL_NAME}",
+    "single": MODEL_NAME,
+}
+
+# Seconds a non-final model may take before the call moves down the chain (0 = no limit).
+GROQ_FALLBACK_TIMEOUT = float(os.getenv("GROQ_FALLBACK_TIMEOUT", 15))
+# Longest admission wait accepted for a non-final model before falling back.
+GROQ_FALLBACK_MAX_WAIT = float(os.getenv("GROQ_FALLBACK_MAX_WAIT", 1))
+
+
+def _chain(value: str) -> List[str]:
+    models: List[str] = []
+    for name in value.split(","):
+        name = name.strip()
+        if name and name not in models:
+            models.append(name)
+    return models
+
+
+def _load_routes() -> Dict[str, List[str]]:
+    routes = {}
+    for node, default in NODE_DEFAULTS.items():
+        routes[node] = _chain(os.getenv(f"GROQ_MODEL_{node.upper()}", default)) or [MODEL_NAME]
+    return routes
+
+
+ROUTES = _load_routes()
+
+
+def models_for(node: str) -> List[str]:
+    """The model chain for ``node``, primary first."""
+    return ROUTES.get(node) or [MODEL_NAME]
+
+
+def fallback_timeout(node: str) -> float:
+    return float(os.getenv(f"GROQ_FALLBACK_TIMEOUT_{node.upper()}", GROQ_FALLBACK_TIMEOUT))
+
+
+def all_models() -> List[str]:
+    models: List[str] = []
+    for chain in ROUTES.values():
+        models.extend(m for m in chain if m not in models)
+    return models
+
+
+def signature() -> str:
+    """Stable description of the routing, used in result cache keys."""
+    return ";".join(f"{node}={','.join(chain)}" for node, chain in sorted(ROUTES.items()))
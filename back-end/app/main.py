@@ -1,26 +1,111 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, cv
+from fastapi.responses import Response
+from app import (
+    db,
+    graph_checkpoints,
+    metrics,
+    password_hashing,
+    skill_store,
+    text_extraction,
+    tracing,
+)
+from app.uploads import RequestSizeLimitMiddleware
+from app.auth_guard import token_cache
+from app.routes import admin, auth, cv, skills
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="Constella API")
+# Build the LLM client and graph at startup instead of on the first CV.
+PREWARM_EXTRACTOR = os.getenv("PREWARM_EXTRACTOR", "0") == "1"
+
+
+def _prewarm_extractor():
+    from app import extractor_with_langgraph
+
+    try:
+        extractor_with_langgraph.prewarm()
+        print("✅ Extractor pre-warmed")
+    except Exception as e:
+        print("❌ Extractor pre-warm failed (will retry on first use)")
+        print(e)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Open the minimum DB connections before taking traffic.
+    await asyncio.to_thread(db.init_pool)
+    # Schema changes take table locks: do them here, never inside a request.
+    await asyncio.to_thread(skill_store.init_schema)
+    if PREWARM_EXTRACTOR:
+        await asyncio.to_thread(_prewarm_extractor)
+    yield
+    await graph_checkpoints.aclose()
+    password_hashing.shutdown_executor()
+    text_extraction.shutdown_pool()
+    auth.shutdown_executor()
+    db.close_pool()
+
+
+app = FastAPI(title="Constella API", lifespan=lifespan)
 
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
+# Refuse oversized request bodies (413) before they are buffered. Added
+# first so CORS and metrics wrap it and still see the 413.
+app.add_middleware(RequestSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[FRONTEND_URL],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Per-route latency histograms, exposed on /metrics.
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Outermost: request ids on every response, and the root span of each trace.
+app.add_middleware(tracing.TracingMiddleware)
+
 app.include_router(auth.router)
 app.include_router(cv.router)
+app.include_router(skills.router)
+app.include_router(admin.router)
 
 @app.get("/")
 def root():
     return {"message": "Backend running 🚀"}
+
+
+@app.get("/health")
+def health():
+    """Liveness plus DB pool stats (in-use, waiting, wait times) and bcrypt backlog for sizing."""
+    return {
+        "status": "ok",
+        "db_pool": db.pool_stats(),
+        "token_cache": token_cache.stats(),
+        "bcrypt_queue": password_hashing.queue_depth(),
+    }
+
+
+metrics.callback_gauge(
+    "token_cache_lookups_total",
+    "JWT verification cache lookups by result.",
+    lambda: [({"result": k}, token_cache.stats()[k]) for k in ("hits", "misses")],
+    ("result",),
+    kind="counter",
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text exposition of this process's metrics."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,120 @@
+"""Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt is deliberately slow, so running it in FastAPI's shared threadpool
+lets a login burst starve every other sync endpoint. Hashing gets its own
+pool (threads or processes), and requests beyond ``BCRYPT_MAX_QUEUE`` are
+rejected straight away so the API can answer 503 instead of queueing
+forever.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from app import metrics, tracing
+
+# Cost factor for new hashes; existing hashes are upgraded on login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 10))
+BCRYPT_EXECUTOR = os.getenv("BCRYPT_EXECUTOR", "thread")  # "thread" or "process"
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", min(4, os.cpu_count() or 1)))
+# Hash jobs running or waiting at once; anything above is rejected.
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", 64))
+
+
+class HashingOverloaded(RuntimeError):
+    """Raised when the hashing queue is full."""
+
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _get_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if BCRYPT_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(
+                    max_workers=BCRYPT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+                )
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the hashing pool (app shutdown); the next hash starts a new one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def queue_depth() -> int:
+    """Hash/verify jobs running or waiting right now."""
+    return _pending
+
+
+# ----------------------
+# Worker functions (top level so process pools can pickle them)
+# ----------------------
+def hash_password_sync(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def verify_password_sync(password: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:
+        return False  # malformed stored hash
+
+
+async def _submit(op, fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= BCRYPT_MAX_QUEUE:
+            raise HashingOverloaded("Password hashing queue is full")
+        _pending += 1
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"bcrypt.{op}"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        metrics.BCRYPT_DURATION.observe(time.perf_counter() - started, op=op)
+        with _pending_lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _submit("hash", hash_password_sync, password, BCRYPT_ROUNDS)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _submit("verify", verify_password_sync, password, hashed)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True when ``hashed`` was made with a cost other than ``BCRYPT_ROUNDS``."""
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+metrics.callback_gauge(
+    "bcrypt_queue_depth",
+    "Hash/verify jobs running or waiting on the hashing pool.",
+    lambda: [({}, queue_depth())],
+)
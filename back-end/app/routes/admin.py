@@ -0,0 +1,60 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import PlainTextResponse
+
+from app import bulk_import, profiler
+from app.auth_guard import require_admin
+from app.uploads import UploadRejected, spool_upload
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=profiler.PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    include_idle: bool = Query(False, description="Also count threads parked in waits."),
+    user=Depends(require_admin),
+):
+    """Sample this worker's stacks; the body is collapsed stacks for flamegraph.pl / speedscope."""
+    try:
+        result = await asyncio.to_thread(profiler.sample, seconds, interval_ms / 1000, include_idle)
+    except profiler.ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return PlainTextResponse(
+        profiler.collapsed(result["stacks"]),
+        headers={
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Seconds": str(result["seconds"]),
+        },
+    )
+
+
+@router.post("/employees/import")
+async def import_employees(
+    file: UploadFile = File(..., description="CSV with name, email and password (or password_hash) columns."),
+    rounds: Optional[int] = Query(None, ge=4, le=31, description="bcrypt cost for imported passwords."),
+    dry_run: bool = Query(False, description="Validate and report conflicts without creating accounts."),
+    user=Depends(require_admin),
+):
+    """Create employees in bulk; returns per-row conflicts and validation errors."""
+    try:
+        upload = await spool_upload(file, max_bytes=bulk_import.BULK_IMPORT_MAX_BYTES)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    with upload:
+        if upload.extension != ".txt":
+            raise HTTPException(status_code=400, detail="Upload a CSV file.")
+        try:
+            return await asyncio.to_thread(
+                bulk_import.import_file,
+                upload.path,
+                rounds=rounds or bulk_import.BULK_IMPORT_BCRYPT_ROUNDS,
+                dry_run=dry_run,
+            )
+        except bulk_import.ImportBusy as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+        except (bulk_import.CSVImportError, UnicodeDecodeError, bulk_import.csv.Error) as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -1,18 +1,27 @@
+import asyncio
+import contextvars
+import functools
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 import uuid
 
-import bcrypt
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from jose import jwt
 
-from app.db import get_connection, release_connection
+from app.db import DB_POOL_MAX, get_connection, release_connection
+from app.password_hashing import HashingOverloaded, hash_password, needs_rehash, verify_password
 from app.schemas.auth import LoginRequest, SignupRequest, UserResponse
 from app.auth_guard import get_current_user
 
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRES_MIN = int(os.getenv("JWT_EXPIRES_MIN", 60))
+# Threads for login/signup queries. They get their own pool so CV parsing
+# and cache I/O on the default executor cannot delay a login.
+AUTH_DB_WORKERS = int(os.getenv("AUTH_DB_WORKERS", DB_POOL_MAX))
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -29,21 +38,45 @@ def create_token(user_id: str, email: str):
         raise HTTPException(status_code=500, detail="JWT secret not configured")
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def _overloaded(exc: Exception) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
+
 # ----------------------
-# SIGNUP
+# DB executor
 # ----------------------
-@router.post("/signup", response_model=UserResponse)
-def signup(data: SignupRequest):
-    name = data.name
-    email = data.email
-    password = data.password
-    # DB id column is VARCHAR(20); use shortened uuid hex (no dashes)
-    user_id = uuid.uuid4().hex[:20]
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=AUTH_DB_WORKERS, thread_name_prefix="auth-db")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the auth DB threads (app shutdown); the next query starts new ones."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def _run_db(fn, *args):
+    """Run a blocking DB helper on the auth pool, keeping the request's trace context."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, fn, *args)
+    return await loop.run_in_executor(_get_executor(), call)
 
-    # 🔐 Use fewer rounds for faster hashing (10 rounds is still secure)
-    hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=10)).decode()
 
+def _insert_employee(user_id: str, name: str, email: str, hashed_pw: str):
     conn = get_connection()
+    if conn is None:
+        raise HTTPException(status_code=503, detail="Database connection not available.")
     cur = conn.cursor()
 
     try:
@@ -53,6 +86,7 @@ def signup(data: SignupRequest):
         )
         new_id = cur.fetchone()[0]
         conn.commit()
+        return new_id
     except Exception as e:
         if "unique constraint" in str(e).lower():
             raise HTTPException(status_code=400, detail="Email already exists")
@@ -61,6 +95,65 @@ def signup(data: SignupRequest):
         cur.close()
         release_connection(conn)
 
+
+def _fetch_login_row(email: str):
+    conn = get_connection()
+    if conn is None:
+        raise HTTPException(status_code=503, detail="Database connection not available.")
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id, password, name FROM employee WHERE email = %s", (email,))
+        return cur.fetchone()
+    finally:
+        cur.close()
+        release_connection(conn)
+
+
+def _update_password_hash(user_id: str, old_hash: str, new_hash: str):
+    conn = get_connection()
+    if conn is None:
+        return
+    cur = conn.cursor()
+    try:
+        # Only replace the hash we verified, in case the password changed meanwhile.
+        cur.execute(
+            "UPDATE employee SET password = %s WHERE id = %s AND password = %s",
+            (new_hash, user_id, old_hash),
+        )
+        conn.commit()
+    finally:
+        cur.close()
+        release_connection(conn)
+
+
+async def _rehash_password(user_id: str, password: str, old_hash: str):
+    """Upgrade a hash made with an old cost factor (runs after the response)."""
+    try:
+        new_hash = await hash_password(password)
+    except HashingOverloaded:
+        return  # try again on a later login
+    await _run_db(_update_password_hash, user_id, old_hash, new_hash)
+
+
+# ----------------------
+# SIGNUP
+# ----------------------
+@router.post("/signup", response_model=UserResponse)
+async def signup(data: SignupRequest):
+    name = data.name
+    email = data.email
+    password = data.password
+    # DB id column is VARCHAR(20); use shortened uuid hex (no dashes)
+    user_id = uuid.uuid4().hex[:20]
+
+    # 🔐 Hash on the dedicated bcrypt pool (cost from BCRYPT_ROUNDS)
+    try:
+        hashed_pw = await hash_password(password)
+    except HashingOverloaded as exc:
+        raise _overloaded(exc) from exc
+
+    new_id = await _run_db(_insert_employee, user_id, name, email, hashed_pw)
+
     token = create_token(user_id=str(new_id), email=email)
     return {"id": str(new_id), "name": name, "email": email, "token": token}
 
@@ -68,27 +161,27 @@ def signup(data: SignupRequest):
 # LOGIN
 # ----------------------
 @router.post("/login", response_model=UserResponse)
-def login(data: LoginRequest):
+async def login(data: LoginRequest, background_tasks: BackgroundTasks):
     email = data.email
     password = data.password
 
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("SELECT id, password, name FROM employee WHERE email = %s", (email,))
-    row = cur.fetchone()
-
-    cur.close()
-    release_connection(conn)
+    row = await _run_db(_fetch_login_row, email)
 
     if not row:
         raise HTTPException(status_code=401, detail="Wrong email or password")
 
     user_id, stored_pw, name = row
 
-    if not bcrypt.checkpw(password.encode(), stored_pw.encode()):
+    try:
+        valid = await verify_password(password, stored_pw)
+    except HashingOverloaded as exc:
+        raise _overloaded(exc) from exc
+    if not valid:
         raise HTTPException(status_code=401, detail="Wrong email or password")
 
+    if needs_rehash(stored_pw):
+        background_tasks.add_task(_rehash_password, str(user_id), password, stored_pw)
+
     token = create_token(user_id=str(user_id), email=email)
 
     return {"id": str(user_id), "name": name, "email": email, "token": token}
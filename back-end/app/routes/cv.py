@@ -1,10 +1,25 @@
+import asyncio
+import json
 from typing import List
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, constr
 
-from app.extractor_with_langgraph import extract_skills_from_bytes
-from app.db import get_connection, release_connection
+from app import jobs, skill_reads, skill_store
+from app.skill_canonical import canonicalizer as skill_canonicalizer
+from app.skill_index import index as skill_index
+from app.llm_limiter import LLMOverloaded, is_throttle, retry_after_of
+from app.extractor_with_langgraph import (
+    DEFAULT_MODE,
+    GraphMode,
+    aextract_batch,
+    aextract_skills_from_upload,
+    astream_skills_from_upload,
+)
+from app.uploads import UploadRejected, close_all, spool_upload
+from app.skill_matcher import matcher as skill_matcher
 from app.auth_guard import get_current_user
 
 router = APIRouter(prefix="/cv", tags=["CV"])
@@ -13,43 +28,186 @@ class SkillSaveRequest(BaseModel):
     skills: List[constr(min_length=1, max_length=100)]
 
 
+def _flatten_skills(summary: dict) -> List[str]:
+    """Flatten skills from summary into a sorted unique list."""
+    skill_names = set()
+    for key in (
+        "core_hard_skills",
+        "core_soft_skills",
+        "core_tools_and_tech",
+        "core_languages",
+    ):
+        values = summary.get(key, []) or []
+        for value in values:
+            if isinstance(value, str) and value.strip():
+                skill_names.add(value.strip())
+    return sorted(skill_names)
+
+
+def _llm_busy(exc: Exception):
+    """503 + Retry-After when the LLM is rate limited (by us or by Groq), else None."""
+    if isinstance(exc, LLMOverloaded):
+        retry_after = exc.retry_after
+    elif is_throttle(exc):
+        retry_after = retry_after_of(exc) or 1
+    else:
+        return None
+    return HTTPException(
+        status_code=503,
+        detail="The skill extractor is busy, please retry shortly.",
+        headers={"Retry-After": str(max(1, round(retry_after)))},
+    )
+
+
+async def _spool(file: UploadFile):
+    """Copy an upload to a size-capped temp file; 400/413 when it is rejected."""
+    try:
+        return await spool_upload(file)
+    except UploadRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+
+
 @router.post("/extract")
 async def extract_cv(
     file: UploadFile = File(...),
+    no_cache: bool = False,
+    mode: GraphMode = DEFAULT_MODE,
+    user=Depends(get_current_user),
+):
+    with await _spool(file) as upload:
+        try:
+            result = await aextract_skills_from_upload(upload, use_cache=not no_cache, mode=mode)
+            return {
+                "filename": file.filename,
+                "skills": _flatten_skills(result.get("summary", {})),
+                **result,
+            }
+        except Exception as exc:
+            raise _llm_busy(exc) or HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/extract-stream")
+async def extract_cv_stream(
+    file: UploadFile = File(...),
+    no_cache: bool = False,
+    mode: GraphMode = DEFAULT_MODE,
     user=Depends(get_current_user),
 ):
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="Missing filename.")
+    """Server-Sent Events variant of /extract: one event per finished graph node."""
+    upload = await _spool(file)
+    filename = file.filename
+
+    async def events():
+        try:
+            async for event, data in astream_skills_from_upload(
+                upload, use_cache=not no_cache, mode=mode
+            ):
+                if event == "done":
+                    data = {
+                        "filename": filename,
+                        "skills": _flatten_skills(data.get("summary", {})),
+                        **data,
+                    }
+                yield _sse(event, data)
+        except Exception as exc:
+            busy = _llm_busy(exc)
+            if busy is not None:
+                yield _sse("error", {"detail": busy.detail, "retry_after": int(busy.headers["Retry-After"])})
+            else:
+                yield _sse("error", {"detail": str(exc)})
+        finally:
+            upload.close()
 
     try:
-        file_bytes = await file.read()
-        result = extract_skills_from_bytes(file_bytes, file.filename)
-        summary = result.get("summary", {})
-
-        # Flatten skills from summary into a unique set.
-        skill_names = set()
-        for key in (
-            "core_hard_skills",
-            "core_soft_skills",
-            "core_tools_and_tech",
-            "core_languages",
-        ):
-            values = summary.get(key, []) or []
-            for value in values:
-                if isinstance(value, str) and value.strip():
-                    skill_names.add(value.strip())
-
-        return {
-            "filename": file.filename,
-            "skills": sorted(skill_names),
-            **result,
-        }
-    except Exception as exc:
+        # The generator's finally only runs once the body is iterated; the
+        # background task also covers a client that left before that.
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            background=BackgroundTask(upload.close),
+        )
+    except BaseException:
+        upload.close()
+        raise
+
+
+@router.post("/extract-batch")
+async def extract_cv_batch(
+    files: List[UploadFile] = File(...),
+    no_cache: bool = False,
+    mode: GraphMode = DEFAULT_MODE,
+    user=Depends(get_current_user),
+):
+    """Extract many CVs (or zips of CVs) in one request; errors are reported per file."""
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(await _spool(file))
+        results = await aextract_batch(uploads, use_cache=not no_cache, mode=mode)
+    except RuntimeError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    finally:
+        close_all(uploads)
+
+    for item in results:
+        if item.get("ok"):
+            item["skills"] = _flatten_skills(item.get("summary", {}))
+
+    succeeded = sum(1 for item in results if item.get("ok"))
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+@router.post("/jobs", status_code=202)
+async def submit_extract_job(
+    file: UploadFile = File(...),
+    no_cache: bool = False,
+    user=Depends(get_current_user),
+):
+    """Queue a CV for background extraction and return its job id immediately."""
+    with await _spool(file) as upload:
+        try:
+            # The queue streams the checked temp file into the database in chunks.
+            return await asyncio.to_thread(
+                jobs.enqueue,
+                user["id"],
+                upload.parse_name,
+                upload.path,
+                upload.digest,
+                not no_cache,
+            )
+        except jobs.QueueUnavailable as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@router.get("/jobs/{job_id}")
+def get_extract_job(job_id: str, user=Depends(get_current_user)):
+    """Return job status, and the extraction result once it is done."""
+    try:
+        job = jobs.get_job(job_id, user["id"])
+    except jobs.QueueUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    if job["status"] == "done" and job["result"]:
+        job["result"]["skills"] = _flatten_skills(job["result"].get("summary", {}))
+    return job
+
 
 @router.post("/save-skills")
 def save_skills(payload: SkillSaveRequest, user=Depends(get_current_user)):
-    skills = [s.strip() for s in payload.skills if s and s.strip()]
+    # Fold aliases and near-duplicates into existing names before they reach the table.
+    skill_canonicalizer.refresh_from_db()
+    skills = skill_canonicalizer.canonicalize(payload.skills)
     if not skills:
         return {"saved_skills": 0}
 
@@ -57,38 +215,14 @@ def save_skills(payload: SkillSaveRequest, user=Depends(get_current_user)):
     if not emp_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    conn = get_connection()
-    if conn is None:
-        raise HTTPException(status_code=500, detail="Database connection not available.")
-    cur = conn.cursor()
-
     try:
-        saved = 0
-        for name in sorted(set(skills)):
-            cur.execute("SELECT skill_id FROM skill WHERE name = %s", (name,))
-            row = cur.fetchone()
-            if row:
-                skill_id = row[0]
-            else:
-                cur.execute(
-                    "INSERT INTO skill (name) VALUES (%s) RETURNING skill_id",
-                    (name,),
-                )
-                skill_id = cur.fetchone()[0]
-
-            cur.execute(
-                "SELECT 1 FROM employee_skill WHERE emp_id = %s AND skill_id = %s",
-                (emp_id, skill_id),
-            )
-            if not cur.fetchone():
-                cur.execute(
-                    "INSERT INTO employee_skill (emp_id, skill_id) VALUES (%s, %s)",
-                    (emp_id, skill_id),
-                )
-                saved += 1
-
-        conn.commit()
-        return {"saved_skills": saved}
-    finally:
-        cur.close()
-        release_connection(conn)
+        result = skill_store.save_employee_skills(emp_id, skills)
+    except skill_store.StoreUnavailable as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    skill_matcher.add(skills)
+    skill_canonicalizer.add(skills)
+    skill_index.add(emp_id, result["skill_ids"])
+    if result["saved"]:
+        skill_reads.invalidate(emp_id, result["skill_ids"].values())
+    return {"saved_skills": result["saved"]}
@@ -0,0 +1,112 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+
+from app import skill_reads
+from app.auth_guard import get_current_user
+from app.db import get_connection, release_connection
+from app.skill_index import QuerySyntaxError
+from app.skill_index import index as skill_index
+
+router = APIRouter(prefix="/skills", tags=["Skills"])
+
+
+def _employee_names(emp_ids):
+    """``{id: name}`` for one page of results (a single round trip)."""
+    if not emp_ids:
+        return {}
+    conn = get_connection()
+    if conn is None:
+        raise HTTPException(status_code=503, detail="Database connection not available.")
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, name FROM employee WHERE id = ANY(%s)", (list(emp_ids),))
+            rows = cur.fetchall()
+        conn.commit()
+        return dict(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+@router.get("/search")
+def search_employees(
+    q: str = Query(..., min_length=1, max_length=500, description='e.g. "Python AND (Odoo OR Django) AND NOT Arab*"'),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    user=Depends(get_current_user),
+):
+    """Employees whose saved skills match a boolean AND/OR/NOT expression."""
+    skill_index.refresh_from_db()
+    try:
+        result = skill_index.search(q, offset=offset, limit=limit)
+    except QuerySyntaxError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    names = _employee_names(result["employee_ids"])
+    return {
+        "query": q,
+        "total": result["total"],
+        "offset": offset,
+        "limit": limit,
+        "unknown_terms": result["unknown_terms"],
+        "employees": [{"id": emp_id, "name": names.get(emp_id)} for emp_id in result["employee_ids"]],
+    }
+
+
+@router.get("/autocomplete")
+def autocomplete_skills(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    user=Depends(get_current_user),
+):
+    """Skill names starting with ``prefix``, most common first."""
+    skill_index.refresh_from_db()
+    return {"prefix": prefix, "skills": skill_index.autocomplete(prefix, limit=limit)}
+
+
+def _cached_response(etag: str, body):
+    # no-cache: clients may store the page but must revalidate with the ETag.
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
+
+@router.get("/me")
+def my_skills(
+    after: int = Query(0, ge=0, description="Return skills with skill_id greater than this (next_after of the previous page)."),
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_user),
+):
+    """The current user's saved skills, one keyset page at a time."""
+    emp_id = user.get("id")
+    if not emp_id:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    try:
+        etag, body = skill_reads.employee_skills(emp_id, after, limit, if_none_match)
+    except skill_reads.StoreUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return _cached_response(etag, body)
+
+
+@router.get("/{skill_id}/employees")
+def skill_employees(
+    skill_id: int,
+    after: str = Query("", max_length=20, description="Return employees with id greater than this (next_after of the previous page)."),
+    limit: int = Query(100, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_user),
+):
+    """Employees who have ``skill_id``, ordered by employee id."""
+    try:
+        result = skill_reads.skill_employees(skill_id, after, limit, if_none_match)
+    except skill_reads.StoreUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    if result is None:
+        raise HTTPException(status_code=404, detail="Skill not found.")
+    return _cached_response(*result)
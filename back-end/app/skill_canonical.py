@@ -0,0 +1,379 @@
+"""Local skill canonicalization: one name per skill, without an LLM call.
+
+A name is cleaned (whitespace, "(Native)"-style suffixes, stray
+punctuation) and reduced to a key (NFKC, case-folded, punctuation other
+than ``+``/``#`` dropped, ``.js`` folded in). The key is then resolved
+against, in order:
+
+1. the alias table (``ML`` -> ``Machine Learning``, ``MS Excel`` -> ``Excel``),
+2. the canonical names we already know (alias targets plus the ``skill`` table),
+   also with spaces removed (``PowerBI`` -> ``Power BI``),
+3. a precomputed one-deletion index over those names (SymSpell style) for
+   names one typo away (``Kubernets`` -> ``Kubernetes``), ties going to the
+   candidate sharing the most trigrams. Short names, substitutions in
+   short names and names whose digits differ are never fuzzy-matched, so
+   ``Scala``/``Scale``, ``Spring``/``String`` and ``Python 2``/``Python 3``
+   stay apart.
+
+Remaining ties go to the name known longest (alias targets first, then by
+``skill_id``), so the same input always maps to the same name. Resolutions
+are memoized; a warm lookup is one dict hit.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Union
+
+from app import metrics
+from app.db import get_connection, release_connection
+
+# How often to pull skills inserted by other workers.
+CANON_REFRESH_SECONDS = int(os.getenv("SKILL_CANON_REFRESH_SECONDS", 300))
+# Keys shorter than this are only matched exactly or through an alias.
+FUZZY_MIN_LENGTH = int(os.getenv("SKILL_FUZZY_MIN_LENGTH", 6))
+# Below this, only insertions, deletions and transpositions count as typos:
+# one substituted letter too often names a different skill ("Spring"/"String").
+FUZZY_SUBSTITUTION_MIN_LENGTH = int(os.getenv("SKILL_FUZZY_SUBSTITUTION_MIN_LENGTH", 8))
+CANON_MEMO_MAX = int(os.getenv("SKILL_CANON_MEMO_MAX", 50000))
+# Optional JSON object {"alias": "Canonical Name"} merged over the built-ins.
+CANON_ALIASES_FILE = os.getenv("SKILL_ALIASES_FILE")
+
+# alias -> canonical display name
+SKILL_ALIASES = {
+    "ML": "Machine Learning",
+    "AI": "Artificial Intelligence",
+    "DL": "Deep Learning",
+    "NLP": "Natural Language Processing",
+    "CV": "Computer Vision",
+    "JS": "JavaScript",
+    "TS": "TypeScript",
+    "K8s": "Kubernetes",
+    "MS Excel": "Excel",
+    "Microsoft Excel": "Excel",
+    "MS Word": "Word",
+    "Microsoft Word": "Word",
+    "MS PowerPoint": "PowerPoint",
+    "Microsoft PowerPoint": "PowerPoint",
+    "MS Office": "Microsoft Office",
+    "Postgres": "PostgreSQL",
+    "Mongo": "MongoDB",
+    "ReactJS": "React",
+    "React.js": "React",
+    "NodeJS": "Node.js",
+    "Node": "Node.js",
+    "VueJS": "Vue.js",
+    "Vue": "Vue.js",
+    "AngularJS": "Angular",
+    "Golang": "Go",
+    "Amazon Web Services": "AWS",
+    "Google Cloud": "GCP",
+    "Google Cloud Platform": "GCP",
+    "Microsoft Azure": "Azure",
+    "Sklearn": "scikit-learn",
+    "Scikit Learn": "scikit-learn",
+    "Odoo ERP": "Odoo",
+    "SAP ERP": "SAP",
+}
+
+# Obvious tools/languages that belong in tools_and_tech, never in hard_skills.
+KNOWN_TECH_NAMES = (
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust", "PHP",
+    "Ruby", "Kotlin", "Swift", "R", "MATLAB", "SQL", "HTML", "CSS", "React", "Angular",
+    "Vue.js", "Django", "Flask", "FastAPI", "Spring", "Node.js", "Excel", "Word", "PowerPoint",
+    "Odoo", "SAP", "Oracle", "Salesforce", "AWS", "Azure", "GCP", "Docker", "Kubernetes",
+    "Git", "Linux", "Tableau", "Power BI", "TensorFlow", "PyTorch", "pandas", "Figma",
+    "AutoCAD", "Jira", "PostgreSQL", "MySQL", "MongoDB",
+)
+
+GENERIC_SOFT_SKILL_NAMES = (
+    "Hard worker", "Hardworking", "Motivated", "Self motivated", "Fast learner",
+    "Quick learner", "Punctual", "Team player", "Passionate", "Dedicated", "Reliable",
+)
+
+_KEY_STRIP = re.compile(r"[^\w+#]+")
+_TRAILING_NOTE = re.compile(r"\s*[\(\[][^\)\]]*[\)\]]\s*$")  # "English (Native)"
+_EDGE_PUNCT = " \t-–—•·*,;:"
+_DIGITS = re.compile(r"\d+")
+
+CANON_LOOKUPS = metrics.counter(
+    "skill_canonical_lookups_total", "Skill names resolved by the canonicalizer.", ("outcome",)
+)
+
+
+def clean_name(name: str) -> str:
+    """Display form of a raw name: single spaces, no trailing "(...)" note or bullets."""
+    name = " ".join(unicodedata.normalize("NFKC", name or "").split())
+    name = _TRAILING_NOTE.sub("", name) or name
+    return name.strip(_EDGE_PUNCT).rstrip(".")  # keep the dot in ".NET"
+
+
+def normalize(name: str) -> str:
+    """Comparison key: case-folded, punctuation except ``+``/``#`` removed."""
+    key = unicodedata.normalize("NFKC", name or "").casefold().strip()
+    key = re.sub(r"\.js\b", "js", key)
+    key = _KEY_STRIP.sub(" ", key.replace("_", " "))
+    return " ".join(key.split())
+
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def _deletions(key: str) -> set:
+    """``key`` plus every string made by deleting one of its characters."""
+    return {key[:i] + key[i + 1 :] for i in range(len(key))} | {key}
+
+
+def _one_edit_apart(a: str, b: str, substitution: bool = True) -> bool:
+    """True when one insert, delete, transposition (or substitution) turns ``a`` into ``b``."""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    shortest = min(len(a), len(b))
+    while i < shortest and a[i] == b[i]:
+        i += 1
+    if len(a) > len(b):
+        return a[i + 1 :] == b[i:]
+    if len(a) < len(b):
+        return a[i:] == b[i + 1 :]
+    if substitution and a[i + 1 :] == b[i + 1 :]:
+        return True
+    return a[i : i + 2] == b[i : i + 2][::-1] and a[i + 2 :] == b[i + 2 :]
+
+
+class SkillCanonicalizer:
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self._keys: List[str] = []  # known canonical keys, in the order they were added
+        self._display: Dict[str, str] = {}  # key -> canonical display name
+        self._compact: Dict[str, str] = {}  # key without spaces -> key
+        # hash of a key with one character deleted -> position(s) in _keys
+        self._deletes: Dict[int, Union[int, List[int]]] = {}
+        self._aliases: Dict[str, str] = {}  # alias key -> canonical key
+        self._memo: Dict[str, tuple] = {}  # key -> (canonical key or None, outcome)
+        self._lock = threading.RLock()
+        self._loaded_max_id = 0
+        self._loaded_at = 0.0
+        for alias, target in (aliases if aliases is not None else _load_aliases()).items():
+            self.add_alias(alias, target)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ----------------------
+    # Building
+    # ----------------------
+    def _register(self, key: str, display: str) -> None:
+        position = len(self._keys)
+        self._keys.append(key)
+        self._display[key] = display
+        self._compact.setdefault(key.replace(" ", ""), key)
+        if len(key) >= FUZZY_MIN_LENGTH:
+            for variant in _deletions(key):
+                slot = self._deletes.get(hash(variant))
+                if slot is None:
+                    self._deletes[hash(variant)] = position  # most variants are unique
+                elif isinstance(slot, int):
+                    self._deletes[hash(variant)] = [slot, position]
+                else:
+                    slot.append(position)
+
+    def add_alias(self, alias: str, target: str) -> None:
+        target_key = normalize(target)
+        with self._lock:
+            if target_key not in self._display:
+                self._register(target_key, clean_name(target))
+            alias_key = normalize(alias)
+            if alias_key != target_key:
+                self._aliases[alias_key] = target_key
+            self._memo.clear()
+
+    def add(self, names: Iterable[str], fuzzy: bool = True) -> int:
+        """Make names canonical unless they already resolve to a known one.
+
+        ``fuzzy=False`` only folds exact and alias matches (bulk loads of rows
+        that exist anyway).
+        """
+        added = 0
+        with self._lock:
+            for name in names:
+                display = clean_name(name)
+                key = normalize(display)
+                if not key:
+                    continue
+                if self._resolve(key, fuzzy)[0] is not None:
+                    continue
+                self._register(key, display)
+                added += 1
+            if added:
+                self._memo.clear()  # earlier misses may match now
+        return added
+
+    # ----------------------
+    # Resolving
+    # ----------------------
+    def _fuzzy(self, key: str) -> Optional[str]:
+        if len(key) < FUZZY_MIN_LENGTH:
+            return None
+        # Two strings within one edit (insert, delete, substitute, transpose)
+        # always share a one-deletion variant, so these probes find them all.
+        candidates = set()
+        for variant in _deletions(key):
+            slot = self._deletes.get(hash(variant))
+            if isinstance(slot, int):
+                candidates.add(slot)
+            elif slot:
+                candidates.update(slot)
+        substitution = len(key) >= FUZZY_SUBSTITUTION_MIN_LENGTH
+        grams = set(_trigrams(key))
+        digits = _DIGITS.findall(key)
+        best = None
+        for position in candidates:
+            candidate = self._keys[position]
+            if not _one_edit_apart(key, candidate, substitution):
+                continue
+            if _DIGITS.findall(candidate) != digits:
+                continue
+            # Several names one edit away: prefer the most shared trigrams, then the oldest.
+            rank = (-len(grams & set(_trigrams(candidate))), position)
+            if best is None or rank < best[0]:
+                best = (rank, candidate)
+        return best[1] if best else None
+
+    def _resolve(self, key: str, fuzzy: bool = True) -> tuple:
+        """``(canonical key or None, outcome)``; call with the lock held."""
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+        if key in self._aliases:
+            result = (self._aliases[key], "alias")
+        elif key in self._display:
+            result = (key, "exact")
+        else:
+            compact = key.replace(" ", "")
+            if compact in self._aliases:
+                result = (self._aliases[compact], "alias")
+            elif compact in self._compact:
+                result = (self._compact[compact], "exact")
+            elif not fuzzy:
+                return (None, "new")
+            else:
+                match = self._fuzzy(key)
+                result = (match, "fuzzy") if match else (None, "new")
+        if len(self._memo) >= CANON_MEMO_MAX:
+            self._memo.clear()
+        self._memo[key] = result
+        return result
+
+    def canonical(self, name: str) -> Optional[str]:
+        """Canonical display name for ``name`` (its cleaned form if unknown); None if blank."""
+        display = clean_name(name)
+        key = normalize(display)
+        if not key:
+            return None
+        with self._lock:
+            target, outcome = self._resolve(key)
+            CANON_LOOKUPS.inc(outcome=outcome)
+            return self._display[target] if target is not None else display
+
+    def canonicalize(self, names: Iterable[str]) -> List[str]:
+        """Canonical names in input order, duplicates removed."""
+        result, seen = [], set()
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            canonical = self.canonical(name)
+            key = normalize(canonical or "")
+            if key and key not in seen:
+                seen.add(key)
+                result.append(canonical)
+        return result
+
+    def key(self, name: str) -> str:
+        """Key of ``name``'s canonical form; equal keys mean the same skill."""
+        return normalize(self.canonical(name) or "")
+
+    # ----------------------
+    # Loading from Postgres
+    # ----------------------
+    def refresh_from_db(self, force: bool = False) -> int:
+        """Load skills added since the last refresh (all of them the first time)."""
+        if not force and time.time() - self._loaded_at < CANON_REFRESH_SECONDS:
+            return 0
+        conn = get_connection()
+        if conn is None:
+            return 0
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT skill_id, name FROM skill WHERE skill_id > %s ORDER BY skill_id",
+                    (self._loaded_max_id,),
+                )
+                rows = cur.fetchall()
+            conn.commit()
+        except Exception as exc:
+            conn.rollback()
+            print("⚠️ Could not load skills for the canonicalizer:", exc)
+            return 0
+        finally:
+            release_connection(conn)
+
+        self._loaded_at = time.time()
+        if rows:
+            self._loaded_max_id = max(self._loaded_max_id, max(row[0] for row in rows))
+        # Rows exist already; fuzzy folding is only worth it for new names.
+        return self.add((row[1] for row in rows), fuzzy=False)
+
+
+def _load_aliases() -> Dict[str, str]:
+    aliases = dict(SKILL_ALIASES)
+    if CANON_ALIASES_FILE:
+        try:
+            with open(CANON_ALIASES_FILE, encoding="utf-8") as fh:
+                aliases.update(json.load(fh))
+        except (OSError, ValueError) as exc:
+            print("⚠️ Could not read SKILL_ALIASES_FILE:", exc)
+    return aliases
+
+
+canonicalizer = SkillCanonicalizer()
+canonicalizer.add(KNOWN_TECH_NAMES)
+
+KNOWN_TECH = {normalize(name) for name in KNOWN_TECH_NAMES}
+GENERIC_SOFT_SKILLS = {normalize(name) for name in GENERIC_SOFT_SKILL_NAMES}
+
+
+def canonicalize_skills(skills: dict) -> dict:
+    """Canonicalize an extraction or summary dict (``hard_skills`` or ``core_hard_skills`` keys).
+
+    Each skill is kept once across categories, tools filed under hard skills
+    move to tools, and filler soft skills are dropped: the clean-up the
+    reflection prompt used to be needed for.
+    """
+    prefix = "core_" if any(key.startswith("core_") for key in skills) else ""
+    hard, soft, tools = (prefix + c for c in ("hard_skills", "soft_skills", "tools_and_tech"))
+    result: Dict[str, list] = {category: [] for category in skills}
+    seen = set()
+    for category, names in skills.items():
+        if not isinstance(names, list):
+            result[category] = names
+            continue
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            canonical = canonicalizer.canonical(name)
+            key = normalize(canonical or "")
+            if not key or key in seen:
+                continue
+            if category == soft and key in GENERIC_SOFT_SKILLS:
+                continue
+            seen.add(key)
+            target = tools if category == hard and key in KNOWN_TECH and tools in result else category
+            result[target].append(canonical)
+    return result
@@ -0,0 +1,374 @@
+"""In-memory inverted index: skill -> employees who have it.
+
+Employees get dense ordinals, and each skill keeps the set of ordinals that
+hold it. Rare skills store a sorted ``array`` of ordinals; once a skill is
+common enough that a bitmap is smaller (more than one holder per 32
+employees), it switches to a Python ``int`` used as a bitset. Queries turn
+each term into a bitmap and combine them with ``&`` / ``|`` / ``~``, which runs in
+C over machine words: a 3-skill AND over 100k employees is a few
+kilobytes of bit operations.
+
+The index is bulk-loaded from Postgres on first use, updated in place by
+``add`` when this process saves skills, and fully reloaded every
+``SKILL_INDEX_REFRESH_SECONDS`` to pick up other workers' writes and
+deletions.
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import os
+import re
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app import metrics
+from app.db import get_connection, release_connection
+
+SKILL_INDEX_REFRESH_SECONDS = int(os.getenv("SKILL_INDEX_REFRESH_SECONDS", 300))
+SKILL_INDEX_FETCH_ROWS = int(os.getenv("SKILL_INDEX_FETCH_ROWS", 50000))
+
+# A posting is a sorted array of employee ordinals, or a bitmap once dense.
+Posting = Union[array, int]
+
+
+class QuerySyntaxError(ValueError):
+    """The search expression could not be parsed."""
+
+
+def _key(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def _to_bitmap(posting: Posting) -> int:
+    if isinstance(posting, int):
+        return posting
+    if not posting:
+        return 0
+    buf = bytearray((posting[-1] >> 3) + 1)
+    for ordinal in posting:
+        buf[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _compact(ordinals: array, employees: int) -> Posting:
+    """Keep ``ordinals`` as an array unless a bitmap would be smaller."""
+    return _to_bitmap(ordinals) if len(ordinals) * 32 > employees else ordinals
+
+
+def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+    """``keys[start:end]`` are the sorted keys starting with ``prefix``."""
+    start = bisect.bisect_left(keys, prefix)
+    return start, bisect.bisect_left(keys, prefix + "\U0010ffff", start)
+
+
+def _ordinals(bitmap: int, offset: int, limit: int) -> List[int]:
+    """Set bit positions ``offset .. offset + limit`` of ``bitmap``, lowest first."""
+    found: List[int] = []
+    skipped = 0
+    while bitmap and len(found) < limit:
+        low = bitmap & -bitmap
+        if skipped < offset:
+            skipped += 1
+        else:
+            found.append(low.bit_length() - 1)
+        bitmap ^= low
+    return found
+
+
+# ----------------------
+# Query parsing
+# ----------------------
+_TOKENS = re.compile(r"(\(|\)|\bAND\b|\bOR\b|\bNOT\b)")
+
+
+def parse_query(query: str):
+    """Parse ``Python AND (Odoo OR Django) AND NOT Arab*`` into a small tree.
+
+    NOT binds tightest, then AND, then OR; operators must be upper case so
+    names such as "Research and Development" stay one term. A trailing ``*``
+    matches by prefix. Returns ``("term", name, is_prefix)`` /
+    ``("not", child)`` / ``("and"|"or", [children])``.
+    """
+    tokens = [t.strip() for t in _TOKENS.split(query or "") if t.strip()]
+    if not tokens:
+        raise QuerySyntaxError("Empty query.")
+    pos = 0
+
+    def peek() -> Optional[str]:
+        return tokens[pos] if pos < len(tokens) else None
+
+    def expr():
+        nonlocal pos
+        children = [conjunction()]
+        while peek() == "OR":
+            pos += 1
+            children.append(conjunction())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def conjunction():
+        nonlocal pos
+        children = [atom()]
+        while peek() == "AND":
+            pos += 1
+            children.append(atom())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def atom():
+        nonlocal pos
+        token = peek()
+        if token is None or token in ("AND", "OR", ")"):
+            raise QuerySyntaxError(f"Expected a skill name at {token or 'end of query'!r}.")
+        pos += 1
+        if token == "NOT":
+            return ("not", atom())
+        if token == "(":
+            node = expr()
+            if peek() != ")":
+                raise QuerySyntaxError("Missing closing parenthesis.")
+            pos += 1
+            return node
+        name = token.strip('"').strip()
+        prefix = name.endswith("*")
+        name = name.rstrip("*").strip()
+        if not name:
+            raise QuerySyntaxError("Empty skill name.")
+        return ("term", name, prefix)
+
+    tree = expr()
+    if pos != len(tokens):
+        raise QuerySyntaxError(f"Unexpected {tokens[pos]!r}.")
+    return tree
+
+
+# ----------------------
+# Index
+# ----------------------
+class SkillIndex:
+    def __init__(self):
+        self._emp_ids: List[str] = []  # ordinal -> employee id
+        self._ordinals: Dict[str, int] = {}  # employee id -> ordinal
+        self._postings: Dict[int, Posting] = {}  # skill_id -> holders
+        self._counts: Dict[int, int] = {}  # skill_id -> number of holders
+        self._names: Dict[str, Tuple[str, List[int]]] = {}  # key -> (display name, skill ids)
+        self._sorted_keys: List[str] = []
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._loading = False
+        self._pending: List[Tuple[str, Dict[str, int]]] = []  # adds seen during a reload
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at > 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "employees": len(self._emp_ids),
+                "skills": len(self._names),
+                "age_s": round(time.time() - self._loaded_at, 1) if self.loaded else None,
+            }
+
+    # ----------------------
+    # Building
+    # ----------------------
+    def build(self, skills: Iterable[Tuple[int, str]], links: Iterable[Tuple[int, str]]) -> None:
+        """Replace the index with ``(skill_id, name)`` and ``(skill_id, emp_id)`` rows."""
+        holders: Dict[int, List[str]] = {}
+        for skill_id, emp_id in links:
+            holders.setdefault(skill_id, []).append(emp_id)
+
+        emp_ids = sorted({emp_id for ids in holders.values() for emp_id in ids})
+        ordinals = {emp_id: i for i, emp_id in enumerate(emp_ids)}
+        postings: Dict[int, Posting] = {}
+        counts: Dict[int, int] = {}
+        for skill_id, ids in holders.items():
+            posting = array("I", sorted({ordinals[e] for e in ids}))
+            counts[skill_id] = len(posting)
+            postings[skill_id] = _compact(posting, len(emp_ids))
+
+        names: Dict[str, Tuple[str, List[int]]] = {}
+        for skill_id, name in skills:
+            key = _key(name)
+            if key:
+                names.setdefault(key, (name.strip(), []))[1].append(skill_id)
+
+        with self._lock:
+            self._emp_ids, self._ordinals, self._postings = emp_ids, ordinals, postings
+            self._counts = counts
+            self._names, self._sorted_keys = names, sorted(names)
+            self._loaded_at = time.time()
+
+    def add(self, emp_id: str, skill_ids: Dict[str, int]) -> None:
+        """Record that ``emp_id`` now has ``{name: skill_id}``."""
+        with self._lock:
+            if self._loading:
+                self._pending.append((emp_id, dict(skill_ids)))
+            if not self.loaded:
+                return
+            ordinal = self._ordinals.get(emp_id)
+            if ordinal is None:
+                ordinal = len(self._emp_ids)
+                self._ordinals[emp_id] = ordinal
+                self._emp_ids.append(emp_id)
+            for name, skill_id in skill_ids.items():
+                key = _key(name)
+                entry = self._names.get(key)
+                if entry is None:
+                    self._names[key] = (name.strip(), [skill_id])
+                    bisect.insort(self._sorted_keys, key)
+                elif skill_id not in entry[1]:
+                    entry[1].append(skill_id)
+
+                posting = self._postings.get(skill_id)
+                if isinstance(posting, int):
+                    if not posting >> ordinal & 1:
+                        self._postings[skill_id] = posting | (1 << ordinal)
+                        self._counts[skill_id] += 1
+                    continue
+                if posting is None:
+                    posting = self._postings[skill_id] = array("I")
+                i = bisect.bisect_left(posting, ordinal)
+                if i == len(posting) or posting[i] != ordinal:
+                    posting.insert(i, ordinal)
+                    self._counts[skill_id] = len(posting)
+                    self._postings[skill_id] = _compact(posting, len(self._emp_ids))
+
+    # ----------------------
+    # Loading from Postgres
+    # ----------------------
+    def refresh_from_db(self, force: bool = False) -> bool:
+        """Reload everything when stale. The first load blocks; later ones run in the background."""
+        if not force and self.loaded and time.time() - self._loaded_at < SKILL_INDEX_REFRESH_SECONDS:
+            return False
+        if self.loaded and not force:
+            if not self._loading:
+                threading.Thread(target=self._reload, name="skill-index-reload", daemon=True).start()
+            return False
+        return self._reload()
+
+    def _reload(self) -> bool:
+        with self._load_lock:
+            with self._lock:
+                self._loading = True
+                self._pending = []
+            try:
+                rows = self._fetch()
+                if rows is None:
+                    return False
+                started = time.perf_counter()
+                self.build(*rows)
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                    self._loading = False
+                    # Saves that landed after our SELECT started.
+                    for emp_id, skill_ids in pending:
+                        self.add(emp_id, skill_ids)
+                print(f"✅ Skill index loaded: {self.stats()} in {time.perf_counter() - started:.2f}s")
+                return True
+            finally:
+                with self._lock:
+                    self._loading = False
+
+    def _fetch(self):
+        conn = get_connection()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT skill_id, name FROM skill")
+                skills = cur.fetchall()
+            links: List[Tuple[int, str]] = []
+            # Server-side cursor: stream the link table instead of one huge fetch.
+            with conn.cursor(name="skill_index_links") as cur:
+                cur.itersize = SKILL_INDEX_FETCH_ROWS
+                cur.execute("SELECT skill_id, emp_id FROM employee_skill")
+                links.extend(cur)
+            conn.commit()
+            return skills, links
+        except Exception as exc:
+            conn.rollback()
+            print("⚠️ Could not load the skill index:", exc)
+            return None
+        finally:
+            release_connection(conn)
+
+    # ----------------------
+    # Queries
+    # ----------------------
+    def _term_bitmap(self, name: str, prefix: bool) -> Tuple[int, bool]:
+        key = _key(name)
+        if prefix:
+            start, end = _prefix_range(self._sorted_keys, key)
+            keys = self._sorted_keys[start:end]
+        else:
+            keys = [key] if key in self._names else []
+        bitmap = 0
+        for k in keys:
+            for skill_id in self._names[k][1]:
+                posting = self._postings.get(skill_id)
+                if posting is not None:
+                    bitmap |= _to_bitmap(posting)
+        return bitmap, bool(keys)
+
+    def _evaluate(self, node, unknown: List[str]) -> int:
+        if node[0] == "term":
+            bitmap, known = self._term_bitmap(node[1], node[2])
+            if not known:
+                unknown.append(node[1] + ("*" if node[2] else ""))
+            return bitmap
+        if node[0] == "not":
+            everyone = (1 << len(self._emp_ids)) - 1
+            return everyone & ~self._evaluate(node[1], unknown)
+        children = node[1]
+        if node[0] == "or":
+            result = 0
+            for child in children:
+                result |= self._evaluate(child, unknown)
+            return result
+        result = -1  # all bits set
+        for child in children:
+            result &= self._evaluate(child, unknown)
+        return result
+
+    def search(self, query: str, offset: int = 0, limit: int = 50) -> dict:
+        """Employees matching a boolean skill expression (see ``parse_query``).
+
+        Returns ``{"total", "employee_ids", "unknown_terms"}``; ids come back in
+        a stable order so ``offset``/``limit`` page through the result.
+        """
+        tree = parse_query(query)
+        unknown: List[str] = []
+        with self._lock:
+            bitmap = self._evaluate(tree, unknown)
+            emp_ids = self._emp_ids
+            page = _ordinals(bitmap, offset, limit) if bitmap > 0 else []
+            ids = [emp_ids[i] for i in page]
+        return {"total": bitmap.bit_count() if bitmap > 0 else 0, "employee_ids": ids, "unknown_terms": unknown}
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Skill names starting with ``prefix``, most widely held first."""
+        key = _key(prefix)
+        with self._lock:
+            start, end = _prefix_range(self._sorted_keys, key)
+            candidates = []
+            for k in self._sorted_keys[start:end]:
+                name, skill_ids = self._names[k]
+                count = sum(self._counts.get(s, 0) for s in skill_ids)
+                candidates.append((count, name))
+        best = heapq.nsmallest(limit, candidates, key=lambda c: (-c[0], c[1].lower()))
+        return [{"name": name, "employees": count} for count, name in best]
+
+
+index = SkillIndex()
+
+metrics.callback_gauge(
+    "skill_index_entries",
+    "Employees and skill names held by the in-memory skill index.",
+    lambda: [({"kind": kind}, index.stats()[kind]) for kind in ("employees", "skills")],
+    ("kind",),
+)
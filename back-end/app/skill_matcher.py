@@ -0,0 +1,222 @@
+"""Local dictionary matcher over the ``skill`` table (Aho-Corasick).
+
+Every skill name ever saved becomes a pattern in one automaton, so a CV is
+scanned for all of them in a single linear pass. Hits are fed into the
+LangGraph state to seed the LLM, flag misses, or replace it entirely when
+the dictionary already covers the CV.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.db import get_connection, release_connection
+
+# Skip one-letter names ("C", "R"): too many false hits in free text.
+MATCH_MIN_LENGTH = int(os.getenv("SKILL_MATCH_MIN_LENGTH", 2))
+# Names this short are also English words or fragments ("Go", "IT", "Ada"):
+# they only count when the CV writes them exactly as the skill is spelled.
+MATCH_EXACT_CASE_MAX_LENGTH = int(os.getenv("SKILL_MATCH_EXACT_CASE_MAX_LENGTH", 3))
+# How often to pull skills inserted by other workers.
+MATCH_REFRESH_SECONDS = int(os.getenv("SKILL_MATCH_REFRESH_SECONDS", 300))
+
+CATEGORIES = ("hard_skills", "soft_skills", "tools_and_tech", "languages")
+
+
+def _lower(text: str) -> str:
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters change length when lowered; keep offsets aligned.
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class SkillMatcher:
+    """Case-insensitive multi-pattern matcher with whole-word boundaries.
+
+    Names up to ``MATCH_EXACT_CASE_MAX_LENGTH`` characters are matched
+    case-sensitively, so "Go" is found but "go to market" is not.
+
+    Patterns are inserted into the trie immediately; failure links are
+    rebuilt lazily on the next scan, so adds stay cheap under write bursts.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[List[str]] = [[]]  # patterns ending exactly at a node
+        self._out: List[List[str]] = [[]]  # terminal + everything along the fail chain
+        self._names: Dict[str, str] = {}  # lowered pattern -> canonical name
+        self._categories: Dict[str, str] = {}  # lowered pattern -> learned category
+        self._dirty = False
+        # Immutable copy used by scans, so adds never race with a running scan.
+        self._snapshot = ([{}], [0], [[]], {})
+        self._lock = threading.RLock()
+        self._loaded_max_id = 0
+        self._loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    # ----------------------
+    # Building
+    # ----------------------
+    def add(self, names: Iterable[str]) -> int:
+        """Insert new skill names; returns how many were new."""
+        added = 0
+        with self._lock:
+            for name in names:
+                name = " ".join((name or "").split())
+                key = _lower(name)
+                if len(key) < MATCH_MIN_LENGTH or key in self._names:
+                    continue
+                self._names[key] = name
+                node = 0
+                for ch in key:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[node][ch] = nxt
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._terminal.append([])
+                    node = nxt
+                self._terminal[node].append(key)
+                added += 1
+            if added:
+                self._dirty = True
+        return added
+
+    def _build_links(self) -> None:
+        """Breadth-first pass computing failure links and merged outputs."""
+        fail = [0] * len(self._goto)
+        out = [list(keys) for keys in self._terminal]
+        queue = deque()
+        for child in self._goto[0].values():
+            fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in self._goto[f]:
+                    f = fail[f]
+                candidate = self._goto[f].get(ch, 0)
+                fail[child] = candidate if candidate != child else 0
+                out[child] = out[child] + out[fail[child]]
+        self._fail = fail
+        self._out = out
+        self._snapshot = ([dict(edges) for edges in self._goto], fail, out, dict(self._names))
+        self._dirty = False
+
+    # ----------------------
+    # Categories (learned from LLM output)
+    # ----------------------
+    def learn(self, skills: dict) -> None:
+        """Remember which category the LLM put each known skill in."""
+        with self._lock:
+            for category in CATEGORIES:
+                for name in skills.get(category) or []:
+                    if not isinstance(name, str):
+                        continue
+                    key = _lower(" ".join(name.split()))
+                    if key in self._names:
+                        self._categories[key] = category
+
+    def category_of(self, name: str) -> Optional[str]:
+        return self._categories.get(_lower(" ".join(name.split())))
+
+    # ----------------------
+    # Scanning
+    # ----------------------
+    def scan(self, text: str) -> Dict[str, int]:
+        """Return ``{canonical name: occurrences}`` for whole-word hits in ``text``."""
+        with self._lock:
+            if self._dirty:
+                self._build_links()
+            goto, fail, out, names = self._snapshot
+
+        lowered = _lower(text)
+        spans: List[Tuple[int, int, str]] = []
+        node = 0
+        for i, ch in enumerate(lowered):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for key in out[node]:
+                start = i - len(key) + 1
+                if start > 0 and _is_word_char(lowered[start - 1]) and _is_word_char(key[0]):
+                    continue
+                end = i + 1
+                if end < len(lowered) and _is_word_char(lowered[end]) and _is_word_char(key[-1]):
+                    continue
+                if len(key) <= MATCH_EXACT_CASE_MAX_LENGTH and text[start:end] != names[key]:
+                    continue
+                spans.append((start, end, key))
+
+        # Leftmost-longest: "Machine Learning" wins over "Learning" inside it.
+        spans.sort(key=lambda s: (s[0], -(s[1] - s[0])))
+        counts: Dict[str, int] = {}
+        covered_until = -1
+        for start, end, key in spans:
+            if start < covered_until:
+                continue
+            covered_until = end
+            name = names[key]
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    # ----------------------
+    # Loading from Postgres
+    # ----------------------
+    def refresh_from_db(self, force: bool = False) -> int:
+        """Load skills added since the last refresh (all of them the first time)."""
+        if not force and time.time() - self._loaded_at < MATCH_REFRESH_SECONDS:
+            return 0
+        conn = get_connection()
+        if conn is None:
+            return 0
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT skill_id, name FROM skill WHERE skill_id > %s ORDER BY skill_id",
+                    (self._loaded_max_id,),
+                )
+                rows = cur.fetchall()
+            conn.commit()
+        except Exception as exc:
+            conn.rollback()
+            print("⚠️ Could not load skills for the matcher:", exc)
+            return 0
+        finally:
+            release_connection(conn)
+
+        self._loaded_at = time.time()
+        if rows:
+            self._loaded_max_id = max(self._loaded_max_id, max(row[0] for row in rows))
+        return self.add(row[1] for row in rows)
+
+
+matcher = SkillMatcher()
+
+
+def scan_cv(text: str) -> List[dict]:
+    """Scan CV text with the shared matcher (refreshing it when stale).
+
+    Returns hits sorted by frequency: ``[{"name", "count", "category"}]``.
+    """
+    matcher.refresh_from_db()
+    counts = matcher.scan(text)
+    return [
+        {"name": name, "count": count, "category": matcher.category_of(name)}
+        for name, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0].lower()))
+    ]
@@ -0,0 +1,234 @@
+"""Cached, keyset-paginated reads of saved employee skills.
+
+Pages are walked with ``WHERE key > after ORDER BY key LIMIT n`` on the
+``employee_skill`` indexes, so page 500 costs the same as page 1. Each
+employee has a skill version (``employee_skill_version``) that
+``save_employee_skills`` bumps; the ETag of an employee's page is derived
+from it, so a client holding the current ETag gets a 304 after one
+primary-key lookup, or none at all when the page is in this process's
+response cache.
+
+The cache is per process: ``save_skills`` invalidates the entries it
+affects here, and ``SKILL_READ_CACHE_TTL`` bounds how long another
+worker's writes can go unseen.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from app import metrics
+from app.db import get_connection, release_connection
+from app.skill_store import StoreUnavailable
+
+SKILL_READ_CACHE_TTL = float(os.getenv("SKILL_READ_CACHE_TTL", 30))
+SKILL_READ_CACHE_MAX = int(os.getenv("SKILL_READ_CACHE_MAX", 10000))
+
+READ_CACHE = metrics.counter(
+    "skill_read_cache_total",
+    "Skill read responses by how they were served.",
+    ("result",),
+)
+
+VERSION_SQL = "SELECT version FROM employee_skill_version WHERE emp_id = %s"
+
+# Version and one page in a single round trip; the LEFT JOIN keeps the
+# version row when the page is empty.
+EMPLOYEE_PAGE_SQL = """
+SELECT COALESCE((SELECT version FROM employee_skill_version WHERE emp_id = %(emp)s), 0),
+       page.skill_id, page.name
+FROM (SELECT 1) AS one
+LEFT JOIN LATERAL (
+    SELECT es.skill_id, s.name
+    FROM employee_skill es
+    JOIN skill s ON s.skill_id = es.skill_id
+    WHERE es.emp_id = %(emp)s AND es.skill_id > %(after)s
+    ORDER BY es.skill_id
+    LIMIT %(limit)s
+) AS page ON TRUE
+"""
+
+SKILL_EMPLOYEES_SQL = """
+SELECT s.name, page.emp_id, page.name
+FROM skill s
+LEFT JOIN LATERAL (
+    SELECT e.id AS emp_id, e.name
+    FROM employee_skill es
+    JOIN employee e ON e.id = es.emp_id
+    WHERE es.skill_id = s.skill_id AND es.emp_id > %(after)s
+    ORDER BY es.emp_id
+    LIMIT %(limit)s
+) AS page ON TRUE
+WHERE s.skill_id = %(skill)s
+"""
+
+
+# ----------------------
+# ETags
+# ----------------------
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of ``etag`` against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+# ----------------------
+# Response cache
+# ----------------------
+class ReadCache:
+    """Bounded LRU of ``key -> (expires, etag, body)`` with a short TTL."""
+
+    def __init__(self, max_entries: int = SKILL_READ_CACHE_MAX, ttl: float = SKILL_READ_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Tuple[str, dict]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: tuple, etag: str, body: dict) -> None:
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, kind: str, ids: Iterable) -> int:
+        """Drop every page cached for the given employee or skill ids."""
+        ids = {str(i) for i in ids}
+        if not ids:
+            return 0
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == kind and k[1] in ids]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries)}
+
+
+cache = ReadCache()
+
+
+def invalidate(emp_id: str, skill_ids: Iterable[int]) -> None:
+    """Called after ``emp_id`` saved skills: drop its pages and the skills' pages."""
+    cache.invalidate("emp", [emp_id])
+    cache.invalidate("skill", skill_ids)
+
+
+# ----------------------
+# Queries
+# ----------------------
+def _run(sql: str, params) -> list:
+    conn = get_connection()
+    if conn is None:
+        raise StoreUnavailable("Database connection not available.")
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        conn.commit()
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
+
+def _employee_etag(emp_id: str, version: int, after: int, limit: int) -> str:
+    return make_etag("emp", emp_id, version, after, limit)
+
+
+def employee_skills(emp_id: str, after: int, limit: int, if_none_match: Optional[str] = None):
+    """Return ``(etag, body)``; ``body`` is None when ``if_none_match`` is current."""
+    key = ("emp", str(emp_id), after, limit)
+    cached = cache.get(key)
+    if cached is not None:
+        READ_CACHE.inc(result="hit")
+        etag, body = cached
+        return etag, None if etag_matches(if_none_match, etag) else body
+
+    if if_none_match:
+        # Revalidation only needs the version: one primary-key lookup.
+        rows = _run(VERSION_SQL, (emp_id,))
+        etag = _employee_etag(emp_id, rows[0][0] if rows else 0, after, limit)
+        if etag_matches(if_none_match, etag):
+            READ_CACHE.inc(result="revalidated")
+            return etag, None
+
+    READ_CACHE.inc(result="miss")
+    rows = _run(EMPLOYEE_PAGE_SQL, {"emp": emp_id, "after": after, "limit": limit})
+    version = rows[0][0]
+    skills = [{"skill_id": skill_id, "name": name} for _, skill_id, name in rows if skill_id is not None]
+    body = {
+        "emp_id": emp_id,
+        "version": version,
+        "skills": skills,
+        "next_after": skills[-1]["skill_id"] if len(skills) == limit else None,
+    }
+    etag = _employee_etag(emp_id, version, after, limit)
+    cache.put(key, etag, body)
+    return etag, None if etag_matches(if_none_match, etag) else body
+
+
+def skill_employees(skill_id: int, after: str, limit: int, if_none_match: Optional[str] = None):
+    """Return ``(etag, body)``, or None for an unknown skill; ``body`` is None on a match."""
+    key = ("skill", str(skill_id), after, limit)
+    cached = cache.get(key)
+    if cached is not None:
+        READ_CACHE.inc(result="hit")
+    else:
+        READ_CACHE.inc(result="miss")
+        rows = _run(SKILL_EMPLOYEES_SQL, {"skill": skill_id, "after": after, "limit": limit})
+        if not rows:
+            return None
+        employees = [{"id": emp_id, "name": name} for _, emp_id, name in rows if emp_id is not None]
+        body = {
+            "skill_id": skill_id,
+            "name": rows[0][0],
+            "employees": employees,
+            "next_after": employees[-1]["id"] if len(employees) == limit else None,
+        }
+        # No per-skill version to lean on; the page content is the validator.
+        cached = (make_etag("skill", body), body)
+        cache.put(key, *cached)
+    etag, body = cached
+    return etag, None if etag_matches(if_none_match, etag) else body
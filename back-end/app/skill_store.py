@@ -0,0 +1,240 @@
+"""Set-based persistence for skills and employee/skill links.
+
+A save costs a constant number of round trips regardless of how many
+skills are sent: one multi-row insert (plus one lookup for names that
+already existed) for names we have not seen yet in this process, and one
+insert for all links.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import psycopg2
+
+from app.db import get_connection, release_connection
+
+SKILL_ID_CACHE_MAX = int(os.getenv("SKILL_ID_CACHE_MAX", 50000))
+
+SCHEMA_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS skill_name_key ON skill (name);
+CREATE UNIQUE INDEX IF NOT EXISTS employee_skill_emp_skill_key
+    ON employee_skill (emp_id, skill_id);
+"""
+
+# Reverse lookups (skill -> employees) for search; kept separate so a
+# failing unique index above does not roll it back.
+SEARCH_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS employee_skill_skill_emp_idx
+    ON employee_skill (skill_id, emp_id);
+"""
+
+# Bumped whenever an employee gains skills; read endpoints derive ETags from it.
+VERSION_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS employee_skill_version (
+    emp_id VARCHAR(20) PRIMARY KEY REFERENCES employee (id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0
+);
+"""
+
+BUMP_VERSION_SQL = """
+INSERT INTO employee_skill_version (emp_id, version) VALUES (%s, 1)
+ON CONFLICT (emp_id) DO UPDATE SET version = employee_skill_version.version + 1
+RETURNING version
+"""
+
+# Needs the unique index on skill(name). DO NOTHING rather than a no-op
+# DO UPDATE: updating existing rows would row-lock them, and those locks
+# deadlock against the FK key-share locks taken by concurrent link inserts.
+UPSERT_SKILLS_SQL = """
+INSERT INTO skill (name)
+SELECT unnest(%s::text[])
+ON CONFLICT (name) DO NOTHING
+RETURNING skill_id, name
+"""
+
+SELECT_SKILLS_SQL = "SELECT skill_id, name FROM skill WHERE name = ANY(%s)"
+
+# Used when the unique index could not be created (legacy duplicate names).
+UPSERT_SKILLS_FALLBACK_SQL = """
+WITH input(name) AS (SELECT unnest(%s::text[])),
+existing AS (
+    SELECT DISTINCT ON (s.name) s.skill_id, s.name
+    FROM skill s JOIN input i ON s.name = i.name
+    ORDER BY s.name, s.skill_id
+),
+inserted AS (
+    INSERT INTO skill (name)
+    SELECT i.name FROM input i
+    WHERE NOT EXISTS (SELECT 1 FROM existing e WHERE e.name = i.name)
+    RETURNING skill_id, name
+)
+SELECT skill_id, name FROM existing
+UNION ALL
+SELECT skill_id, name FROM inserted
+"""
+
+LINK_SKILLS_SQL = """
+INSERT INTO employee_skill (emp_id, skill_id)
+SELECT %s, ids.skill_id
+FROM unnest(%s) AS ids(skill_id)
+WHERE NOT EXISTS (
+    SELECT 1 FROM employee_skill es WHERE es.emp_id = %s AND es.skill_id = ids.skill_id
+)
+ON CONFLICT DO NOTHING
+"""
+
+# to_regclass resolves the name through search_path, like the DDL above.
+UNIQUE_NAME_INDEX_SQL = """
+SELECT 1 FROM pg_index
+WHERE indexrelid = to_regclass('skill_name_key') AND indisunique AND indisvalid
+"""
+
+_skill_ids: Dict[str, int] = {}
+_skill_ids_lock = threading.Lock()
+_schema_lock = threading.Lock()
+_schema_ready = False
+_has_unique_names = True
+
+
+class StoreUnavailable(RuntimeError):
+    """Raised when the database cannot be reached."""
+
+
+def init_schema() -> bool:
+    """Create the indexes and tables saves and reads rely on. Run once at startup.
+
+    DDL takes locks on ``skill``/``employee_skill``, so it is kept off the
+    request path. Returns False when the database was unreachable.
+    """
+    global _schema_ready, _has_unique_names
+    conn = get_connection()
+    if conn is None:
+        print("⚠️ Skill schema not checked: database connection not available")
+        return False
+    try:
+        with _schema_lock:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(SCHEMA_SQL)
+                conn.commit()
+                _has_unique_names = True
+            except psycopg2.Error as exc:
+                conn.rollback()
+                # CREATE INDEX IF NOT EXISTS still fails when another process creates
+                # it at the same moment; only fall back if the index really is missing.
+                _has_unique_names = _unique_names(conn)
+                if not _has_unique_names:
+                    print("⚠️ skill name unique index missing, using fallback upsert:", exc)
+            for label, sql in (("skill search index", SEARCH_INDEX_SQL), ("skill version table", VERSION_TABLE_SQL)):
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(sql)
+                    conn.commit()
+                except psycopg2.Error as exc:
+                    conn.rollback()
+                    print(f"⚠️ Could not create the {label}:", exc)
+            _schema_ready = True
+        return True
+    finally:
+        release_connection(conn)
+
+
+def _unique_names(conn) -> bool:
+    with conn.cursor() as cur:
+        cur.execute(UNIQUE_NAME_INDEX_SQL)
+        found = cur.fetchone() is not None
+    conn.commit()
+    return found
+
+
+def check_schema(conn) -> None:
+    """Pick the upsert statement when startup could not reach the database. No DDL."""
+    global _schema_ready, _has_unique_names
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            _has_unique_names = _unique_names(conn)
+            _schema_ready = True
+
+
+def cached_skill_ids(names: Iterable[str]) -> Dict[str, int]:
+    with _skill_ids_lock:
+        return {name: _skill_ids[name] for name in names if name in _skill_ids}
+
+
+def remember_skill_ids(pairs: Dict[str, int]) -> None:
+    with _skill_ids_lock:
+        if len(_skill_ids) + len(pairs) > SKILL_ID_CACHE_MAX:
+            _skill_ids.clear()
+        _skill_ids.update(pairs)
+
+
+def forget_skill_ids() -> None:
+    with _skill_ids_lock:
+        _skill_ids.clear()
+
+
+def _resolve_skill_ids(cur, names: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Return ``{name: skill_id}`` for ``names`` plus the ids fetched from the DB."""
+    ids = cached_skill_ids(names)
+    missing = sorted(name for name in names if name not in ids)  # sorted: stable lock order
+    fetched: Dict[str, int] = {}
+    if missing:
+        cur.execute(UPSERT_SKILLS_SQL if _has_unique_names else UPSERT_SKILLS_FALLBACK_SQL, (missing,))
+        fetched = {name: skill_id for skill_id, name in cur.fetchall()}
+        existing = [name for name in missing if name not in fetched]
+        if existing:
+            cur.execute(SELECT_SKILLS_SQL, (existing,))
+            for skill_id, name in cur.fetchall():
+                fetched.setdefault(name, skill_id)  # legacy duplicates: any id will do
+        ids.update(fetched)
+    return ids, fetched
+
+
+def save_employee_skills(emp_id: str, names: Iterable[str]) -> dict:
+    """Upsert ``names`` and link them to ``emp_id`` in one transaction.
+
+    Returns ``{"saved": <new links>, "skill_ids": {name: id}, "version": <skill version>}``;
+    ``version`` is None when nothing new was linked.
+    """
+    names = sorted({n for n in names if n})
+    if not names:
+        return {"saved": 0, "skill_ids": {}, "version": None}
+
+    conn = get_connection()
+    if conn is None:
+        raise StoreUnavailable("Database connection not available.")
+    try:
+        check_schema(conn)
+        for attempt in range(2):
+            try:
+                with conn.cursor() as cur:
+                    ids, fetched = _resolve_skill_ids(cur, names)
+                    cur.execute(LINK_SKILLS_SQL, (emp_id, sorted(ids.values()), emp_id))
+                    saved = cur.rowcount
+                    version = None
+                    if saved:
+                        cur.execute(BUMP_VERSION_SQL, (emp_id,))
+                        version = cur.fetchone()[0]
+                conn.commit()
+                # Only cache committed ids, so other requests never link to a row
+                # that might still roll back.
+                remember_skill_ids(fetched)
+                return {"saved": saved, "skill_ids": ids, "version": version}
+            except psycopg2.errors.ForeignKeyViolation:
+                # A cached skill_id was deleted behind our back; retry uncached.
+                conn.rollback()
+                forget_skill_ids()
+                if attempt:
+                    raise
+            except psycopg2.errors.DeadlockDetected:
+                conn.rollback()
+                if attempt:
+                    raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
@@ -0,0 +1,235 @@
+"""Document text extraction stage (PDF / DOCX / TXT).
+
+Long PDFs are split into page ranges parsed in a process pool, and parsing
+stops early once the page or character budget is reached, so a 60-page
+portfolio costs about as much as the first few pages we actually send to
+the LLM.
+
+A source is either the file's bytes or the path of a spooled upload. PDF
+and TXT paths are read through ``mmap``, so the file's pages live in the OS
+page cache instead of the worker's heap, and pool workers get the path
+rather than a pickled copy of the document. DOCX paths are opened directly
+by zipfile.
+"""
+
+from __future__ import annotations
+
+import codecs
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Iterator, List, Optional, Union
+
+from . import common_imports, metrics, tracing
+
+PARSE_MAX_PAGES = int(os.getenv("CV_PARSE_MAX_PAGES", 30))
+PARSE_MAX_CHARS = int(os.getenv("CV_PARSE_MAX_CHARS", 60000))
+PARSE_WORKERS = int(os.getenv("CV_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+PARSE_PAGES_PER_TASK = int(os.getenv("CV_PARSE_PAGES_PER_TASK", 4))
+
+Source = Union[bytes, str, "os.PathLike[str]"]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: never fork a process that is running uvicorn threads.
+            _pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the PDF page workers (app shutdown); the next large PDF starts a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+@contextmanager
+def open_source(source: Source) -> Iterator:
+    """Yield a seekable binary stream over ``source`` (bytes, or a path mapped with mmap)."""
+    if isinstance(source, (bytes, bytearray)):
+        yield BytesIO(source)
+        return
+    with open(source, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield BytesIO(b"")  # empty files cannot be mapped
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+# ----------------------
+# PDF
+# ----------------------
+def _pdf_pages(source: Source, start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end). Runs inside a pool worker."""
+    with open_source(source) as stream:
+        reader = common_imports.PdfReader(stream)
+        return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _extract_pdf(source: Source, max_pages: int, max_chars: int) -> dict:
+    with open_source(source) as stream:
+        reader = common_imports.PdfReader(stream)
+        page_count = len(reader.pages)
+        limit = min(page_count, max_pages)
+
+        pages: List[str] = []
+        chars = 0
+
+        def _take(batch: List[str]) -> bool:
+            nonlocal chars
+            for text in batch:
+                pages.append(text)
+                chars += len(text)
+                if chars >= max_chars:
+                    return False
+            return True
+
+        if limit <= PARSE_PAGES_PER_TASK or PARSE_WORKERS <= 1:
+            # Short CVs: a process hop costs more than it saves.
+            for i in range(limit):
+                if not _take([reader.pages[i].extract_text() or ""]):
+                    break
+        else:
+            pool = _get_pool()
+            ranges = [
+                (start, min(start + PARSE_PAGES_PER_TASK, limit))
+                for start in range(0, limit, PARSE_PAGES_PER_TASK)
+            ]
+            # Submit one wave per worker so an early stop leaves later pages unparsed.
+            for wave_start in range(0, len(ranges), PARSE_WORKERS):
+                wave = ranges[wave_start : wave_start + PARSE_WORKERS]
+                futures = [pool.submit(_pdf_pages, source, s, e) for s, e in wave]
+                keep_going = True
+                for future in futures:
+                    if keep_going:
+                        keep_going = _take(future.result())
+                    else:
+                        future.cancel()
+                if not keep_going:
+                    break
+
+        return {
+            "pages": pages,
+            "page_count": page_count,
+            "truncated": len(pages) < page_count,
+        }
+
+
+# ----------------------
+# DOCX
+# ----------------------
+def _docx_table_lines(table) -> List[str]:
+    lines = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            text = cell.text.strip()
+            # Merged cells repeat the same text across the span.
+            if text and (not cells or cells[-1] != text):
+                cells.append(text)
+        if cells:
+            lines.append(" | ".join(cells))
+    return lines
+
+
+def _extract_docx(source: Source, max_chars: int) -> dict:
+    # zipfile needs a real file object (mmap is not "seekable" before 3.13);
+    # it only reads the members python-docx asks for anyway.
+    doc = common_imports.Document(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    lines: List[str] = []
+    chars = 0
+    truncated = False
+    # Walk paragraphs and tables in document order; skills grids often live in tables.
+    for block in doc.iter_inner_content():
+        block_lines = _docx_table_lines(block) if hasattr(block, "rows") else [block.text]
+        for line in block_lines:
+            lines.append(line)
+            chars += len(line) + 1
+        if chars >= max_chars:
+            truncated = True
+            break
+    return {"pages": ["\n".join(lines)], "page_count": 1, "truncated": truncated}
+
+
+# ----------------------
+# TXT
+# ----------------------
+def _extract_txt(source: Source, max_chars: int) -> dict:
+    # UTF-8 is at most 4 bytes per character; never read more than the budget needs.
+    limit = max_chars * 4
+    with open_source(source) as stream:
+        raw = stream.read(limit + 1)
+    return {"pages": [decode_text(raw[:limit])], "page_count": 1, "truncated": len(raw) > limit}
+
+
+def decode_text(raw: bytes) -> str:
+    """Decode a text CV: BOM (UTF-8/UTF-16), else UTF-8, else Windows-1252 (Latin-1 exports)."""
+    if raw.startswith(codecs.BOM_UTF8):
+        return raw[len(codecs.BOM_UTF8) :].decode("utf-8", errors="replace")
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return codecs.getincrementaldecoder("utf-16")(errors="replace").decode(raw)
+    try:
+        # final=False: a character cut off by the read limit is dropped, not an error.
+        return codecs.getincrementaldecoder("utf-8")().decode(raw, final=False)
+    except UnicodeDecodeError:
+        return raw.decode("cp1252", errors="replace")
+
+
+# ----------------------
+# Entry point
+# ----------------------
+def extract_text(
+    source: Source,
+    filename: str,
+    max_pages: int = PARSE_MAX_PAGES,
+    max_chars: int = PARSE_MAX_CHARS,
+) -> dict:
+    """Return ``{"text", "pages", "page_count", "pages_parsed", "truncated", "parse_ms"}``.
+
+    ``source`` is the file's bytes or a path to it; ``filename`` picks the
+    parser. Blocking; call it from a worker thread in async code.
+    """
+    started = time.perf_counter()
+    ext = os.path.splitext(filename)[1].lower()
+    with tracing.span("parse", **{"file.kind": ext.lstrip(".")}) as span:
+        if ext == ".pdf":
+            parsed = _extract_pdf(source, max_pages, max_chars)
+        elif ext in (".docx", ".doc"):
+            parsed = _extract_docx(source, max_chars)
+        elif ext == ".txt":
+            parsed = _extract_txt(source, max_chars)
+        else:
+            raise RuntimeError("Unsupported file type. Use PDF, DOCX, or TXT.")
+        span.set(pages=parsed["page_count"], pages_parsed=len(parsed["pages"]))
+
+    text = "\n".join(parsed["pages"])
+    if len(text) > max_chars:
+        text = text[:max_chars]
+        parsed["truncated"] = True
+
+    elapsed = time.perf_counter() - started
+    metrics.PARSE_DURATION.observe(elapsed, kind=ext.lstrip("."))
+    return {
+        "text": text,
+        "pages": parsed["pages"],
+        "page_count": parsed["page_count"],
+        "pages_parsed": len(parsed["pages"]),
+        "truncated": parsed["truncated"],
+        "parse_ms": round(elapsed * 1000, 2),
+    }
@@ -0,0 +1,301 @@
+"""Lightweight per-request tracing.
+
+Every HTTP request gets a request id (``X-Request-ID``, taken from the
+client when it sends a sane one) that is echoed on the response. When
+tracing is on, the request also becomes a trace: ``span(name)`` blocks
+opened anywhere below it (file parsing, graph nodes, LLM calls, pool
+acquires, SQL statements, bcrypt) are recorded as child spans. The current
+span lives in a ``ContextVar``, so it follows the request into
+``asyncio.to_thread``, FastAPI's sync handlers and LangGraph's node tasks
+without being passed around. Outside a sampled request ``span`` costs one
+ContextVar lookup.
+
+Finished traces are exported from a background thread in OTLP/JSON
+(``resourceSpans``), one trace per line to ``TRACE_FILE`` and/or POSTed to
+an OpenTelemetry collector at ``TRACE_OTLP_ENDPOINT``
+(``http://localhost:4318/v1/traces``). A W3C ``traceparent`` header joins
+the caller's trace.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from app import metrics
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0))
+# Only export traces at least this long (e.g. 1000 to keep just slow requests).
+TRACE_MIN_DURATION_MS = float(os.getenv("TRACE_MIN_DURATION_MS", 0))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", 2000))
+TRACE_QUEUE_MAX = int(os.getenv("TRACE_QUEUE_MAX", 1000))
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "constella-api")
+TRACE_ENABLED = bool(TRACE_FILE or TRACE_OTLP_ENDPOINT) and TRACE_SAMPLE_RATE > 0
+
+REQUEST_ID_HEADER = "x-request-id"
+_REQUEST_ID_OK = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+TRACES_EXPORTED = metrics.counter(
+    "traces_exported_total", "Traces handed to the exporter, by result.", ("result",)
+)
+
+
+class Trace:
+    """Spans of one request; finished spans are appended as they close."""
+
+    __slots__ = ("trace_id", "request_id", "spans", "dropped")
+
+    def __init__(self, trace_id: str, request_id: str):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+    def add(self, span: "Span") -> None:
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)  # list.append is atomic; spans close on many threads
+        else:
+            self.dropped += 1
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = 1  # INTERNAL; the request span is SERVER (2)
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    def set(self, **attributes) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def active() -> bool:
+    """True inside a sampled request; lets hot paths skip building span attributes."""
+    return _current.get() is not None
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator:
+    """Record ``name`` as a child of the current span (no-op outside a trace)."""
+    parent = _current.get()
+    if parent is None:
+        yield _NOOP
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.error = f"{type(exc).__name__}: {exc}"[:500]
+        raise
+    finally:
+        _current.reset(token)
+        child.end_ns = time.time_ns()
+        child.trace.add(child)
+
+
+# ----------------------
+# Export
+# ----------------------
+class _Exporter:
+    """Writes finished traces from a daemon thread so requests never wait on I/O."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=TRACE_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            TRACES_EXPORTED.inc(result="dropped")
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._export(batch)
+                TRACES_EXPORTED.inc(len(batch), result="ok")
+            except Exception as exc:
+                TRACES_EXPORTED.inc(len(batch), result="error")
+                print("⚠️ Trace export failed:", exc)
+
+    def _export(self, batch: List[Trace]) -> None:
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a", encoding="utf-8") as fh:
+                for trace in batch:
+                    fh.write(json.dumps(_otlp_payload([trace]), separators=(",", ":")) + "\n")
+        if TRACE_OTLP_ENDPOINT:
+            request = urllib.request.Request(
+                TRACE_OTLP_ENDPOINT,
+                data=json.dumps(_otlp_payload(batch)).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                response.read()
+
+
+def _otlp_payload(traces: List[Trace]) -> dict:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        _otlp_attribute("service.name", TRACE_SERVICE_NAME),
+                        _otlp_attribute("process.pid", os.getpid()),
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "app.tracing"},
+                        "spans": [s.to_otlp() for trace in traces for s in trace.spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+exporter = _Exporter()
+
+
+# ----------------------
+# ASGI middleware
+# ----------------------
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class TracingMiddleware:
+    """Assign the request id, and trace sampled requests from the outermost layer."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, REQUEST_ID_HEADER.encode())
+        if not request_id or not _REQUEST_ID_OK.match(request_id):
+            request_id = "%032x" % random.getrandbits(128)
+        id_token = _request_id.set(request_id)
+
+        root = None
+        span_token = None
+        if TRACE_ENABLED and random.random() < TRACE_SAMPLE_RATE:
+            parent = _TRACEPARENT.match(_header(scope, b"traceparent") or "")
+            trace = Trace(parent.group(1) if parent else "%032x" % random.getrandbits(128), request_id)
+            root = Span(trace, f"{scope.get('method', '')} {scope.get('path', '')}", None,
+                        {"http.method": scope.get("method", ""), "http.target": scope.get("path", ""),
+                         "request.id": request_id})
+            root.parent_id = parent.group(2) if parent else None
+            root.kind = 2
+            span_token = _current.set(root)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((REQUEST_ID_HEADER.encode(), request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            if root is not None:
+                root.error = f"{type(exc).__name__}: {exc}"[:500]
+            raise
+        finally:
+            _request_id.reset(id_token)
+            if root is not None:
+                _current.reset(span_token)
+                root.end_ns = time.time_ns()
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{scope.get('method', '')} {route}"
+                    root.attributes["http.route"] = route
+                root.attributes["http.status_code"] = status["code"]
+                if status["code"] >= 500 and not root.error:
+                    root.error = f"HTTP {status['code']}"
+                if root.trace.dropped:
+                    root.attributes["trace.dropped_spans"] = root.trace.dropped
+                root.trace.add(root)
+                if (root.end_ns - root.start_ns) / 1e6 >= TRACE_MIN_DURATION_MS:
+                    exporter.submit(root.trace)
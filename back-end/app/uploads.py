@@ -0,0 +1,244 @@
+"""Size-capped upload spooling.
+
+Uploads are copied in ``CV_UPLOAD_CHUNK_BYTES`` chunks into a private temp
+file while the SHA-256 is computed on the way, so an in-flight CV costs one
+chunk of memory no matter how large the file is. The first bytes decide
+the real file type (magic bytes beat the extension), and anything over
+``CV_UPLOAD_MAX_BYTES`` is rejected as soon as the limit is crossed.
+Parsers then read the temp file through ``mmap`` (see ``text_extraction``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO
+
+UPLOAD_MAX_BYTES = int(os.getenv("CV_UPLOAD_MAX_BYTES", 20 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = int(os.getenv("CV_UPLOAD_CHUNK_BYTES", 1024 * 1024))
+# Whole request bodies above this are refused before they are read (413).
+REQUEST_MAX_BYTES = int(os.getenv("CV_REQUEST_MAX_BYTES", 250 * 1024 * 1024))
+UPLOAD_SPOOL_DIR = os.getenv("CV_UPLOAD_SPOOL_DIR") or None  # None: system temp dir
+
+# Enough to see past a magic number and judge whether the start is text.
+_SNIFF_BYTES = 4096
+# Share of control bytes (other than whitespace) a legacy 8-bit text may have.
+_MAX_CONTROL_SHARE = 0.01
+_TEXT_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+_WHITESPACE_CONTROLS = frozenset(b"\t\n\v\f\r\x1a")  # \x1a: DOS end-of-file
+
+# Common binaries that should never be parsed as a text CV.
+_BINARY_MAGIC = (
+    b"\x89PNG",
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF87a",
+    b"GIF89a",
+    b"II*\x00",  # TIFF
+    b"MM\x00*",
+    b"\x1f\x8b",  # gzip
+    b"7z\xbc\xaf\x27\x1c",
+    b"Rar!\x1a\x07",
+    b"\x7fELF",
+)
+
+
+class UploadRejected(ValueError):
+    """The upload is too large or not a supported document."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_extension(head: bytes, filename: str) -> str:
+    """Return the parser extension for a file starting with ``head``."""
+    ext = os.path.splitext(filename)[1].lower()
+    if head.startswith(b"%PDF-"):
+        return ".pdf"
+    if head.startswith(b"PK\x03\x04"):
+        # DOCX is a zip; only the name tells a Word file from an archive of CVs.
+        return ".zip" if ext == ".zip" else ".docx"
+    if head.startswith(b"\xd0\xcf\x11\xe0"):
+        raise UploadRejected("Legacy .doc files are not supported; save the CV as DOCX or PDF.")
+    if not head:
+        raise UploadRejected("The uploaded file is empty.")
+    if ext in (".pdf", ".docx", ".doc", ".zip") or not _looks_like_text(head):
+        raise UploadRejected("Unsupported file type. Use PDF, DOCX, or TXT.")
+    return ".txt"
+
+
+def _looks_like_text(head: bytes) -> bool:
+    """Text with a UTF-8/UTF-16 BOM, UTF-8, or a Windows-1252/Latin-1 export.
+
+    A character cut off at the end of ``head`` is fine. Legacy 8-bit text
+    must decode as Windows-1252 and be nearly free of control bytes, which
+    random binary data is not.
+    """
+    if head.startswith(_BINARY_MAGIC):
+        return False
+    if head.startswith(_TEXT_BOMS):
+        encoding = "utf-8-sig" if head.startswith(codecs.BOM_UTF8) else "utf-16"
+        return _decodes(head, encoding)
+    if b"\x00" in head:
+        return False
+    if _decodes(head, "utf-8"):
+        return True
+    controls = sum(1 for byte in head if byte < 0x20 and byte not in _WHITESPACE_CONTROLS)
+    return controls <= len(head) * _MAX_CONTROL_SHARE and _decodes(head, "cp1252")
+
+
+def _decodes(head: bytes, encoding: str) -> bool:
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class SpooledUpload:
+    """An upload copied to a temp file. Use as a context manager or call ``close()``."""
+
+    def __init__(self, path: str, filename: str, extension: str, size: int, digest: str):
+        self.path = path
+        self.filename = filename
+        self.extension = extension
+        self.size = size
+        self.digest = digest
+
+    @property
+    def parse_name(self) -> str:
+        """``filename`` with the sniffed extension; what parsers and cache keys see."""
+        return os.path.splitext(self.filename)[0] + self.extension
+
+    def close(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def spool_stream(source: BinaryIO, filename: str, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    """Copy a readable binary stream into a temp file (blocking)."""
+    fd, path = tempfile.mkstemp(prefix="cv-upload-", dir=UPLOAD_SPOOL_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    extension = None
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(
+                        f"{filename}: file is larger than {max_bytes // (1024 * 1024)} MB.", 413
+                    )
+                if extension is None:
+                    head += chunk[: _SNIFF_BYTES - len(head)]
+                    if len(head) >= _SNIFF_BYTES:
+                        extension = sniff_extension(head, filename)  # reject early
+                digest.update(chunk)
+                out.write(chunk)
+        if extension is None:
+            extension = sniff_extension(head, filename)
+        return SpooledUpload(path, filename, extension, size, digest.hexdigest())
+    except BaseException:
+        os.unlink(path)
+        raise
+
+
+async def spool_upload(upload, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    """Stream a FastAPI ``UploadFile`` to a temp file in chunks, off the event loop."""
+    if not upload.filename:
+        raise UploadRejected("Missing filename.")
+    return await asyncio.to_thread(spool_stream, upload.file, upload.filename, max_bytes)
+
+
+def close_all(uploads) -> None:
+    for upload in uploads:
+        upload.close()
+
+
+# ----------------------
+# Request size guard
+# ----------------------
+class RequestSizeLimitMiddleware:
+    """Answer 413 before the body is read when a request is too large.
+
+    Uses Content-Length when present and counts chunked bodies as they
+    arrive; per-file limits are enforced later by ``spool_stream``.
+    """
+
+    def __init__(self, app, max_bytes: int = REQUEST_MAX_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    too_large = int(value) > self.max_bytes
+                except ValueError:
+                    too_large = False
+                if too_large:
+                    await self._reject(send)
+                    return
+
+        received = 0
+        exceeded = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadRejected("Request body too large.", 413)
+            return message
+
+        async def guarded_send(message):
+            nonlocal rejected
+            if not exceeded:
+                await send(message)
+            elif not rejected:
+                # FastAPI turns body errors into its own 400; answer 413 instead.
+                rejected = True
+                await self._reject(send)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadRejected:
+            if not rejected:
+                await self._reject(send)
+
+    async def _reject(self, send) -> None:
+        body = b'{"detail":"Request body too large."}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,143 @@
+"""Background extraction worker.
+
+Run a pool of worker processes next to (not inside) the API:
+
+    python -m app.worker --processes 4
+
+Each process claims jobs from the ``extraction_job`` table and runs the
+LangGraph pipeline, so extraction capacity scales independently of the
+uvicorn workers serving HTTP.
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+import time
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+# Longest sleep between retries while the queue database is failing.
+JOB_MAX_BACKOFF = float(os.getenv("JOB_MAX_BACKOFF", 60))
+# Requeue delay for a provider 429/503 that did not say how long to wait.
+JOB_THROTTLE_DELAY = float(os.getenv("JOB_THROTTLE_DELAY", 30))
+
+
+def _throttle_delay(exc: Exception):
+    """Seconds to wait before retrying a rate-limited job, or None if it was not throttled."""
+    from app.llm_limiter import LLMOverloaded, is_throttle, retry_after_of
+
+    if isinstance(exc, LLMOverloaded):
+        return max(1.0, exc.retry_after)
+    if is_throttle(exc):
+        return max(1.0, retry_after_of(exc) or JOB_THROTTLE_DELAY)
+    return None
+
+
+def _run_one(job: dict) -> None:
+    from app import jobs
+    from app.extractor_with_langgraph import extract_skills_from_bytes, extract_skills_from_upload
+    from app.uploads import UploadRejected
+
+    try:
+        if job["file_oid"] is None:
+            # Queued before uploads were stored as large objects.
+            result = extract_skills_from_bytes(
+                job["file_bytes"], job["filename"], use_cache=job["use_cache"]
+            )
+        else:
+            with jobs.open_upload(job) as upload:
+                result = extract_skills_from_upload(upload, use_cache=job["use_cache"])
+    except Exception as exc:
+        delay = _throttle_delay(exc)
+        if delay is not None:
+            # Checked before the RuntimeError branch: LLMOverloaded is one.
+            jobs.defer(job["job_id"], str(exc), delay)
+            print(f"⚠️ Job {job['job_id']} rate limited, retrying in {delay:.0f}s")
+        elif isinstance(exc, (RuntimeError, UploadRejected)):
+            # Unsupported or empty files will not get better on retry.
+            jobs.fail(job["job_id"], str(exc), job["max_attempts"], job["max_attempts"])
+            print(f"❌ Job {job['job_id']} failed: {exc}")
+        else:
+            status = jobs.fail(job["job_id"], str(exc), job["attempts"], job["max_attempts"])
+            print(f"⚠️ Job {job['job_id']} attempt {job['attempts']} failed ({status}): {exc}")
+        return
+
+    jobs.complete(job["job_id"], result)
+    print(f"✅ Job {job['job_id']} done")
+
+
+def worker_loop(stop_after_idle: float = 0) -> None:
+    """Claim and process jobs until interrupted (or idle for ``stop_after_idle`` s)."""
+    from app import jobs
+
+    stopping = False
+
+    def _stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+
+    idle_since = time.monotonic()
+    last_reap = 0.0
+    errors = 0
+    while not stopping:
+        try:
+            jobs.ensure_schema()
+            now = time.monotonic()
+            if now - last_reap > 60:
+                jobs.requeue_stale()
+                last_reap = now
+
+            job = jobs.claim_next()
+            if job is None:
+                errors = 0
+                if stop_after_idle and time.monotonic() - idle_since > stop_after_idle:
+                    return
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            _run_one(job)
+            errors = 0
+            idle_since = time.monotonic()
+        except Exception as exc:
+            # A DB outage must not kill the worker; a job left running is reclaimed
+            # by requeue_stale once the database is back.
+            errors += 1
+            delay = min(JOB_POLL_INTERVAL * 5 * 2 ** (errors - 1), JOB_MAX_BACKOFF)
+            print(f"❌ Worker loop error ({type(exc).__name__}): {exc}; retrying in {delay:.0f}s")
+            time.sleep(delay)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run CV extraction workers.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=int(os.getenv("JOB_WORKER_PROCESSES", 2)),
+        help="number of worker processes",
+    )
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        worker_loop()
+        return
+
+    # spawn: every worker opens its own DB pool and LLM client.
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=worker_loop, name=f"cv-worker-{i}") for i in range(args.processes)]
+    for proc in procs:
+        proc.start()
+    print(f"✅ Started {len(procs)} extraction worker(s)")
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Synthetic CV corpus (PDF / DOCX / TXT) for the benchmarks.
+
+Files are generated from a fixed seed so runs on different commits parse
+exactly the same bytes. The PDF writer is a minimal hand-rolled one (one
+Helvetica text stream per page) so no PDF library is needed beyond the
+pypdf the app already uses for reading.
+"""
+
+from __future__ import annotations
+
+import random
+from io import BytesIO
+from typing import Dict, List, Tuple
+
+VOCABULARY: Dict[str, List[str]] = {
+    "hard_skills": [
+        "Data Analysis", "Supply Chain Management", "System Design", "Web Development",
+        "Accounting", "Project Management", "Machine Learning", "Inventory Management",
+    ],
+    "soft_skills": ["Leadership", "Collaboration", "Communication", "Crisis Management"],
+    "tools_and_tech": [
+        "Python", "Java", "SQL", "Excel", "Odoo", "React", "Docker", "Kubernetes",
+        "AWS", "PostgreSQL", "FastAPI", "TensorFlow", "Git", "Tableau",
+    ],
+    "languages": ["English", "Arabic", "German", "French"],
+}
+
+_FILLER = (
+    "Delivered measurable results across cross-functional teams, owning roadmaps, "
+    "stakeholder reporting and day-to-day operations for regional accounts."
+)
+
+
+def _cv_lines(rng: random.Random, index: int, pages: int) -> List[List[str]]:
+    """Return one list of lines per page."""
+    tech = rng.sample(VOCABULARY["tools_and_tech"], 6)
+    hard = rng.sample(VOCABULARY["hard_skills"], 3)
+    soft = rng.sample(VOCABULARY["soft_skills"], 2)
+    langs = rng.sample(VOCABULARY["languages"], 2)
+
+    first = [
+        f"Candidate {index}",
+        f"candidate{index}@example.com",
+        "",
+        "Summary",
+        f"Engineer focused on {hard[0]} and {hard[1]}.",
+        "",
+        "Skills",
+        ", ".join(tech),
+        ", ".join(hard + soft),
+        "",
+        "Languages",
+        ", ".join(langs),
+        "",
+        "Experience",
+    ]
+    result = [first]
+    for page in range(pages):
+        lines = [] if page == 0 else [f"Experience (continued) - page {page + 1}"]
+        for job in range(6):
+            lines.append(f"Role {page * 6 + job + 1}: used {rng.choice(tech)} for {rng.choice(hard)}.")
+            lines.append(_FILLER)
+        if page == 0:
+            result[0].extend(lines)
+        else:
+            result.append(lines)
+    return result
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(pages: List[List[str]]) -> bytes:
+    """Write a minimal text-only PDF with one page per entry in ``pages``."""
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_id, lines in zip(page_ids, pages):
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 800 Td"]
+        for line in lines:
+            ops.append(f"({_pdf_escape(line[:110])}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", errors="replace")
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+            ).encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def build_docx(pages: List[List[str]]) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    for lines in pages:
+        for line in lines:
+            doc.add_paragraph(line)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def build_txt(pages: List[List[str]]) -> bytes:
+    return "\n\f\n".join("\n".join(lines) for lines in pages).encode()
+
+
+BUILDERS = {".pdf": build_pdf, ".docx": build_docx, ".txt": build_txt}
+
+
+def generate_corpus(size: int = 12, seed: int = 42, max_pages: int = 4) -> List[Tuple[str, bytes]]:
+    """``size`` CVs as ``(filename, bytes)``, rotating PDF/DOCX/TXT and 1..max_pages pages."""
+    rng = random.Random(seed)
+    exts = list(BUILDERS)
+    corpus = []
+    for index in range(size):
+        ext = exts[index % len(exts)]
+        pages = _cv_lines(rng, index, 1 + index % max_pages)
+        corpus.append((f"cv_{index:03d}{ext}", BUILDERS[ext](pages)))
+    return corpus
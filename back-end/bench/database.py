@@ -0,0 +1,79 @@
+"""Database setup for benchmark runs.
+
+Uses ``--database-url`` / ``BENCH_DATABASE_URL`` when given. Otherwise a
+throwaway Postgres is started with ``pgserver`` (pip-installable, bundles
+the server binaries) under ``bench/.pgdata``. Never point this at a shared
+database: benchmark users are created and deleted by email prefix.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+import psycopg2
+
+PGDATA_DIR = Path(__file__).resolve().parent / ".pgdata"
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS employee (
+    id VARCHAR(20) PRIMARY KEY,
+    name VARCHAR(50) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skill (
+    skill_id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS employee_skill (
+    emp_id VARCHAR(20) NOT NULL REFERENCES employee (id) ON DELETE CASCADE,
+    skill_id INTEGER NOT NULL REFERENCES skill (skill_id) ON DELETE CASCADE,
+    PRIMARY KEY (emp_id, skill_id)
+);
+"""
+
+
+def resolve_database_url(explicit: Optional[str] = None) -> str:
+    url = explicit or os.getenv("BENCH_DATABASE_URL")
+    if url:
+        return url
+    try:
+        import pgserver
+    except ImportError as exc:
+        raise SystemExit(
+            "❌ No database: pass --database-url (or BENCH_DATABASE_URL), "
+            "or `pip install pgserver` for a throwaway local Postgres."
+        ) from exc
+    server = pgserver.get_server(str(PGDATA_DIR), cleanup_mode=None)
+    return server.get_uri()
+
+
+def prepare(url: str) -> None:
+    """Create the app tables if they are missing."""
+    conn = psycopg2.connect(url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def cleanup(url: str, email_prefix: str) -> int:
+    """Delete the users (and their skill links) created by one run."""
+    conn = psycopg2.connect(url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM employee_skill WHERE emp_id IN "
+                "(SELECT id FROM employee WHERE email LIKE %s)",
+                (email_prefix + "%",),
+            )
+            cur.execute("DELETE FROM employee WHERE email LIKE %s", (email_prefix + "%",))
+            deleted = cur.rowcount
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
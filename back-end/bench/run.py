@@ -0,0 +1,306 @@
+"""Load-test the API in-process with a stub LLM.
+
+Run from ``back-end/``::
+
+    python -m bench.run                                   # all scenarios, defaults
+    python -m bench.run --scenarios extract --concurrency 32 --llm-latency-ms 800
+    python -m bench.run --out bench/results/$(git rev-parse --short HEAD).json
+    python -m bench.run --compare bench/results/<baseline>.json
+
+Requests go through ``httpx.ASGITransport`` straight into the FastAPI app
+(lifespan included), so the numbers cover routing, auth, bcrypt, parsing,
+the graph and the DB pool, but not uvicorn or the network. ``make_llm`` is
+replaced with :class:`bench.stub_llm.StubChatModel`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+SCENARIOS = ("signup", "login", "extract", "save-skills")
+PASSWORD = "bench-password"
+
+
+# ----------------------
+# Stats
+# ----------------------
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank: the smallest value with at least pct% of samples at or below it.
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], wall: float) -> dict:
+    values = sorted(latencies)
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "requests": len(values),
+        "errors": len(values) - ok,
+        "statuses": statuses,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+async def drive(total: int, concurrency: int, send: Callable[[int], Awaitable[int]]) -> dict:
+    """Call ``send(i)`` for i in range(total) with ``concurrency`` requests in flight."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = itertools.count()
+
+    async def worker():
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            started = time.perf_counter()
+            try:
+                status = str(await send(i))
+            except Exception as exc:
+                status = type(exc).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+# ----------------------
+# Scenarios
+# ----------------------
+class Bench:
+    def __init__(self, client, args, corpus, email_prefix):
+        self.client = client
+        self.args = args
+        self.corpus = corpus
+        self.email_prefix = email_prefix
+        self.users: List[dict] = []  # {"email", "token"}
+
+    def _email(self, i: int) -> str:
+        return f"{self.email_prefix}{i}@example.com"
+
+    async def _signup(self, i: int) -> int:
+        email = self._email(i)
+        r = await self.client.post(
+            "/auth/signup", json={"name": f"Bench {i}", "email": email, "password": PASSWORD}
+        )
+        if r.status_code == 200:
+            self.users.append({"email": email, "token": r.json()["token"]})
+        return r.status_code
+
+    async def ensure_users(self, count: int) -> None:
+        missing = count - len(self.users)
+        if missing > 0:
+            offset = len(self.users) + 1_000_000  # distinct from the signup scenario's emails
+            await drive(missing, self.args.concurrency, lambda i: self._signup(offset + i))
+        if not self.users:
+            raise SystemExit("❌ Could not create benchmark users (is the database reachable?)")
+
+    def _user(self, i: int) -> dict:
+        return self.users[i % len(self.users)]
+
+    def _auth(self, i: int) -> dict:
+        return {"Authorization": f"Bearer {self._user(i)['token']}"}
+
+    async def signup(self) -> dict:
+        return await drive(self.args.requests, self.args.concurrency, self._signup)
+
+    async def login(self) -> dict:
+        await self.ensure_users(self.args.concurrency)
+
+        async def send(i):
+            r = await self.client.post(
+                "/auth/login", json={"email": self._user(i)["email"], "password": PASSWORD}
+            )
+            return r.status_code
+
+        return await drive(self.args.requests, self.args.concurrency, send)
+
+    async def extract(self) -> dict:
+        await self.ensure_users(1)
+
+        async def send(i):
+            filename, data = self.corpus[i % len(self.corpus)]
+            r = await self.client.post(
+                "/cv/extract",
+                params={"mode": self.args.mode},
+                files={"file": (filename, data)},
+                headers=self._auth(i),
+            )
+            return r.status_code
+
+        return await drive(self.args.requests, self.args.concurrency, send)
+
+    async def save_skills(self) -> dict:
+        await self.ensure_users(self.args.concurrency)
+        from bench.corpus import VOCABULARY
+
+        names = [name for words in VOCABULARY.values() for name in words]
+
+        async def send(i):
+            # Overlapping sets so both new links and already-linked skills are exercised.
+            skills = [names[(i * 3 + k) % len(names)] for k in range(8)]
+            r = await self.client.post(
+                "/cv/save-skills", json={"skills": skills}, headers=self._auth(i)
+            )
+            return r.status_code
+
+        return await drive(self.args.requests, self.args.concurrency, send)
+
+
+# ----------------------
+# Reporting
+# ----------------------
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_report(report: dict, baseline: Optional[dict] = None) -> None:
+    header = f"{'scenario':<12} {'reqs':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in report["results"].items():
+        print(
+            f"{name:<12} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>9} "
+            f"{r['p50_ms']:>9} {r['p90_ms']:>9} {r['p99_ms']:>9} {r['max_ms']:>9}"
+        )
+        if r["errors"]:
+            print(f"{'':<12} statuses: {r['statuses']}")
+        base = (baseline or {}).get("results", {}).get(name)
+        if base:
+            deltas = []
+            for key in ("throughput_rps", "p50_ms", "p99_ms"):
+                if base[key]:
+                    deltas.append(f"{key} {100 * (r[key] - base[key]) / base[key]:+.1f}%")
+            print(f"{'':<12} vs {baseline.get('commit') or 'baseline'}: " + ", ".join(deltas))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline API benchmark with a stub LLM.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--provider-rpm", type=float, default=0,
+                        help="make the stub answer 429 above this many calls per minute (0 = unlimited)")
+    parser.add_argument("--llm-rpm", type=float, default=0,
+                        help="client-side limiter GROQ_RPM (0 = off, the benchmark default)")
+    parser.add_argument("--llm-tpm", type=float, default=0, help="client-side limiter GROQ_TPM (0 = off)")
+    parser.add_argument("--mode", default="full", help="graph mode for /cv/extract")
+    parser.add_argument("--corpus-size", type=int, default=12)
+    parser.add_argument("--database-url", help="defaults to BENCH_DATABASE_URL, then pgserver")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="leave the CV result cache on (off by default so every extract runs the graph)")
+    parser.add_argument("--keep-data", action="store_true", help="do not delete benchmark users")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to diff against")
+    args = parser.parse_args(argv)
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+async def run(args) -> dict:
+    from bench import database
+
+    database_url = database.resolve_database_url(args.database_url)
+    database.prepare(database_url)
+
+    # The app reads its settings at import time.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    os.environ.setdefault("GROQ_API_KEY", "bench-unused")
+    os.environ["GROQ_RPM"] = str(args.llm_rpm)
+    os.environ["GROQ_TPM"] = str(args.llm_tpm)
+    if not args.with_cache:
+        os.environ["CV_CACHE_ENABLED"] = "0"
+
+    import httpx
+
+    from app import extractor_with_langgraph
+    from app.main import app
+    from bench.corpus import generate_corpus
+    from bench.stub_llm import StubChatModel
+
+    stub = StubChatModel(args.llm_latency_ms, args.llm_jitter_ms, provider_rpm=args.provider_rpm)
+    extractor_with_langgraph.make_llm = lambda *_, **__: stub
+    extractor_with_langgraph._llms.clear()
+
+    corpus = generate_corpus(args.corpus_size)
+    email_prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    results = {}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            bench = Bench(client, args, corpus, email_prefix)
+            for name in args.scenarios:
+                print(f"▶ {name} ({args.requests} requests, concurrency {args.concurrency})")
+                results[name] = await getattr(bench, name.replace("-", "_"))()
+
+    if not args.keep_data:
+        database.cleanup(database_url, email_prefix)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "settings": {
+            key: getattr(args, key)
+            for key in (
+                "requests", "concurrency", "llm_latency_ms", "llm_jitter_ms", "provider_rpm",
+                "llm_rpm", "llm_tpm", "mode", "corpus_size", "with_cache",
+            )
+        },
+        "llm_calls": stub.calls,
+        "llm_throttled": stub.throttled,
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    report = asyncio.run(run(args))
+    print()
+    print(f"LLM calls: {report['llm_calls']} ok, {report['llm_throttled']} throttled by the stub provider")
+    print_report(report, baseline)
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, indent=2))
+        print(f"✅ Report written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Deterministic stand-in for ChatGroq.
+
+Only ``with_structured_output`` is used by the extractor, so that is all
+the stub implements. Answers are built from the vocabulary words found in
+the prompt, and each call sleeps for a configurable latency so graph
+overhead, concurrency limits and the event loop can be measured without
+a Groq key or network. With ``provider_rpm`` set, the stub also behaves
+like a rate-limited provider: calls above the rate fail with a 429 that
+carries a ``retry-after`` header.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from bench.corpus import VOCABULARY
+
+
+def _prompt_text(value) -> str:
+    if hasattr(value, "to_string"):
+        return value.to_string()
+    return str(value)
+
+
+def _answer(schema, text: str) -> dict:
+    lowered = text.lower()
+    found = {
+        category: [word for word in words if word.lower() in lowered]
+        for category, words in VOCABULARY.items()
+    }
+    answer = {}
+    for field in schema.model_fields:
+        # "core_tools_and_tech" -> "tools_and_tech"
+        category = field[len("core_"):] if field.startswith("core_") else field
+        answer[field] = found.get(category, [])
+    return answer
+
+
+class _Response:
+    def __init__(self, status_code: int, headers: dict):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class StubRateLimitError(Exception):
+    """Shaped like ``groq.RateLimitError``: ``status_code`` and ``response.headers``."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit reached, retry in {retry_after:.2f}s")
+        self.status_code = 429
+        self.response = _Response(429, {"retry-after": f"{retry_after:.3f}"})
+
+
+class StubChatModel:
+    """Chat model stub with ``latency_ms`` (+ up to ``jitter_ms``) per call."""
+
+    model_name = "bench-stub"
+
+    def __init__(
+        self, latency_ms: float = 200, jitter_ms: float = 50, seed: int = 7, provider_rpm: float = 0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.provider_rpm = provider_rpm
+        self.calls = 0
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # provider-side bucket with one second of burst
+        self._allowance = provider_rpm / 60
+        self._updated = time.monotonic()
+
+    def _admit(self) -> None:
+        if not self.provider_rpm:
+            return
+        rate = self.provider_rpm / 60
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(max(rate, 1.0), self._allowance + (now - self._updated) * rate)
+            self._updated = now
+            if self._allowance < 1:
+                self.throttled += 1
+                raise StubRateLimitError((1 - self._allowance) / rate)
+            self._allowance -= 1
+
+    def _delay(self) -> float:
+        self._admit()
+        with self._lock:
+            self.calls += 1
+            jitter = self._rng.random() * self.jitter_ms
+        return (self.latency_ms + jitter) / 1000
+
+    def _respond(self, schema, prompt_value, include_raw: bool):
+        text = _prompt_text(prompt_value)
+        parsed = schema(**_answer(schema, text))
+        if not include_raw:
+            return parsed
+        raw = AIMessage(
+            content="",
+            usage_metadata={
+                "input_tokens": len(text) // 4,
+                "output_tokens": len(json.dumps(parsed.model_dump())) // 4,
+                "total_tokens": len(text) // 4 + len(json.dumps(parsed.model_dump())) // 4,
+            },
+        )
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    def with_structured_output(self, schema, include_raw: bool = False, **_):
+        def invoke(prompt_value):
+            time.sleep(self._delay())
+            return self._respond(schema, prompt_value, include_raw)
+
+        async def ainvoke(prompt_value):
+            await asyncio.sleep(self._delay())
+            return self._respond(schema, prompt_value, include_raw)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
@@ -0,0 +1,55 @@
+"""Shared fixtures.
+
+Database tests run against ``TEST_DATABASE_URL`` (never ``DATABASE_URL``) in
+a throwaway schema that is dropped afterwards; they are skipped when it is
+not set. A local server is one ``pip install pgserver`` away::
+
+    TEST_DATABASE_URL=$(python -c "import pgserver; print(pgserver.get_server('/tmp/pgdata').get_uri())")
+"""
+
+import os
+import uuid
+
+import psycopg2
+import pytest
+
+from app import db
+from bench.database import SCHEMA_SQL
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def pg_schema():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    schema = f"pytest_{uuid.uuid4().hex[:12]}"
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {schema}")
+            cur.execute(f"SET search_path TO {schema}")
+            cur.execute(SCHEMA_SQL)
+        conn.commit()
+        yield schema
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+@pytest.fixture
+def pg(pg_schema, monkeypatch):
+    """Point ``app.db`` at the test schema; yields a direct connection for assertions."""
+    pool = db.ConnectionPool(
+        TEST_DATABASE_URL, minconn=0, maxconn=5, options=f"-c search_path={pg_schema}"
+    )
+    monkeypatch.setattr(db, "conn_pool", pool)
+    conn = psycopg2.connect(TEST_DATABASE_URL, options=f"-c search_path={pg_schema}")
+    conn.autocommit = True
+    try:
+        yield conn
+    finally:
+        conn.close()
+        pool.closeall()
@@ -0,0 +1,71 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.routes import auth
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    auth.shutdown_executor()
+    yield
+    auth.shutdown_executor()
+
+
+def test_auth_queries_do_not_wait_behind_the_default_executor():
+    def whoami():
+        return threading.current_thread().name, request_id.get()
+
+    async def run():
+        request_id.set("req-1")
+        # Saturate the default executor with slow work (e.g. a big CV batch).
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        blockers = [asyncio.create_task(asyncio.to_thread(time.sleep, 0.5)) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        result = await auth._run_db(whoami)
+        elapsed = time.monotonic() - started
+        for task in blockers:
+            task.cancel()
+        return result, elapsed
+
+    (thread_name, seen_id), elapsed = asyncio.run(run())
+    assert thread_name.startswith("auth-db")
+    assert seen_id == "req-1"  # trace context follows the query
+    assert elapsed < 0.3
+
+
+class _BrokenCursor:
+    closed = False
+
+    def execute(self, *args):
+        raise RuntimeError("server closed the connection unexpectedly")
+
+    def close(self):
+        self.closed = True
+
+
+class _Conn:
+    def __init__(self):
+        self.cur = _BrokenCursor()
+
+    def cursor(self):
+        return self.cur
+
+
+def test_fetch_login_row_releases_the_connection_on_error(monkeypatch):
+    conn = _Conn()
+    released = []
+    monkeypatch.setattr(auth, "get_connection", lambda: conn)
+    monkeypatch.setattr(auth, "release_connection", released.append)
+
+    with pytest.raises(RuntimeError):
+        auth._fetch_login_row("ann@example.com")
+    assert released == [conn]
+    assert conn.cur.closed
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app import auth_guard
+from app.auth_guard import TokenCache
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache(max_entries=100)
+    monkeypatch.setattr(auth_guard, "token_cache", cache)
+    monkeypatch.setattr(auth_guard, "JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth_guard, "JWT_ALGORITHM", "HS256")
+    return cache
+
+
+def _token(sub="u1", email="ann@example.com", ttl=3600, secret=SECRET, **claims):
+    payload = {"sub": sub, "email": email, "iat": int(time.time()), **claims}
+    if ttl is not None:
+        payload["exp"] = int(time.time()) + ttl
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def _verify(token):
+    return auth_guard.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+
+def test_valid_token_is_cached_and_served(cache):
+    token = _token()
+    assert auth_guard.get_current_user(_verify(token)) == {"id": "u1", "email": "ann@example.com"}
+    _verify(token)
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_entry_stops_being_served_at_exp(cache, monkeypatch):
+    now = time.time()
+    cache.put("t", {"sub": "u1", "exp": now + 60})
+    monkeypatch.setattr(auth_guard.time, "time", lambda: now + 59)
+    assert cache.get("t") is not None
+    monkeypatch.setattr(auth_guard.time, "time", lambda: now + 60)
+    assert cache.get("t") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_tokens_without_exp_are_not_cached(cache):
+    _verify(_token(ttl=None))
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        _token(secret="someone-else"),
+        _token(ttl=-10),
+        "not.a.jwt",
+    ],
+    ids=["bad-signature", "expired", "garbage"],
+)
+def test_invalid_token_is_rejected_and_never_cached(cache, token):
+    with pytest.raises(HTTPException) as info:
+        _verify(token)
+    assert info.value.status_code == 401
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_subject_drops_every_token_of_that_user(cache):
+    first, second, other = _token(jti="1"), _token(jti="2"), _token(sub="u2", jti="3")
+    for token in (first, second, other):
+        _verify(token)
+
+    assert cache.invalidate_subject("u1") == 2
+    assert cache.get(first) is None and cache.get(second) is None
+    assert cache.get(other) is not None
+
+    cache.invalidate(other)
+    assert cache.stats()["size"] == 0
+
+
+def test_revoked_or_changed_user_is_not_served_from_cache(cache):
+    revoked = set()
+    emails = {"u1": "ann@example.com", "u2": "bob@example.com"}
+    cache.revocation_checks.append(lambda p: p["sub"] in revoked)
+    cache.revocation_checks.append(lambda p: emails.get(p["sub"]) != p["email"])
+    ann, bob = _token(), _token(sub="u2", email="bob@example.com")
+    _verify(ann)
+    _verify(bob)
+
+    revoked.add("u1")
+    emails["u2"] = "robert@example.com"
+    for token in (ann, bob):
+        with pytest.raises(HTTPException) as info:
+            _verify(token)
+        assert info.value.status_code == 401
+    assert cache.stats()["size"] == 0  # evicted, not just refused
+
+
+def test_lru_bound_evicts_the_least_recently_used(cache):
+    cache.max_entries = 2
+    exp = time.time() + 60
+    cache.put("a", {"sub": "a", "exp": exp})
+    cache.put("b", {"sub": "b", "exp": exp})
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", {"sub": "c", "exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["size"] == 2
+
+
+def test_cached_payload_cannot_be_mutated_by_callers(cache):
+    token = _token()
+    _verify(token)["sub"] = "admin"
+    assert _verify(token)["sub"] == "u1"
@@ -0,0 +1,77 @@
+import asyncio
+import io
+import os
+import threading
+import time
+import zipfile
+
+import pytest
+
+from app import extractor_with_langgraph as extractor
+from app.uploads import close_all
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_expand_zip_reports_bad_members():
+    archive = _zip(
+        {
+            "alice.txt": b"Alice\nPython",
+            "bob.pdf": b"%PDF-1.7 bob",
+            "fake.pdf": b"not really a pdf",
+            "photo.txt": b"\x89PNG\r\n\x1a\n\x00\x00",
+            "empty.txt": b"",
+            "notes.md": b"ignored: unsupported extension",
+            "__MACOSX/._alice.txt": b"\x00\x05",
+            "docs/": b"",
+        }
+    )
+    entries, errors = extractor._expand_zip(archive, "cvs.zip")
+    try:
+        assert [e.filename for e in entries] == ["cvs.zip/alice.txt", "cvs.zip/bob.pdf"]
+        assert [e.extension for e in entries] == [".txt", ".pdf"]
+        assert all(os.path.exists(e.path) for e in entries)
+        assert [e["filename"] for e in errors] == ["cvs.zip/fake.pdf", "cvs.zip/photo.txt", "cvs.zip/empty.txt"]
+        assert all(e["ok"] is False and e["error"] for e in errors)
+    finally:
+        close_all(entries)
+
+
+def test_expand_zip_refuses_oversized_archives(monkeypatch):
+    monkeypatch.setattr(extractor, "ZIP_MAX_UNCOMPRESSED", 10)
+    with pytest.raises(RuntimeError, match="allowed size"):
+        extractor._expand_zip(_zip({"a.txt": b"x" * 8, "b.txt": b"y" * 8}), "cvs.zip")
+
+
+def test_expand_zip_rejects_corrupt_archive():
+    with pytest.raises(zipfile.BadZipFile):
+        extractor._expand_zip(b"PK\x03\x04 truncated", "cvs.zip")
+
+
+def test_batch_parses_a_bounded_number_of_files_at_once(monkeypatch):
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def parse(source, filename):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        raise RuntimeError("unreadable")
+
+    monkeypatch.setattr(extractor, "result_cache", None)
+    monkeypatch.setattr(extractor, "_parse_and_preprocess", parse)
+    files = [(f"CV {i}".encode(), f"cv{i}.txt") for i in range(12)]
+
+    results = asyncio.run(extractor.aextract_batch(files, use_cache=False, parse_concurrency=2))
+
+    assert [r["error"] for r in results] == ["unreadable"] * 12
+    assert running["max"] == 2
@@ -0,0 +1,66 @@
+import asyncio
+import io
+import os
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.routes import cv
+
+
+@pytest.fixture
+def spooled(monkeypatch):
+    """Capture the temp file each request spools."""
+    uploads = []
+    spool = cv._spool
+
+    async def capture(file):
+        upload = await spool(file)
+        uploads.append(upload)
+        return upload
+
+    monkeypatch.setattr(cv, "_spool", capture)
+    return uploads
+
+
+def _request():
+    upload = UploadFile(file=io.BytesIO(b"Jane Doe\nPython, SQL\n"), filename="cv.txt")
+    return cv.extract_cv_stream(file=upload, no_cache=False, mode="full", user={"id": "e1"})
+
+
+def test_upload_is_removed_when_the_body_is_never_read(spooled):
+    async def run():
+        response = await _request()
+        assert os.path.exists(spooled[0].path)
+        # The client disconnected before the first event: only the background task runs.
+        await response.background()
+
+    asyncio.run(run())
+    assert not os.path.exists(spooled[0].path)
+
+
+def test_upload_is_removed_when_building_the_response_fails(spooled, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(cv, "StreamingResponse", broken)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_request())
+    assert not os.path.exists(spooled[0].path)
+
+
+def test_upload_is_removed_after_streaming(spooled, monkeypatch):
+    async def stream(upload, use_cache, mode):
+        yield "done", {"summary": {"core_languages": ["Python"]}}
+
+    monkeypatch.setattr(cv, "astream_skills_from_upload", stream)
+
+    async def run():
+        response = await _request()
+        body = [chunk async for chunk in response.body_iterator]
+        await response.background()
+        return body
+
+    body = asyncio.run(run())
+    assert body[0].startswith("event: done") and '"skills": ["Python"]' in body[0]
+    assert not os.path.exists(spooled[0].path)
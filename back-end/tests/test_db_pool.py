@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from app.db import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def make_pool(pg_schema):
+    pools = []
+
+    def make(**kwargs):
+        options = {"minconn": 0, "maxconn": 1, "timeout": 5, "max_waiting": 5}
+        options.update(kwargs)
+        pool = ConnectionPool(os.environ["TEST_DATABASE_URL"], **options)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.closeall()
+
+
+def _wait_for(pool, waiting):
+    deadline = time.monotonic() + 5
+    while pool.stats()["waiting"] != waiting:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_getconn_times_out_while_the_pool_is_full(make_pool):
+    pool = make_pool()
+    held = pool.getconn()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout, match="within 0.1s"):
+        pool.getconn(timeout=0.1)
+    assert 0.1 <= time.monotonic() - started < 1
+
+    stats = pool.stats()
+    assert (stats["waits"], stats["timeouts"], stats["in_use"], stats["waiting"]) == (1, 1, 1, 0)
+    pool.putconn(held)
+
+
+def test_waiter_gets_the_returned_connection(make_pool):
+    pool = make_pool()
+    held = pool.getconn()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+    waiter.start()
+    _wait_for(pool, 1)
+
+    pool.putconn(held)
+    waiter.join(5)
+    assert got == [held]
+    stats = pool.stats()
+    assert (stats["waits"], stats["timeouts"], stats["created"]) == (1, 0, 1)
+    assert stats["wait_time_max"] > 0
+    pool.putconn(got[0])
+
+
+def test_full_wait_queue_rejects_immediately(make_pool):
+    pool = make_pool(max_waiting=1)
+    held = pool.getconn()
+    waiter = threading.Thread(target=lambda: pool.putconn(pool.getconn()))
+    waiter.start()
+    _wait_for(pool, 1)
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout, match="Too many requests"):
+        pool.getconn()
+    assert time.monotonic() - started < 0.5
+    assert pool.stats()["rejected"] == 1
+
+    pool.putconn(held)
+    waiter.join(5)
+    assert pool.stats()["in_use"] == 0
+
+
+def test_broken_idle_connection_is_replaced(make_pool):
+    pool = make_pool(validate_idle=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.close()  # e.g. the server dropped it while idle
+
+    fresh = pool.getconn()
+    assert fresh is not conn and not fresh.closed
+    stats = pool.stats()
+    assert (stats["broken"], stats["created"], stats["size"]) == (1, 2, 1)
+    pool.putconn(fresh)
+
+
+def test_open_transaction_is_rolled_back_on_return(make_pool):
+    pool = make_pool()
+    conn = pool.getconn()
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+    pool.putconn(conn)
+    again = pool.getconn()
+    assert again is conn
+    assert again.get_transaction_status() == extensions.TRANSACTION_STATUS_IDLE
+    pool.putconn(again)
+
+
+def test_closed_pool_refuses_connections(make_pool):
+    pool = make_pool()
+    pool.putconn(pool.getconn())
+    pool.closeall()
+    with pytest.raises(PoolTimeout, match="closed"):
+        pool.getconn()
+    assert pool.stats()["size"] == 0
@@ -0,0 +1,115 @@
+import os
+import time
+
+import pytest
+
+from app import extraction_cache, llm_routing
+from app import extractor_with_langgraph as extractor
+from app.extraction_cache import ExtractionCache, content_hash, make_key
+
+RESULT = {"summary": {"Programming Languages": ["Python"]}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(max_entries=2, ttl_seconds=60, directory=tmp_path, disk_max_entries=3)
+
+
+def _clock(monkeypatch, offset):
+    now = time.time() + offset
+    monkeypatch.setattr(extraction_cache.time, "time", lambda: now)
+
+
+def test_key_changes_with_everything_that_changes_the_output(monkeypatch):
+    digest = content_hash(b"Jane Doe\nPython")
+    base = extractor._cache_key(digest, "cv.pdf", "full")
+
+    assert extractor._cache_key(digest, "other-name.PDF", "full") == base  # only the extension counts
+    assert extractor._cache_key(digest, "cv.docx", "full") != base
+    assert extractor._cache_key(content_hash(b"John Roe"), "cv.pdf", "full") != base
+    assert extractor._cache_key(digest, "cv.pdf", "single") != base
+
+    monkeypatch.setattr(extractor, "PROMPT_VERSION", extractor.PROMPT_VERSION + "-next")
+    assert extractor._cache_key(digest, "cv.pdf", "full") != base
+    monkeypatch.undo()
+
+    monkeypatch.setitem(llm_routing.ROUTES, "extract", ["some-other-model"])
+    assert extractor._cache_key(digest, "cv.pdf", "full") != base
+
+
+def test_make_key_is_stable():
+    assert make_key("abc", "cv.pdf", "m", "1") == make_key("abc", "x.pdf", "m", "1")
+    assert make_key("abc", "cv.pdf", "m", "1") != make_key("abc", "cv.pdf", "m", "2")
+
+
+def test_hits_are_copies(cache):
+    cache.set("k1", RESULT)
+    hit = cache.get("k1")
+    hit["summary"]["Programming Languages"].append("Go")
+    assert cache.get("k1") == RESULT
+
+
+def test_entries_expire_in_both_tiers(cache, monkeypatch):
+    cache.set("k1", RESULT)
+    path = cache._path("k1")
+    assert path.exists()
+
+    _clock(monkeypatch, 59)
+    assert cache.get("k1") == RESULT
+    _clock(monkeypatch, 61)
+    assert cache.get_memory("k1") is None
+    assert cache.get("k1") is None
+    assert not path.exists()  # expired file removed on read
+
+
+def test_memory_lru_evicts_and_disk_hits_are_promoted(cache):
+    for key in ("k1", "k2", "k3"):
+        cache.set(key, {**RESULT, "key": key})
+    assert cache.get_memory("k1") is None  # evicted, oldest
+    assert cache.get_memory("k3") is not None
+
+    assert cache.get("k1")["key"] == "k1"  # from disk...
+    assert cache.get_memory("k1")["key"] == "k1"  # ...and back in memory
+    assert cache.get_memory("k2") is None  # which pushed out the next oldest
+
+
+def test_prune_drops_expired_then_oldest_files(cache):
+    old = time.time() - 3600
+    for i in range(6):
+        cache.set(f"k{i}", RESULT)
+        os.utime(cache._path(f"k{i}"), (old + i, old + i))  # k0 oldest
+    os.utime(cache._path("k5"), None)
+    os.utime(cache._path("k4"), None)
+    os.utime(cache._path("k3"), (time.time() - 30, time.time() - 30))
+
+    # k0..k2 are past the TTL; k3..k5 fit the cap of three.
+    assert cache.prune() == 3
+    assert sorted(p.stem for p in cache.directory.glob("*/*.json")) == ["k3", "k4", "k5"]
+
+    cache.disk_max_entries = 1
+    assert cache.prune() == 2
+    assert [p.stem for p in cache.directory.glob("*/*.json")] == ["k5"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b'{"expires_at": 1e12, "val', b"\xff\xfe not utf-8", b"[1, 2]", b'{"expires_at": "soon"}', b'{"expires_at": 1e12, "value": [1]}'],
+    ids=["empty", "truncated", "binary", "list", "bad-expiry", "bad-value"],
+)
+def test_corrupt_file_is_a_miss(cache, content):
+    path = cache._path("k1")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(content)
+    assert cache.get("k1") is None
+
+    cache.set("k1", RESULT)  # and it is simply overwritten
+    cache.clear()
+    assert cache.get("k1") == RESULT
+
+
+def test_memory_only_cache(monkeypatch):
+    cache = ExtractionCache(max_entries=1, ttl_seconds=60, directory=None)
+    cache.set("k1", RESULT)
+    cache.set("k2", RESULT)
+    assert cache.get("k1") is None and cache.get("k2") == RESULT
+    assert cache.prune() == 0
@@ -0,0 +1,134 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app import extractor_with_langgraph as extractor
+from app import graph_checkpoints
+from bench.stub_llm import StubChatModel
+
+CV = b"Jane Doe\nSkills: Python, Docker, Kubernetes, SQL\nExperience: built APIs in Python.\n"
+
+
+@pytest.fixture
+def sqlite_checkpoints(tmp_path, monkeypatch):
+    path = tmp_path / "checkpoints.sqlite"
+    monkeypatch.setattr(graph_checkpoints, "CV_CHECKPOINT_PATH", str(path))
+    monkeypatch.setattr(graph_checkpoints, "_backend", "sqlite")
+    monkeypatch.setattr(graph_checkpoints, "_active", set())
+    monkeypatch.setattr(graph_checkpoints, "_pending", type(graph_checkpoints._pending)())
+    monkeypatch.setattr(extractor, "result_cache", None)
+    monkeypatch.setattr(extractor.skill_canonicalizer, "refresh_from_db", lambda *a, **k: 0)
+    monkeypatch.setattr(extractor.skill_matcher, "refresh_from_db", lambda *a, **k: 0)
+    monkeypatch.setattr(extractor, "make_llm", lambda *a, **k: StubChatModel(latency_ms=20, jitter_ms=0))
+    extractor._llms.clear()
+    yield path
+    extractor._llms.clear()
+
+
+def _leases(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT thread_id, owner FROM cv_run_lease").fetchall()
+    except sqlite3.OperationalError:  # no lease taken yet
+        return []
+    finally:
+        conn.close()
+
+
+async def _with_saver(body):
+    try:
+        return await body(graph_checkpoints.get_saver())
+    finally:
+        await graph_checkpoints.aclose()
+
+
+def test_claim_is_exclusive_across_processes(sqlite_checkpoints, monkeypatch):
+    async def body(saver):
+        assert await graph_checkpoints.claim(saver, "cv-1")
+        assert not await graph_checkpoints.claim(saver, "cv-1")  # same process
+
+        # Another process: its own owner id and in-flight set, same database.
+        monkeypatch.setattr(graph_checkpoints, "_OWNER", "other-process")
+        monkeypatch.setattr(graph_checkpoints, "_active", set())
+        assert not await graph_checkpoints.claim(saver, "cv-1")
+        assert await graph_checkpoints.claim(saver, "cv-2")
+
+        # A lease whose process died expires.
+        await saver.conn.execute("UPDATE cv_run_lease SET expires_at = 0 WHERE thread_id = 'cv-1'")
+        await saver.conn.commit()
+        monkeypatch.setattr(graph_checkpoints, "_active", set())
+        assert await graph_checkpoints.claim(saver, "cv-1")
+        await graph_checkpoints.release(saver, "cv-1")
+        await graph_checkpoints.release(saver, "cv-2")
+
+    asyncio.run(_with_saver(body))
+    assert _leases(sqlite_checkpoints) == []
+
+
+def test_cancel_while_waiting_for_a_slot_releases_the_claim(sqlite_checkpoints):
+    key = "cancelled-run"
+
+    async def body(saver):
+        slots = asyncio.Semaphore(1)
+        await slots.acquire()  # every slot busy
+        task = asyncio.create_task(
+            extractor._run_extraction(CV, "cv.txt", key, True, slots, "full")
+        )
+        while not _leases(sqlite_checkpoints):
+            await asyncio.sleep(0.01)
+        assert key in graph_checkpoints._active
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_with_saver(body))
+    assert graph_checkpoints._active == set()
+    assert _leases(sqlite_checkpoints) == []
+
+
+def test_cancel_while_taking_the_lease_drops_the_claim(sqlite_checkpoints, monkeypatch):
+    take_lease = graph_checkpoints._take_lease
+
+    async def cancelled_after_commit(saver, thread_id):
+        await take_lease(saver, thread_id)
+        raise asyncio.CancelledError
+
+    async def body(saver):
+        monkeypatch.setattr(graph_checkpoints, "_take_lease", cancelled_after_commit)
+        with pytest.raises(asyncio.CancelledError):
+            await graph_checkpoints.claim(saver, "cv-1")
+        assert graph_checkpoints._active == set()
+
+        # The lease row left behind does not lock this process out.
+        monkeypatch.setattr(graph_checkpoints, "_take_lease", take_lease)
+        assert await graph_checkpoints.claim(saver, "cv-1")
+        await graph_checkpoints.release(saver, "cv-1")
+
+    asyncio.run(_with_saver(body))
+    assert _leases(sqlite_checkpoints) == []
+
+
+def test_closing_the_stream_mid_run_releases_the_claim(sqlite_checkpoints):
+    async def body(_saver):
+        events = extractor.astream_skills_from_bytes(CV, "cv.txt", use_cache=False)
+        seen = []
+        async for event, _ in events:
+            seen.append(event)
+            if event == "initial_skills":
+                break
+        await events.aclose()  # the client went away
+        return seen
+
+    seen = asyncio.run(_with_saver(body))
+    assert seen[-1] == "initial_skills"
+    assert graph_checkpoints._active == set()
+    assert _leases(sqlite_checkpoints) == []
+    assert len(graph_checkpoints._pending) == 1  # kept for a resume
+
+
+def test_successful_run_releases_the_claim(sqlite_checkpoints):
+    result = extractor.extract_skills_from_bytes(CV, "cv.txt", use_cache=False)
+    assert "Python" in str(result["summary"])
+    assert graph_checkpoints._active == set()
+    assert _leases(sqlite_checkpoints) == []
@@ -0,0 +1,208 @@
+import threading
+
+import psycopg2
+import pytest
+
+from app import jobs, worker
+
+HASH = "a" * 64
+
+
+@pytest.fixture
+def queue(pg, monkeypatch):
+    monkeypatch.setattr(jobs, "_schema_ready", False)
+    jobs.ensure_schema()
+    with pg.cursor() as cur:
+        cur.execute("TRUNCATE extraction_job")
+    return pg
+
+
+def _row(conn, job_id):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT status, attempts, run_after > NOW(), file_bytes IS NULL, error "
+            "FROM extraction_job WHERE job_id = %s",
+            (job_id,),
+        )
+        return cur.fetchone()
+
+
+def _make_ready(conn):
+    with conn.cursor() as cur:
+        cur.execute("UPDATE extraction_job SET run_after = NOW()")
+
+
+def _make_stale(conn):
+    with conn.cursor() as cur:
+        cur.execute("UPDATE extraction_job SET locked_at = NOW() - INTERVAL '1 day'")
+
+
+def test_failed_attempts_back_off_then_fail(queue):
+    job_id = jobs.enqueue("e1", "cv.pdf", b"pdf", HASH)["job_id"]
+
+    for attempt in (1, 2):
+        job = jobs.claim_next()
+        assert (job["job_id"], job["attempts"]) == (job_id, attempt)
+        assert jobs.fail(job_id, "boom", job["attempts"], job["max_attempts"]) == "queued"
+        status, _, delayed, _, error = _row(queue, job_id)
+        assert (status, delayed, error) == ("queued", True, "boom")
+        assert jobs.claim_next() is None  # backing off
+        _make_ready(queue)
+
+    job = jobs.claim_next()
+    assert jobs.fail(job_id, "boom", job["attempts"], job["max_attempts"]) == "failed"
+    assert _row(queue, job_id)[:2] == ("failed", 3)
+    assert _row(queue, job_id)[3] is True  # upload dropped
+    assert jobs.claim_next() is None
+
+
+def test_complete_stores_result(queue):
+    job_id = jobs.enqueue("e1", "cv.pdf", b"pdf", HASH)["job_id"]
+    jobs.claim_next()
+    jobs.complete(job_id, {"skills": ["Python"]})
+    with queue.cursor() as cur:
+        cur.execute("SELECT status, result, file_bytes FROM extraction_job")
+        assert cur.fetchone() == ("done", {"skills": ["Python"]}, None)
+
+
+def test_requeue_stale_retries_then_fails_exhausted_jobs(queue):
+    job_id = jobs.enqueue("e1", "cv.pdf", b"pdf", HASH)["job_id"]
+    jobs.claim_next()
+    _make_stale(queue)
+    assert jobs.requeue_stale() == 1
+    assert _row(queue, job_id)[0] == "queued"
+
+    with queue.cursor() as cur:
+        cur.execute("UPDATE extraction_job SET attempts = max_attempts - 1")
+    jobs.claim_next()
+    _make_stale(queue)
+    assert jobs.requeue_stale() == 0
+    status, attempts, _, dropped, error = _row(queue, job_id)
+    assert (status, attempts, dropped) == ("failed", 3, True)
+    assert "Worker stopped" in error
+
+
+def _large_objects(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM pg_largeobject_metadata")
+        return cur.fetchone()[0]
+
+
+def test_upload_is_streamed_through_a_large_object(queue, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "UPLOAD_CHUNK_BYTES", 1000)
+    data = b"Jane Doe\nPython, SQL, Kubernetes\n" * 500
+    path = tmp_path / "cv.txt"
+    path.write_bytes(data)
+    before = _large_objects(queue)
+
+    job_id = jobs.enqueue("e1", "cv.txt", str(path), HASH)["job_id"]
+    assert _large_objects(queue) == before + 1
+    # A duplicate upload does not leave a second object behind.
+    jobs.enqueue("e1", "cv.txt", str(path), HASH, use_cache=False)
+    assert _large_objects(queue) == before + 1
+
+    job = jobs.claim_next()
+    assert job["file_oid"] is not None
+    with jobs.open_upload(job) as upload:
+        with open(upload.path, "rb") as fh:
+            assert fh.read() == data
+        assert upload.extension == ".txt"
+    jobs.complete(job_id, {})
+    assert _large_objects(queue) == before
+
+
+def test_enqueue_reuses_live_job(queue):
+    first = jobs.enqueue("e1", "cv.pdf", b"pdf", HASH)
+    again = jobs.enqueue("e1", "cv.pdf", b"pdf", HASH)
+    assert again == {"job_id": first["job_id"], "status": "queued", "deduplicated": True}
+    # Without the cache a live job is still reused, a finished one is not.
+    assert jobs.enqueue("e1", "cv.pdf", b"pdf", HASH, use_cache=False)["job_id"] == first["job_id"]
+    jobs.claim_next()
+    jobs.complete(first["job_id"], {})
+    assert jobs.enqueue("e1", "cv.pdf", b"pdf", HASH)["job_id"] == first["job_id"]
+    fresh = jobs.enqueue("e1", "cv.pdf", b"pdf", HASH, use_cache=False)
+    assert fresh["deduplicated"] is False
+
+
+def test_concurrent_enqueue_creates_one_job(queue):
+    results = []
+    barrier = threading.Barrier(5)
+
+    def upload():
+        barrier.wait()
+        results.append(jobs.enqueue("e1", "cv.pdf", b"pdf", HASH, use_cache=False))
+
+    threads = [threading.Thread(target=upload) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({r["job_id"] for r in results}) == 1
+    with queue.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM extraction_job")
+        assert cur.fetchone()[0] == 1
+
+
+def test_worker_loop_survives_database_errors(monkeypatch):
+    calls = {"claim": 0}
+
+    def claim_next():
+        calls["claim"] += 1
+        if calls["claim"] <= 2:
+            raise psycopg2.OperationalError("server closed the connection")
+        return None
+
+    sleeps = []
+    monkeypatch.setattr(jobs, "ensure_schema", lambda: None)
+    monkeypatch.setattr(jobs, "requeue_stale", lambda: 0)
+    monkeypatch.setattr(jobs, "claim_next", claim_next)
+    monkeypatch.setattr(worker.time, "sleep", sleeps.append)
+
+    worker.worker_loop(stop_after_idle=1e-9)
+
+    assert calls["claim"] == 3
+    # Backoff doubles while errors repeat, then the loop goes back to polling.
+    assert sleeps[:2] == [worker.JOB_POLL_INTERVAL * 5, worker.JOB_POLL_INTERVAL * 10]
+
+
+def _run_failing(monkeypatch, exc):
+    import app.extractor_with_langgraph as extractor
+
+    def extract(*args, **kwargs):
+        raise exc
+
+    monkeypatch.setattr(extractor, "extract_skills_from_upload", extract)
+    worker._run_one(jobs.claim_next())
+
+
+def test_rate_limited_job_is_deferred_without_using_an_attempt(queue, monkeypatch):
+    from app.llm_limiter import LLMOverloaded
+
+    job_id = jobs.enqueue("e1", "cv.txt", b"Jane Doe\nPython", HASH)["job_id"]
+    for _ in range(jobs.JOB_MAX_ATTEMPTS + 1):
+        _run_failing(monkeypatch, LLMOverloaded("busy", retry_after=5))
+        status, attempts, delayed, _, _ = _row(queue, job_id)
+        assert (status, attempts, delayed) == ("queued", 0, True)
+        _make_ready(queue)
+
+
+def test_provider_throttle_is_deferred(queue, monkeypatch):
+    class RateLimitError(Exception):
+        status_code = 429
+
+    job_id = jobs.enqueue("e1", "cv.txt", b"Jane Doe\nPython", HASH)["job_id"]
+    _run_failing(monkeypatch, RateLimitError("429 Too Many Requests"))
+    assert _row(queue, job_id)[:3] == ("queued", 0, True)
+
+
+def test_unsupported_file_fails_permanently(queue, monkeypatch):
+    job_id = jobs.enqueue("e1", "cv.txt", b"Jane Doe\nPython", HASH)["job_id"]
+    _run_failing(monkeypatch, RuntimeError("Unsupported file type"))
+    assert _row(queue, job_id)[:2] == ("failed", 1)
+
+
+def test_unreadable_stored_file_fails_permanently(queue):
+    job_id = jobs.enqueue("e1", "cv.pdf", b"not a pdf", HASH)["job_id"]
+    worker._run_one(jobs.claim_next())
+    assert _row(queue, job_id)[:2] == ("failed", 1)
@@ -0,0 +1,20 @@
+from fastapi.testclient import TestClient
+
+from app import main, password_hashing, skill_store, text_extraction
+from app.routes import auth
+
+
+def test_shutdown_stops_every_worker_pool(monkeypatch):
+    stopped = []
+    monkeypatch.setattr(main.db, "init_pool", lambda: None)
+    monkeypatch.setattr(main.db, "close_pool", lambda: stopped.append("db"))
+    monkeypatch.setattr(skill_store, "init_schema", lambda: True)
+    monkeypatch.setattr(password_hashing, "shutdown_executor", lambda: stopped.append("bcrypt"))
+    monkeypatch.setattr(text_extraction, "shutdown_pool", lambda: stopped.append("pdf"))
+    monkeypatch.setattr(auth, "shutdown_executor", lambda: stopped.append("auth-db"))
+
+    with TestClient(main.app) as client:
+        assert client.get("/").status_code == 200
+        assert stopped == []
+
+    assert sorted(stopped) == ["auth-db", "bcrypt", "db", "pdf"]
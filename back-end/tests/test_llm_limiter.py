@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from app.llm_limiter import AdmissionController, LLMOverloaded, is_throttle, retry_after_of
+
+
+def _controller(**kwargs):
+    # 10 requests/s with a one-request burst; tokens unlimited unless asked.
+    options = {"rpm": 600, "tpm": 0, "burst_seconds": 0.1, "max_queue": 10, "max_wait": 5}
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def test_acquire_admits_then_paces():
+    limiter = _controller()
+
+    async def run():
+        started = time.monotonic()
+        await limiter.acquire(100)
+        first = time.monotonic() - started
+        await limiter.acquire(100)
+        return first, time.monotonic() - started
+
+    first, second = asyncio.run(run())
+    assert first < 0.05
+    assert 0.05 < second < 1
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_acquire_rejects_when_wait_exceeds_max_wait():
+    limiter = _controller(rpm=60)  # one request per second
+
+    async def run():
+        await limiter.acquire(1)
+        await limiter.acquire(1, max_wait=0.1)
+
+    with pytest.raises(LLMOverloaded) as info:
+        asyncio.run(run())
+    assert 0 < info.value.retry_after <= 1
+
+
+def test_token_bucket_limits_large_prompts():
+    limiter = _controller(rpm=0, tpm=600, burst_seconds=1, max_wait=0.5)  # 10 tokens/s
+
+    async def run():
+        await limiter.acquire(10)
+        await limiter.acquire(10)
+
+    with pytest.raises(LLMOverloaded):
+        asyncio.run(run())
+
+
+def test_acquire_rejects_when_queue_is_full():
+    limiter = _controller(rpm=60, max_queue=1)
+
+    async def run():
+        await limiter.acquire(1)
+        waiter = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0.05)
+        assert limiter.stats()["waiting"] == 1
+        try:
+            with pytest.raises(LLMOverloaded, match="Too many requests"):
+                await limiter.acquire(1)
+        finally:
+            waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(run())
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_provider_throttle_holds_every_caller():
+    limiter = _controller()
+    limiter.throttled(30)
+
+    with pytest.raises(LLMOverloaded) as info:
+        asyncio.run(limiter.acquire(1))
+    assert info.value.retry_after > 29
+
+
+class _Response:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class _ProviderError(Exception):
+    def __init__(self, status_code, headers):
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code, headers)
+
+
+def test_provider_error_helpers():
+    assert is_throttle(_ProviderError(429, {}))
+    assert is_throttle(_ProviderError(503, {}))
+    assert not is_throttle(_ProviderError(400, {}))
+    assert retry_after_of(_ProviderError(429, {"retry-after": "12"})) == 12
+    assert retry_after_of(_ProviderError(429, {"x-ratelimit-reset-tokens": "2m59.5s"})) == 179.5
+    assert retry_after_of(_ProviderError(429, {})) is None
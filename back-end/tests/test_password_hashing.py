@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from app import password_hashing
+
+
+def test_hash_verify_and_shutdown(monkeypatch):
+    monkeypatch.setattr(password_hashing, "BCRYPT_ROUNDS", 4)
+
+    async def run():
+        hashed = await password_hashing.hash_password("s3cret-pass")
+        return hashed, await password_hashing.verify_password("s3cret-pass", hashed)
+
+    hashed, ok = asyncio.run(run())
+    assert ok and hashed.startswith("$2b$04$")
+    assert password_hashing.queue_depth() == 0
+    assert password_hashing._executor is not None
+
+    password_hashing.shutdown_executor()
+    assert password_hashing._executor is None
+    # The pool is recreated on demand after a shutdown.
+    assert asyncio.run(password_hashing.verify_password("wrong", hashed)) is False
+    password_hashing.shutdown_executor()
+
+
+def test_full_queue_is_rejected(monkeypatch):
+    monkeypatch.setattr(password_hashing, "BCRYPT_MAX_QUEUE", 0)
+    with pytest.raises(password_hashing.HashingOverloaded):
+        asyncio.run(password_hashing.verify_password("x", "$2b$04$invalid"))
+    assert password_hashing.queue_depth() == 0
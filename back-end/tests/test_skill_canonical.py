@@ -0,0 +1,56 @@
+import pytest
+
+from app.extractor_with_langgraph import extraction_review_reasons
+from app.skill_canonical import SkillCanonicalizer, canonicalize_skills
+
+
+def test_canonicalize_extraction():
+    raw = {
+        "hard_skills": ["Data Analysis", "Docker", "ML", "machine learning"],
+        "soft_skills": ["Leadership", "Hard worker", "Team player", "leadership"],
+        "tools_and_tech": ["MS Excel", "React.js", "Kubernets", "Python", "python "],
+        "languages": ["English (Native)", "Arabic"],
+    }
+    assert canonicalize_skills(raw) == {
+        "hard_skills": ["Data Analysis", "Machine Learning"],
+        "soft_skills": ["Leadership"],
+        "tools_and_tech": ["Docker", "Excel", "React", "Kubernetes", "Python"],
+        "languages": ["English", "Arabic"],
+    }
+
+
+def test_canonicalize_summary_keys_and_non_lists():
+    summary = {"core_hard_skills": ["Git"], "core_tools_and_tech": ["JS", "JavaScript"], "notes": None}
+    assert canonicalize_skills(summary) == {
+        "core_hard_skills": [],
+        "core_tools_and_tech": ["Git", "JavaScript"],
+        "notes": None,
+    }
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("K8s", "Kubernetes"),
+        ("PowerBI", "Power BI"),
+        ("Kubernets", "Kubernetes"),  # one typo away from a known name
+        ("Scale", "Scale"),  # short: never fuzzy-matched to Scala
+        ("Python 2", "Python 2"),  # digits differ: a different skill
+    ],
+)
+def test_canonical_names(name, expected):
+    canonicalizer = SkillCanonicalizer()
+    canonicalizer.add(["Power BI", "Scala", "Python 3"])  # as if loaded from the skill table
+    assert canonicalizer.canonical(name) == expected
+
+
+def test_review_reasons_only_flag_what_canonicalization_cannot_fix():
+    raw = {
+        "hard_skills": ["Docker", "Data Analysis", "data analysis"],
+        "soft_skills": ["Motivated"],
+        "tools_and_tech": ["Python"],
+        "languages": [],
+    }
+    assert extraction_review_reasons(canonicalize_skills(raw)) == []
+    assert extraction_review_reasons(canonicalize_skills({**raw, "tools_and_tech": []})) == []
+    assert extraction_review_reasons({"hard_skills": [], "tools_and_tech": ["Python"]}) == ["empty_category"]
@@ -0,0 +1,158 @@
+from array import array
+
+import pytest
+
+from app.skill_index import QuerySyntaxError, SkillIndex, parse_query
+
+SKILLS = [(1, "Python"), (2, "Django"), (3, "Odoo"), (4, "Arabic"), (5, "Arabic Calligraphy"), (6, "Go")]
+
+
+def _index(employees=100):
+    """e000..e099: everyone knows Python; Django every 2nd, Odoo every 3rd, Arabic every 40th."""
+    ids = [f"e{i:03d}" for i in range(employees)]
+    links = [(1, e) for e in ids]
+    links += [(2, e) for e in ids[::2]]
+    links += [(3, e) for e in ids[::3]]
+    links += [(4, e) for e in ids[::40]]
+    links += [(5, "e001")]
+    index = SkillIndex()
+    index.build(SKILLS, links)
+    return index
+
+
+def _expected(predicate, employees=100):
+    return [f"e{i:03d}" for i in range(employees) if predicate(i)]
+
+
+# ----------------------
+# Parsing
+# ----------------------
+def test_and_binds_tighter_than_or_and_not_tightest():
+    a, b, c = ("term", "A", False), ("term", "B", False), ("term", "C", False)
+    assert parse_query("A OR B AND C") == ("or", [a, ("and", [b, c])])
+    assert parse_query("(A OR B) AND NOT C*") == ("and", [("or", [a, b]), ("not", ("term", "C", True))])
+    assert parse_query("NOT A AND B") == ("and", [("not", a), b])
+
+
+def test_lower_case_operators_are_part_of_the_name():
+    assert parse_query('Research and Development OR "Go"') == (
+        "or",
+        [("term", "Research and Development", False), ("term", "Go", False)],
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["", "   ", "AND", "Python AND", "OR Python", "(Python", "Python)", "()", "Python (Go)", "*", '""', "NOT", "Python NOT Go"],
+)
+def test_malformed_queries_raise_a_syntax_error(query):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(query)
+
+
+# ----------------------
+# Postings
+# ----------------------
+def test_postings_switch_to_bitmaps_when_dense():
+    index = SkillIndex()
+    ids = [f"e{i:03d}" for i in range(100)]
+    # 3 holders in 100 employees: 3 * 32 <= 100 stays an array; 4 holders becomes a bitmap.
+    index.build([(1, "Python"), (2, "Go")], [(1, e) for e in ids] + [(2, e) for e in ids[:3]])
+    assert isinstance(index._postings[1], int)
+    assert isinstance(index._postings[2], array)
+
+    index.add("e050", {"Go": 2})
+    assert isinstance(index._postings[2], int)
+    assert index.search("Go")["employee_ids"] == ["e000", "e001", "e002", "e050"]
+
+
+@pytest.mark.parametrize(
+    "query, predicate",
+    [
+        ("Python AND Django", lambda i: i % 2 == 0),
+        ("Django AND Odoo", lambda i: i % 6 == 0),
+        ("Django OR Odoo", lambda i: i % 2 == 0 or i % 3 == 0),
+        ("Django AND NOT Odoo", lambda i: i % 2 == 0 and i % 3 != 0),
+        ("NOT Django", lambda i: i % 2 == 1),
+        # Arabic is sparse (an array), Django dense (a bitmap).
+        ("Arabic AND Django", lambda i: i % 40 == 0),
+        ("Arabic OR Odoo", lambda i: i % 40 == 0 or i % 3 == 0),
+        ("Odoo AND NOT Arabic", lambda i: i % 3 == 0 and i % 40 != 0),
+        ("Arab*", lambda i: i % 40 == 0 or i == 1),
+        ("python and django", lambda i: False),  # one unknown name, not an AND
+    ],
+)
+def test_boolean_queries(query, predicate):
+    index = _index()
+    assert isinstance(index._postings[2], int) and isinstance(index._postings[4], array)
+    result = index.search(query, limit=1000)
+    expected = _expected(predicate)
+    assert result["employee_ids"] == expected
+    assert result["total"] == len(expected)
+
+
+def test_unknown_terms_are_reported():
+    result = _index().search("Python AND (Rust OR Zig*)")
+    assert result == {"total": 0, "employee_ids": [], "unknown_terms": ["Rust", "Zig*"]}
+
+
+def test_pages_are_stable_and_complete():
+    index = _index()
+    seen = []
+    for offset in range(0, 50, 7):
+        seen += index.search("Django", offset=offset, limit=7)["employee_ids"]
+    assert seen == _expected(lambda i: i % 2 == 0)
+    assert index.search("Django", offset=50)["employee_ids"] == []
+
+
+def test_autocomplete_orders_by_holders_then_name():
+    index = _index()
+    index.add("e099", {"Arabic Calligraphy": 5})
+    assert index.autocomplete("arab") == [
+        {"name": "Arabic", "employees": 3},
+        {"name": "Arabic Calligraphy", "employees": 2},
+    ]
+    assert [s["name"] for s in index.autocomplete("", limit=3)] == ["Python", "Django", "Odoo"]
+    assert index.autocomplete("zz") == []
+
+
+# ----------------------
+# Updates and reloads
+# ----------------------
+def test_add_before_the_first_load_is_ignored():
+    index = SkillIndex()
+    index.add("e1", {"Python": 1})
+    assert not index.loaded and index.stats()["employees"] == 0
+
+
+def test_add_new_employee_and_skill():
+    index = _index()
+    index.add("new", {"Rust": 99, "Django": 2})
+    assert index.search("Rust")["employee_ids"] == ["new"]
+    assert index.search("Django AND Rust")["total"] == 1
+    assert index.search("NOT Python")["employee_ids"] == ["new"]
+
+
+def test_adds_during_a_reload_are_reapplied(monkeypatch):
+    index = _index()
+
+    def fetch():
+        # A save lands while the reload's SELECT is running: its rows are not in the snapshot.
+        index.add("late", {"Rust": 99})
+        return SKILLS, [(1, "e000"), (2, "e000")]
+
+    monkeypatch.setattr(index, "_fetch", fetch)
+    assert index.refresh_from_db(force=True)
+
+    assert index.search("Rust")["employee_ids"] == ["late"]
+    assert index.search("Python")["employee_ids"] == ["e000"]
+    assert index.stats()["employees"] == 2
+    assert not index._loading and index._pending == []
+
+
+def test_failed_reload_keeps_the_old_index(monkeypatch):
+    index = _index()
+    monkeypatch.setattr(index, "_fetch", lambda: None)
+    assert not index.refresh_from_db(force=True)
+    assert index.search("Python")["total"] == 100
+    assert not index._loading
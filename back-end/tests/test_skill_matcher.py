@@ -0,0 +1,26 @@
+from app.skill_matcher import SkillMatcher
+
+
+def _matcher(*names):
+    matcher = SkillMatcher()
+    matcher.add(names)
+    return matcher
+
+
+def test_long_names_match_any_case():
+    matcher = _matcher("Python", "Machine Learning", "Learning")
+    text = "PYTHON and machine learning; python again."
+    assert matcher.scan(text) == {"Python": 2, "Machine Learning": 1}
+
+
+def test_short_names_need_exact_case():
+    matcher = _matcher("Go", "C#", "SQL", "R")
+    text = "Ready to go the extra mile. Built services in Go and C#, queried sql."
+    assert matcher.scan(text) == {"Go": 1, "C#": 1}
+    assert matcher.scan("Wrote SQL daily, GO to market.") == {"SQL": 1}
+
+
+def test_matches_whole_words_only():
+    matcher = _matcher("Java", "Go")
+    assert matcher.scan("JavaScript, Golang, Django") == {}
+    assert matcher.scan("Java/Go") == {"Java": 1, "Go": 1}
@@ -0,0 +1,134 @@
+import pytest
+
+from app import skill_reads, skill_store
+from app.routes import cv
+from app.skill_reads import ReadCache, etag_matches
+
+
+@pytest.fixture
+def reads(pg, monkeypatch):
+    monkeypatch.setattr(skill_reads, "cache", ReadCache(max_entries=100, ttl=60))
+    skill_store.forget_skill_ids()
+    with pg.cursor() as cur:
+        cur.execute("TRUNCATE employee, skill, employee_skill CASCADE")
+        for i in range(12):
+            cur.execute(
+                "INSERT INTO employee (id, name, email, password) VALUES (%s, %s, %s, 'x')",
+                (f"e{i:02d}", f"User {i}", f"u{i}@example.com"),
+            )
+    skill_store.init_schema()
+    yield pg
+    skill_store.forget_skill_ids()
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record the SQL each read sends to the database."""
+    sent = []
+    run = skill_reads._run
+
+    def spy(sql, params):
+        sent.append(sql)
+        return run(sql, params)
+
+    monkeypatch.setattr(skill_reads, "_run", spy)
+    return sent
+
+
+def test_etag_matches():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"abd"', etag)
+    assert not etag_matches("abc", etag)  # unquoted
+    assert not etag_matches(None, etag) and not etag_matches("", etag)
+
+
+def test_304_from_the_cache_without_a_query(reads, queries):
+    skill_store.save_employee_skills("e00", ["Python", "SQL"])
+    etag, body = skill_reads.employee_skills("e00", 0, 10)
+    assert [s["name"] for s in body["skills"]] == ["Python", "SQL"]
+    queries.clear()
+
+    assert skill_reads.employee_skills("e00", 0, 10, f"W/{etag}") == (etag, None)
+    assert skill_reads.employee_skills("e00", 0, 10, '"stale"') == (etag, body)
+    assert queries == []
+
+
+def test_304_by_revalidating_the_version(reads, queries):
+    skill_store.save_employee_skills("e00", ["Python", "SQL"])
+    etag, _ = skill_reads.employee_skills("e00", 0, 10)
+    skill_reads.cache.clear()  # e.g. another worker, or the entry expired
+    queries.clear()
+
+    assert skill_reads.employee_skills("e00", 0, 10, etag) == (etag, None)
+    assert queries == [skill_reads.VERSION_SQL]
+
+
+def test_employee_pages_chain_without_gaps_or_duplicates(reads):
+    names = [f"Skill {i:02d}" for i in range(23)]
+    saved = skill_store.save_employee_skills("e00", names)["skill_ids"]
+
+    seen, after, pages = [], 0, 0
+    while after is not None:
+        _, body = skill_reads.employee_skills("e00", after, 5)
+        seen += [s["skill_id"] for s in body["skills"]]
+        after = body["next_after"]
+        pages += 1
+    assert seen == sorted(saved.values())
+    assert pages == 5
+
+
+def test_skill_employee_pages_chain_and_unknown_skill(reads):
+    for i in range(12):
+        skill_store.save_employee_skills(f"e{i:02d}", ["Python"])
+    skill_id = skill_store.save_employee_skills("e00", ["Python"])["skill_ids"]["Python"]
+
+    seen, after = [], ""
+    while after is not None:
+        _, body = skill_reads.skill_employees(skill_id, after, 5)
+        assert body["name"] == "Python"
+        seen += [e["id"] for e in body["employees"]]
+        after = body["next_after"]
+    assert seen == [f"e{i:02d}" for i in range(12)]
+
+    etag, _ = skill_reads.skill_employees(skill_id, "", 5)
+    assert skill_reads.skill_employees(skill_id, "", 5, etag) == (etag, None)
+    assert skill_reads.skill_employees(10**9, "", 5) is None
+
+
+def test_save_skills_invalidates_the_cached_pages(reads, queries):
+    user = {"id": "e00", "email": "u0@example.com"}
+    cv.save_skills(cv.SkillSaveRequest(skills=["Python"]), user=user)
+    etag, body = skill_reads.employee_skills("e00", 0, 10)
+    skill_id = body["skills"][0]["skill_id"]
+    skill_etag, _ = skill_reads.skill_employees(skill_id, "", 10)
+
+    cv.save_skills(cv.SkillSaveRequest(skills=["Python", "Kubernetes"]), user=user)
+    queries.clear()
+
+    new_etag, new_body = skill_reads.employee_skills("e00", 0, 10, etag)
+    assert new_etag != etag
+    assert [s["name"] for s in new_body["skills"]] == ["Python", "Kubernetes"]
+    assert skill_reads.EMPLOYEE_PAGE_SQL in queries  # not served from the stale entry
+    # The skill's page was dropped too, even though its content is unchanged.
+    queries.clear()
+    assert skill_reads.skill_employees(skill_id, "", 10, skill_etag) == (skill_etag, None)
+    assert queries == [skill_reads.SKILL_EMPLOYEES_SQL]
+
+
+def test_read_cache_expires_and_stays_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(skill_reads.time, "monotonic", lambda: now[0])
+    cache = ReadCache(max_entries=2, ttl=30)
+    cache.put(("emp", "a", 0, 10), '"a"', {})
+    cache.put(("emp", "b", 0, 10), '"b"', {})
+    cache.put(("emp", "c", 0, 10), '"c"', {})
+    assert cache.get(("emp", "a", 0, 10)) is None  # evicted, oldest
+    assert cache.invalidate("emp", ["b"]) == 1
+
+    now[0] += 30
+    assert cache.get(("emp", "c", 0, 10)) is None
+    assert cache.stats() == {"size": 0}
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from app import skill_store
+
+
+@pytest.fixture
+def store(pg, monkeypatch):
+    monkeypatch.setattr(skill_store, "_schema_ready", False)
+    monkeypatch.setattr(skill_store, "_has_unique_names", True)
+    skill_store.forget_skill_ids()
+    with pg.cursor() as cur:
+        cur.execute("TRUNCATE employee, skill, employee_skill CASCADE")
+        for i in range(4):
+            cur.execute(
+                "INSERT INTO employee (id, name, email, password) VALUES (%s, %s, %s, 'x')",
+                (f"e{i}", f"User {i}", f"u{i}@example.com"),
+            )
+    yield pg
+    skill_store.forget_skill_ids()
+
+
+def _links(conn, emp_id):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT s.name FROM employee_skill es JOIN skill s USING (skill_id) "
+            "WHERE es.emp_id = %s ORDER BY s.name",
+            (emp_id,),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def test_init_schema_then_save(store):
+    assert skill_store.init_schema() is True
+    first = skill_store.save_employee_skills("e0", ["Python", "SQL", "Python", ""])
+    assert first["saved"] == 2 and first["version"] == 1
+    again = skill_store.save_employee_skills("e0", ["SQL", "Docker"])
+    assert again["saved"] == 1 and again["version"] == 2
+    assert skill_store.save_employee_skills("e0", ["Docker"]) == {
+        "saved": 0,
+        "skill_ids": {"Docker": again["skill_ids"]["Docker"]},
+        "version": None,
+    }
+    assert _links(store, "e0") == ["Docker", "Python", "SQL"]
+
+
+def test_request_path_runs_no_ddl(store):
+    with store.cursor() as cur:
+        cur.execute("DROP INDEX IF EXISTS skill_name_key")
+        cur.execute("INSERT INTO skill (name) VALUES ('Python'), ('Python')")
+    # Startup never ran: the save only inspects the catalog and uses the fallback upsert.
+    result = skill_store.save_employee_skills("e1", ["Python", "Go"])
+    assert result["saved"] == 2
+    assert skill_store._has_unique_names is False
+    with store.cursor() as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM pg_indexes "
+            "WHERE indexname = 'skill_name_key' AND schemaname = current_schema()"
+        )
+        assert cur.fetchone()[0] == 0
+        cur.execute("DELETE FROM skill WHERE name = 'Python'")
+
+
+def test_concurrent_saves_share_skill_rows(store):
+    skill_store.init_schema()
+    names = [f"Skill {i}" for i in range(30)]
+    errors = []
+    barrier = threading.Barrier(4)
+
+    def save(emp_id):
+        try:
+            barrier.wait()
+            skill_store.save_employee_skills(emp_id, names)
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=save, args=(f"e{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    with store.cursor() as cur:
+        cur.execute("SELECT COUNT(*), COUNT(DISTINCT name) FROM skill")
+        assert cur.fetchone() == (30, 30)
+    assert all(len(_links(store, f"e{i}")) == 30 for i in range(4))
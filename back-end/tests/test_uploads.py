@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from app.text_extraction import extract_text
+from app.uploads import UploadRejected, sniff_extension, spool_stream
+
+
+@pytest.mark.parametrize(
+    "head, filename, expected",
+    [
+        (b"%PDF-1.7\n", "cv.pdf", ".pdf"),
+        (b"%PDF-1.7\n", "cv.txt", ".pdf"),  # magic bytes beat the name
+        (b"PK\x03\x04rest", "cv.docx", ".docx"),
+        (b"PK\x03\x04rest", "cvs.zip", ".zip"),
+        (b"Jane Doe\nPython, SQL\n", "cv.txt", ".txt"),
+        (b"Jane Doe\nPython, SQL\n", "cv", ".txt"),
+        ("Renée Müller – Développeuse".encode("utf-8"), "cv.txt", ".txt"),
+        ("café".encode("utf-8")[:-1], "cv.txt", ".txt"),  # cut mid-character
+        # Exports from older editors and Windows tools.
+        ("Renée Müller – Développeuse".encode("cp1252"), "cv.txt", ".txt"),
+        ("Renée".encode("latin-1"), "cv.txt", ".txt"),
+        ("Renée Müller".encode("utf-16"), "cv.txt", ".txt"),
+        ("Renée Müller".encode("utf-8-sig"), "cv.txt", ".txt"),
+    ],
+)
+def test_sniff_accepts(head, filename, expected):
+    assert sniff_extension(head, filename) == expected
+
+
+@pytest.mark.parametrize(
+    "head, filename",
+    [
+        (b"\x89PNG\r\n\x1a\n" + b"x" * 100, "cv.txt"),
+        (b"\xff\xd8\xff\xe0" + b"x" * 100, "photo.txt"),
+        (b"GIF89a" + b"x" * 100, "cv.txt"),
+        (b"\x1f\x8b\x08" + b"x" * 100, "cv.txt"),
+        (b"hello\x00world", "cv.txt"),
+        ("Renée".encode("utf-16-le"), "cv.txt"),  # UTF-16 needs its BOM
+        (b"\xe9" + bytes(range(1, 32)) * 4, "cv.txt"),  # control bytes: not text
+        (b"plain text", "cv.pdf"),  # claims to be a document but is not
+        (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "cv.doc"),
+        (b"", "cv.txt"),
+    ],
+)
+def test_sniff_rejects(head, filename):
+    with pytest.raises(UploadRejected):
+        sniff_extension(head, filename)
+
+
+def test_spool_stream_sniffs_past_a_text_prefix():
+    # Binary junk after the first few bytes used to pass as text.
+    data = b"ABCDEFGH" + bytes(range(128, 256)) * 10
+    with pytest.raises(UploadRejected):
+        spool_stream(io.BytesIO(data), "notes.txt")
+
+
+def test_spool_stream_hashes_and_caps_size():
+    data = b"Python developer\n" * 1000
+    with spool_stream(io.BytesIO(data), "cv.txt") as upload:
+        assert (upload.extension, upload.size) == (".txt", len(data))
+        with open(upload.path, "rb") as fh:
+            assert fh.read() == data
+
+    with pytest.raises(UploadRejected) as info:
+        spool_stream(io.BytesIO(data), "cv.txt", max_bytes=100)
+    assert info.value.status_code == 413
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "cp1252"])
+def test_text_cv_is_decoded_in_its_encoding(tmp_path, encoding):
+    text = "Renée Müller – Développeuse\nPython, SQL\n"
+    path = tmp_path / "cv.txt"
+    path.write_bytes(text.encode(encoding))
+    with open(path, "rb") as fh:
+        with spool_stream(fh, "cv.txt") as upload:
+            assert extract_text(upload.path, upload.parse_name)["text"] == text